@@ -0,0 +1,91 @@
+# credentials_provider.py
+import copy
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 3600
+
+
+class CredentialProvider:
+    """
+    Fetches service-account credentials from Secret Manager and memoizes them in memory.
+
+    Payloads are cached per (project, secret) for `ttl` seconds, and concurrent requests for
+    the same secret share a single fetch, so Firestore and GCS initialization cost one Secret
+    Manager call per process. In development or tests the cache can be warmed from a local
+    JSON file (`GCP_CREDENTIALS_FILE`), in which case Secret Manager is never contacted.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, local_file=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache = {}  # (project_id, secret_id) -> (expires_at, payload)
+        self._inflight = {}  # (project_id, secret_id) -> Event set when its fetch finishes
+        self._client = None
+        if local_file:
+            self.warm_from_file(local_file)
+
+    def get(self, project_id=None, secret_id=None):
+        """Return the credentials JSON stored in the latest version of the secret."""
+        key = (project_id or os.getenv('gcp_project_id'), secret_id or os.getenv('credentials_secret_id'))
+        while True:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached and cached[0] > time.time():
+                    return copy.deepcopy(cached[1])
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    inflight = self._inflight[key] = threading.Event()
+                    break
+            # Another thread is fetching this secret; wait for it, then read the cache
+            inflight.wait()
+
+        try:
+            payload = self._fetch(*key)
+            with self._lock:
+                self._cache[key] = (time.time() + self.ttl, payload)
+            return copy.deepcopy(payload)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def warm_from_file(self, path, project_id=None, secret_id=None):
+        """Serve the secret from a local JSON file; warmed entries never expire."""
+        key = (project_id or os.getenv('gcp_project_id'), secret_id or os.getenv('credentials_secret_id'))
+        with open(path) as f:
+            payload = json.load(f)
+        with self._lock:
+            self._cache[key] = (float('inf'), payload)
+
+    def invalidate(self, project_id=None, secret_id=None):
+        """Drop a cached secret, e.g. after the key has been rotated."""
+        key = (project_id or os.getenv('gcp_project_id'), secret_id or os.getenv('credentials_secret_id'))
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def _fetch(self, project_id, secret_id):
+        """Fetch credentials from Secret Manager."""
+        from google.cloud import secretmanager
+
+        with self._lock:
+            if self._client is None:
+                self._client = secretmanager.SecretManagerServiceClient()
+        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
+        response = self._client.access_secret_version(request={"name": name})
+        return json.loads(response.payload.data.decode("UTF-8"))
+
+
+_default_credential_provider = None
+_default_credential_provider_lock = threading.Lock()
+
+
+def get_default_credential_provider():
+    """Return the process-wide credential provider shared by firebase_config and gcp_config."""
+    global _default_credential_provider
+    if _default_credential_provider is None:
+        with _default_credential_provider_lock:
+            if _default_credential_provider is None:
+                _default_credential_provider = CredentialProvider(local_file=os.getenv('GCP_CREDENTIALS_FILE'))
+    return _default_credential_provider
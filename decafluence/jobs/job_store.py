@@ -0,0 +1,217 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_BUSY_TIMEOUT_MS = 30000  # How long a writer waits for another connection's lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    method TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (status, available_at);
+"""
+
+
+@dataclass
+class PublishJob:
+    """A queued publish request and where it is in its lifecycle."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    id: str
+    platform: str
+    method: str
+    arguments: dict
+    status: str
+    attempts: int
+    max_attempts: int
+    created_at: float
+    updated_at: float
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def done(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            id=row['id'], platform=row['platform'], method=row['method'],
+            arguments=json.loads(row['arguments']), status=row['status'], attempts=row['attempts'],
+            max_attempts=row['max_attempts'], created_at=row['created_at'], updated_at=row['updated_at'],
+            result=json.loads(row['result']) if row['result'] is not None else None, error=row['error'],
+        )
+
+
+class JobStore:
+    """
+    Durable publish job table in a local SQLite database.
+
+    The database runs in WAL mode so status reads never block the workers writing to it, and
+    every connection is private to its thread. A worker claims a job by taking a lease on it;
+    if the worker dies, the lease runs out and the job is claimed again, so every job runs at
+    least once. Results and failures are only recorded by the worker holding the lease.
+    `path` is the database file, which every process sharing the queue must open; there is no
+    default, so the queue never lands in whatever directory the process started in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=DEFAULT_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable across process crashes in WAL mode
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def enqueue(self, platform, method, arguments, max_attempts):
+        """Store a new job and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, platform, method, arguments, status, max_attempts, created_at, updated_at,"
+                " available_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, platform, method, json.dumps(arguments), PublishJob.QUEUED, max_attempts, now, now, now),
+            )
+        return job_id
+
+    def claim(self, worker, lease_seconds):
+        """
+        Lease the next runnable job (queued and due, or running with an expired lease) to worker.
+        A job whose lease expired on its last allowed attempt is failed instead of run again, so a
+        job that keeps crashing its worker stops after max_attempts.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            abandoned = connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ?"
+                " WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (PublishJob.FAILED, "Lease expired on the last attempt; the worker likely crashed", now,
+                 PublishJob.RUNNING, now),
+            ).rowcount
+            if abandoned:
+                logger.warning(f"Failed {abandoned} jobs whose workers stopped on their last attempt")
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)"
+                " ORDER BY available_at LIMIT 1",
+                (PublishJob.QUEUED, now, PublishJob.RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if row['status'] == PublishJob.RUNNING:
+                logger.warning(f"Job {row['id']} lease held by {row['worker']} expired; running it again")
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease_expires_at = ?, updated_at = ?"
+                " WHERE id = ?",
+                (PublishJob.RUNNING, worker, now + lease_seconds, now, row['id']),
+            )
+            return self._get(connection, row['id'])
+
+    def extend_leases(self, worker, job_ids, lease_seconds):
+        """Keep worker's leases on job_ids alive while their publishes are still in progress."""
+        if not job_ids:
+            return
+        now = time.time()
+        with self._transaction() as connection:
+            connection.executemany(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                [(now + lease_seconds, job_id, worker, PublishJob.RUNNING) for job_id in job_ids],
+            )
+
+    def complete(self, job_id, worker, result):
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires_at = NULL, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (PublishJob.SUCCEEDED, json.dumps(result, default=str), time.time(), job_id, worker,
+                 PublishJob.RUNNING),
+            )
+
+    def fail(self, job_id, worker, error, retry_delay=None):
+        """Record a failed attempt; the job is queued again after retry_delay, or failed for good if None."""
+        now = time.time()
+        with self._transaction() as connection:
+            if retry_delay is None:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ?"
+                    " WHERE id = ? AND worker = ? AND status = ?",
+                    (PublishJob.FAILED, error, now, job_id, worker, PublishJob.RUNNING),
+                )
+            else:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, updated_at = ?"
+                    " WHERE id = ? AND worker = ? AND status = ?",
+                    (PublishJob.QUEUED, error, now + retry_delay, now, job_id, worker, PublishJob.RUNNING),
+                )
+
+    def get(self, job_id):
+        """Return the PublishJob for job_id, or None if there is no such job."""
+        return self._get(self._connect(), job_id)
+
+    @staticmethod
+    def _get(connection, job_id):
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return PublishJob.from_row(row) if row else None
+
+    def counts(self):
+        """Return the number of jobs in each status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def purge_finished(self, older_than):
+        """Delete succeeded and failed jobs last updated more than older_than seconds ago."""
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (PublishJob.SUCCEEDED, PublishJob.FAILED, time.time() - older_than),
+            )
+        return cursor.rowcount
+
+
+class _Transaction:
+    """Runs a write in one IMMEDIATE transaction, so a claim's select and update can't interleave."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
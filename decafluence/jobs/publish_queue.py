@@ -0,0 +1,204 @@
+import inspect
+import logging
+import os
+import threading
+import uuid
+
+import requests
+
+from decafluence.jobs.job_store import JobStore
+from decafluence.publisher_services.base_publisher import run_sync
+from decafluence.transport.quota_tracker import QuotaExceededError
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE_SECONDS = 120  # Renewed while a publish runs; a crashed worker's jobs are retried after this
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_RETRY_DELAY = 10
+MAX_RETRY_DELAY = 600
+QUOTA_RETRY_DELAY = 3600  # A used-up platform quota takes hours, not seconds, to come back
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def _error_chain(error):
+    """Yield error and the errors it was raised from or while handling, outermost first."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_quota_exceeded(error):
+    """True if the failure comes from a used-up platform quota, which clears on its own later."""
+    return any(isinstance(cause, QuotaExceededError) for cause in _error_chain(error))
+
+
+def is_retryable(error):
+    """
+    Connection problems, timeouts, throttling, 5xx and used-up quotas are worth another attempt;
+    anything else is final. Publisher errors are judged by the request error they wrap.
+    """
+    for cause in _error_chain(error):
+        if isinstance(cause, (requests.ConnectionError, requests.Timeout, QuotaExceededError)):
+            return True
+        if isinstance(cause, requests.HTTPError):
+            return getattr(cause.response, 'status_code', None) in RETRYABLE_STATUSES
+    return False
+
+
+class PublishQueue:
+    """
+    Durable publish queue drained by a pool of worker threads.
+
+    `submit()` stores a publish request (a publisher's post_* method and its keyword arguments)
+    in `store` (a JobStore, or the path of its database) and returns the job id immediately;
+    `status()` reports its progress.
+    `publishers` maps a platform name to its publisher service; sync facades are unwrapped to
+    their async service, and every worker drives its publish on the shared publisher loop, so
+    the workers only bound how many publishes are in flight at once.
+
+    Delivery is at least once: a job whose worker crashes is picked up again when its lease
+    expires, so a publish may be repeated after a crash. Every worker thread holds its leases
+    under its own id (`worker_id` plus the thread's index). Transient failures are retried with
+    exponential backoff up to `max_attempts`; a job stopped by a used-up platform quota waits
+    at least `quota_retry_delay` before its next attempt.
+    """
+
+    def __init__(self, publishers, store, workers=DEFAULT_WORKERS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 retry_delay=DEFAULT_RETRY_DELAY, quota_retry_delay=QUOTA_RETRY_DELAY):
+        self.publishers = {
+            platform: getattr(publisher, "async_service", publisher)
+            for platform, publisher in publishers.items()
+        }
+        self.store = store if isinstance(store, JobStore) else JobStore(store)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.quota_retry_delay = quota_retry_delay
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._in_flight = {}  # job id -> id of the worker thread running it
+        self._in_flight_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._renewer = None
+        self._workers_done = threading.Event()
+
+    def submit(self, platform, method, max_attempts=None, **arguments):
+        """
+        Queue publishers[platform].<method>(**arguments) and return the job id.
+        Arguments must be JSON-serialisable (ids, text, file paths).
+        """
+        publisher = self.publishers.get(platform)
+        if publisher is None:
+            raise ValueError(f"No publisher is registered for {platform}.")
+        if not method.startswith("post_") or not callable(getattr(publisher, method, None)):
+            raise ValueError(f"{platform} publisher has no {method} method.")
+        inspect.signature(getattr(publisher, method)).bind(**arguments)  # Reject bad arguments now, not in a worker
+
+        job_id = self.store.enqueue(platform, method, arguments, max_attempts or self.max_attempts)
+        logger.info(f"Queued {platform}.{method} as job {job_id}")
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id):
+        """Return the PublishJob for job_id (status, attempts, result, last error), or None."""
+        return self.store.get(job_id)
+
+    def counts(self):
+        """Return the number of jobs in each status."""
+        return self.store.counts()
+
+    def start(self):
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stopped.clear()
+        self._workers_done.clear()
+        self._threads = [
+            threading.Thread(target=self._work, args=(f"{self.worker_id}-{index}",), name=f"publish-worker-{index}",
+                             daemon=True)
+            for index in range(self.workers)
+        ]
+        self._renewer = threading.Thread(
+            target=self._renew_leases, args=(list(self._threads),), name="publish-lease-renewer", daemon=True
+        )
+        for thread in self._threads + [self._renewer]:
+            thread.start()
+        logger.info(f"PublishQueue started with {self.workers} workers ({self.worker_id})")
+
+    def stop(self, wait=True):
+        """Stop claiming new jobs; with wait, let the jobs in progress finish first."""
+        self._stopped.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            self._workers_done.set()
+            if self._renewer:
+                self._renewer.join()
+        logger.info("PublishQueue stopped")
+
+    def _work(self, worker_id):
+        while not self._stopped.is_set():
+            try:
+                job = self.store.claim(worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Claiming a publish job failed: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(timeout=self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                self.run_job(job, worker_id)
+            except Exception as e:
+                # The outcome wasn't stored; the job runs again once its lease expires
+                logger.error(f"Recording the outcome of job {job.id} failed: {e}")
+
+    def run_job(self, job, worker_id):
+        """Run one job claimed by worker_id and record its outcome."""
+        with self._in_flight_lock:
+            self._in_flight[job.id] = worker_id
+        try:
+            logger.info(f"Running job {job.id}: {job.platform}.{job.method} (attempt {job.attempts})")
+            publisher = self.publishers[job.platform]
+            result = run_sync(getattr(publisher, job.method)(**job.arguments))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if is_retryable(e) and job.attempts < job.max_attempts:
+                delay = min(self.retry_delay * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+                if is_quota_exceeded(e):
+                    delay = max(delay, self.quota_retry_delay)
+                logger.warning(f"Job {job.id} failed ({error}); retrying in {delay}s")
+                self.store.fail(job.id, worker_id, error, retry_delay=delay)
+            else:
+                logger.error(f"Job {job.id} failed: {error}")
+                self.store.fail(job.id, worker_id, error)
+        else:
+            self.store.complete(job.id, worker_id, result)
+            logger.info(f"Job {job.id} succeeded")
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(job.id, None)
+
+    def _renew_leases(self, workers):
+        # Runs until the workers have exited, so jobs still finishing after stop() keep their leases
+        while not self._workers_done.wait(timeout=self.lease_seconds / 3):
+            if not any(worker.is_alive() for worker in workers):
+                return
+            with self._in_flight_lock:
+                by_worker = {}
+                for job_id, worker_id in self._in_flight.items():
+                    by_worker.setdefault(worker_id, []).append(job_id)
+            for worker_id, job_ids in by_worker.items():
+                try:
+                    self.store.extend_leases(worker_id, job_ids, self.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Renewing publish job leases for {worker_id} failed: {e}")
@@ -1,4 +1,9 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from firebase_config import get_firestore_client
+
+DEFAULT_REFRESH_WINDOW_SECONDS = 300  # Refresh tokens this long before they expire
 
 class BaseOAuthHelper(ABC):
     def __init__(self, client_id, client_secret, auth_url, token_url, scope):
@@ -27,3 +32,77 @@ class BaseOAuthHelper(ABC):
     def save_token(self, user_id, token_data):
         """Save token data to persistent storage."""
         pass
+
+    @property
+    def firestore_client(self):
+        """Firestore client, resolved on first use so constructing a helper does no network I/O."""
+        client = getattr(self, '_firestore_client', None)
+        if client is None:
+            client = self._firestore_client = get_firestore_client()
+        return client
+
+    @firestore_client.setter
+    def firestore_client(self, client):
+        self._firestore_client = client
+
+    @staticmethod
+    def stamp_expiry(token_data):
+        """
+        Record an absolute `expires_at` (epoch seconds) next to the relative `expires_in`
+        returned by the token endpoint, so later reads can tell whether the token is still valid.
+        """
+        if token_data.get('expires_in') is not None and token_data.get('expires_at') is None:
+            token_data['expires_at'] = time.time() + int(token_data['expires_in'])
+        return token_data
+
+    def token_needs_refresh(self, token_data):
+        """
+        Return True if the token expires within the refresh window. Tokens saved without an
+        expiry are treated as due, preserving the previous always-refresh behaviour.
+        """
+        expires_at = token_data.get('expires_at')
+        if expires_at is None:
+            return True
+        refresh_window = getattr(self, 'refresh_window', DEFAULT_REFRESH_WINDOW_SECONDS)
+        return expires_at - refresh_window <= time.time()
+
+    def is_connected(self, user_document):
+        """
+        Return True if a `user_tokens` document holds an access token for this helper's platform.
+        Documents stamped with another platform's name belong to that platform. Helpers that nest
+        their token in the document override this.
+        """
+        platform = getattr(self, 'platform', None)
+        if platform and user_document.get('platform', platform) != platform:
+            return False
+        return bool(user_document.get('access_token'))
+
+    def get_user_document(self, user_id):
+        """Return the user's `user_tokens` document, served from the token cache while fresh."""
+        cached = self.token_cache.get(user_id)
+        if cached is not None:
+            return cached
+        token_doc = self.firestore_client.collection('user_tokens').document(user_id).get()
+        if not token_doc.exists:
+            return None
+        user_data = token_doc.to_dict()
+        self.token_cache.set(user_id, user_data)
+        return user_data
+
+    async def get_user_document_async(self, user_id):
+        """Async variant of get_user_document; only leaves the event loop on a cache miss."""
+        cached = self.token_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_user_document, user_id)
+
+    async def refresh_token_async(self, user_id):
+        """Async variant of refresh_token; runs the blocking lookup off the event loop."""
+        return await asyncio.to_thread(self.refresh_token, user_id)
+
+    async def get_token_async(self, user_id):
+        """Async variant of get_token for helpers that expose it; cache hits stay on the event loop."""
+        cached = self.token_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_token, user_id)
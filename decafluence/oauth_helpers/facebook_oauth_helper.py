@@ -1,14 +1,34 @@
+import asyncio
 import logging
-import requests
-from firebase_config import firestore_client
+import threading
 from decafluence.oauth_helpers.base_oauth import BaseOAuthHelper
+from decafluence.oauth_helpers.token_cache import TokenCache, get_default_token_cache
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.transport.http_transport import get_default_transport
 
 # Set up the logger
 logger = logging.getLogger("app_logger")
 
+PAGE_CACHE_TTL_SECONDS = 3600  # Page tokens from a long-lived user token do not expire
+
+_default_page_cache = None
+_default_page_cache_lock = threading.Lock()
+
+
+def get_default_page_cache():
+    """
+    Return the process-wide cache of Facebook Pages, keyed by user ID and indexed by page ID.
+    """
+    global _default_page_cache
+    if _default_page_cache is None:
+        with _default_page_cache_lock:
+            if _default_page_cache is None:
+                _default_page_cache = TokenCache(ttl=PAGE_CACHE_TTL_SECONDS)
+    return _default_page_cache
+
 
 class FacebookOAuthHelper(BaseOAuthHelper):
-    def __init__(self):
+    def __init__(self, transport=None, async_transport=None, token_cache=None, page_cache=None):
         self.client_id = 'YOUR_FACEBOOK_CLIENT_ID'
         self.client_secret = 'YOUR_FACEBOOK_CLIENT_SECRET'
         self.redirect_uri = 'YOUR_REDIRECT_URI'
@@ -16,7 +36,11 @@ class FacebookOAuthHelper(BaseOAuthHelper):
         self.auth_url = 'https://www.facebook.com/v11.0/dialog/oauth'
         self.token_url = 'https://graph.facebook.com/v11.0/oauth/access_token'
         self.pages_url = 'https://graph.facebook.com/v11.0/me/accounts'
-        self.firestore_client = firestore_client
+        self.graph_url = 'https://graph.facebook.com/v11.0'
+        self.token_cache = token_cache or get_default_token_cache()
+        self.page_cache = page_cache or get_default_page_cache()
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport or get_default_async_transport()
         logger.info("FacebookOAuthHelper initialized")
 
     def get_authorization_url(self, redirect_uri=None):
@@ -39,7 +63,7 @@ class FacebookOAuthHelper(BaseOAuthHelper):
             'client_secret': self.client_secret,
             'code': authorization_code,
         }
-        response = requests.get(self.token_url, params=params)
+        response = self.transport.get(self.token_url, params=params)
         response.raise_for_status()
         token_data = response.json()
         logger.info("Token exchange successful")
@@ -48,7 +72,15 @@ class FacebookOAuthHelper(BaseOAuthHelper):
     def fetch_user_pages(self, access_token):
         """Fetch the list of Pages the user manages."""
         params = {"access_token": access_token}
-        response = requests.get(self.pages_url, params=params)
+        response = self.transport.get(self.pages_url, params=params)
+        response.raise_for_status()
+        pages_data = response.json()
+        return pages_data.get('data', [])
+
+    async def fetch_user_pages_async(self, access_token):
+        """Async variant of fetch_user_pages used on the publishing path."""
+        params = {"access_token": access_token}
+        response = await self.async_transport.get(self.pages_url, params=params)
         response.raise_for_status()
         pages_data = response.json()
         return pages_data.get('data', [])
@@ -57,14 +89,98 @@ class FacebookOAuthHelper(BaseOAuthHelper):
         """Save user tokens and Page details to Firestore."""
         user_ref = self.firestore_client.collection('user_tokens').document(user_id)
         user_ref.set({"token_data": token_data, "pages": pages})
+        self.token_cache.set(user_id, {"token_data": token_data, "pages": pages})
+        self._cache_pages(user_id, pages)
         logger.info(f"Tokens and pages saved for user {user_id}")
 
+    def is_connected(self, user_document):
+        # Instagram documents hold token_data too, next to the account's user_info
+        return 'user_info' not in user_document and bool(user_document.get('token_data', {}).get('access_token'))
+
+    def _cache_pages(self, user_id, pages):
+        pages_by_id = {page['id']: page for page in pages}
+        self.page_cache.set(user_id, pages_by_id)
+        return pages_by_id
+
+    def invalidate_pages(self, user_id, page_id=None):
+        """
+        Drop cached Pages for a user, or only the given page (e.g. after its token was revoked).
+        """
+        if page_id is None:
+            self.page_cache.invalidate(user_id)
+            return
+        pages_by_id = self.page_cache.get(user_id)
+        if pages_by_id is not None and page_id in pages_by_id:
+            del pages_by_id[page_id]
+            self.page_cache.set(user_id, pages_by_id)
+
+    def get_pages(self, user_id):
+        """
+        Return the user's Pages indexed by page ID.
+
+        Served from the page cache, then from the Pages stored by save_token_and_pages,
+        and only fetched from the Graph API when neither has them.
+        """
+        pages_by_id = self.page_cache.get(user_id)
+        if pages_by_id is not None:
+            return pages_by_id
+        user_data = self.get_user_document(user_id) or {}
+        pages = user_data.get("pages")
+        if pages is None:
+            pages = self.fetch_user_pages(self.refresh_token(user_id))
+            self._store_fetched_pages(user_id, pages)
+        return self._cache_pages(user_id, pages)
+
+    async def get_pages_async(self, user_id):
+        """Async variant of get_pages used on the publishing path."""
+        pages_by_id = self.page_cache.get(user_id)
+        if pages_by_id is not None:
+            return pages_by_id
+        user_data = await self.get_user_document_async(user_id) or {}
+        pages = user_data.get("pages")
+        if pages is None:
+            pages = await self.fetch_user_pages_async(await self.refresh_token_async(user_id))
+            await asyncio.to_thread(self._store_fetched_pages, user_id, pages)
+        return self._cache_pages(user_id, pages)
+
+    async def get_page_async(self, user_id, page_id):
+        """
+        Return a single Page, including its page access token, without listing the user's Pages
+        when it is already cached. Unknown pages get their token fetched once and cached.
+        """
+        pages_by_id = await self.get_pages_async(user_id)
+        page = pages_by_id.get(page_id)
+        if page and page.get("access_token"):
+            return page
+
+        params = {"fields": "id,name,access_token", "access_token": await self.refresh_token_async(user_id)}
+        response = await self.async_transport.get(f"{self.graph_url}/{page_id}", params=params)
+        response.raise_for_status()
+        page = {**(page or {}), **response.json()}
+        if not page.get("access_token"):
+            raise ValueError(f"Unable to fetch page access token for page {page_id}.")
+
+        pages_by_id[page_id] = page
+        self.page_cache.set(user_id, pages_by_id)
+        logger.info(f"Page access token fetched and cached for page {page_id}")
+        return page
+
+    def _store_fetched_pages(self, user_id, pages):
+        user_ref = self.firestore_client.collection('user_tokens').document(user_id)
+        user_ref.set({"pages": pages}, merge=True)
+        self.token_cache.invalidate(user_id)
+
     def refresh_token(self, user_id):
         """
         Refresh the user's token using saved refresh token data.
         """
-        user_ref = self.firestore_client.collection('user_tokens').document(user_id)
-        user_data = user_ref.get().to_dict()
+        return self._extract_access_token(user_id, self.get_user_document(user_id))
+
+    async def refresh_token_async(self, user_id):
+        """Async variant of refresh_token; cache hits stay on the event loop."""
+        return self._extract_access_token(user_id, await self.get_user_document_async(user_id))
+
+    def _extract_access_token(self, user_id, user_data):
         if not user_data:
             raise ValueError(f"No token data found for user {user_id}")
 
@@ -82,6 +198,8 @@ class FacebookOAuthHelper(BaseOAuthHelper):
         """
         user_ref = self.firestore_client.collection('user_tokens').document(user_id)
         user_ref.set({"token_data": token_data}, merge=True)
+        self.token_cache.invalidate(user_id)
+        self.invalidate_pages(user_id)
         logger.info(f"Token saved for user {user_id}")
 
     def complete_authentication_flow(self, user_id):
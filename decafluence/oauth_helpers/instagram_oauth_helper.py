@@ -1,13 +1,13 @@
 import logging
-import requests
-from firebase_config import firestore_client
 from decafluence.oauth_helpers.base_oauth import BaseOAuthHelper
+from decafluence.oauth_helpers.token_cache import get_default_token_cache
+from decafluence.transport.http_transport import get_default_transport
 
 # Set up the logger
 logger = logging.getLogger("app_logger")
 
 class InstagramOAuthHelper(BaseOAuthHelper):
-    def __init__(self):
+    def __init__(self, transport=None, token_cache=None):
         self.client_id = 'YOUR_INSTAGRAM_CLIENT_ID'
         self.client_secret = 'YOUR_INSTAGRAM_CLIENT_SECRET'
         self.redirect_uri = 'YOUR_REDIRECT_URI'
@@ -15,7 +15,8 @@ class InstagramOAuthHelper(BaseOAuthHelper):
         self.auth_url = 'https://api.instagram.com/oauth/authorize'
         self.token_url = 'https://api.instagram.com/oauth/access_token'
         self.graph_url = 'https://graph.instagram.com'
-        self.firestore_client = firestore_client
+        self.token_cache = token_cache or get_default_token_cache()
+        self.transport = transport or get_default_transport()
         logger.info("InstagramOAuthHelper initialized")
 
     def get_authorization_url(self, redirect_uri=None):
@@ -39,7 +40,7 @@ class InstagramOAuthHelper(BaseOAuthHelper):
             'redirect_uri': redirect_uri,
             'code': authorization_code,
         }
-        response = requests.post(self.token_url, data=data)
+        response = self.transport.post(self.token_url, data=data)
         response.raise_for_status()
         token_data = response.json()
         logger.info("Token exchange successful")
@@ -52,7 +53,7 @@ class InstagramOAuthHelper(BaseOAuthHelper):
             "fields": "id,username",
             "access_token": access_token,
         }
-        response = requests.get(url, params=params)
+        response = self.transport.get(url, params=params)
         response.raise_for_status()
         user_data = response.json()
         return user_data
@@ -64,8 +65,13 @@ class InstagramOAuthHelper(BaseOAuthHelper):
             "token_data": token_data,
             "user_info": user_data
         }, merge=True)
+        self.token_cache.invalidate(user_id)
         logger.info(f"Token and user info saved for user {user_id}")
 
+    def is_connected(self, user_document):
+        # Facebook documents hold token_data too; only Instagram ones carry the account's user_info
+        return 'user_info' in user_document and bool(user_document.get('token_data', {}).get('access_token'))
+
     def complete_authentication_flow(self, user_id):
         """Complete the authentication flow and save tokens and user data."""
         try:
@@ -100,7 +106,7 @@ class InstagramOAuthHelper(BaseOAuthHelper):
             'client_secret': self.client_secret,
             'refresh_token': refresh_token
         }
-        response = requests.post(self.token_url, data=data)
+        response = self.transport.post(self.token_url, data=data)
         response.raise_for_status()
         token_data = response.json()
         logger.info("Token refreshed successfully")
@@ -112,4 +118,5 @@ class InstagramOAuthHelper(BaseOAuthHelper):
         user_ref.update({
             "token_data": token_data
         })
+        self.token_cache.invalidate(user_id)
         logger.info(f"Token updated for user {user_id}")
@@ -1,13 +1,21 @@
+import asyncio
 import logging
 import requests
-from firebase_config import firestore_client
-from decafluence.oauth_helpers.base_oauth import BaseOAuthHelper
+from decafluence.oauth_helpers.base_oauth import DEFAULT_REFRESH_WINDOW_SECONDS, BaseOAuthHelper
+from decafluence.oauth_helpers.token_cache import TokenCache, get_default_token_cache
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.transport.http_transport import get_default_transport
 
 # Set up the logger
 logger = logging.getLogger("app_logger")
 
+URN_CACHE_TTL_SECONDS = 24 * 3600  # A member URN never changes for an account
+
 class LinkedInOAuthHelper(BaseOAuthHelper):
-    def __init__(self):
+    platform = 'linkedin'  # Stored on each user_tokens document so per-platform scans can filter
+
+    def __init__(self, transport=None, async_transport=None, token_cache=None, urn_cache=None,
+                 refresh_window=DEFAULT_REFRESH_WINDOW_SECONDS):
         self.client_id = 'YOUR_LINKEDIN_CLIENT_ID'
         self.client_secret = 'YOUR_LINKEDIN_CLIENT_SECRET'
         self.redirect_uri = 'YOUR_REDIRECT_URI'
@@ -15,7 +23,11 @@ class LinkedInOAuthHelper(BaseOAuthHelper):
         self.token_url = 'https://www.linkedin.com/oauth/v2/accessToken'
         self.auth_url = 'https://www.linkedin.com/oauth/v2/authorization'
         self.api_url = 'https://api.linkedin.com/v2/userinfo'
-        self.firestore_client = firestore_client
+        self.refresh_window = refresh_window
+        self.token_cache = token_cache or get_default_token_cache()
+        self.urn_cache = urn_cache or TokenCache(ttl=URN_CACHE_TTL_SECONDS)  # access token -> member URN
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport or get_default_async_transport()
         logger.info("LinkedInOAuthHelper initialized")
 
     def get_authorization_url(self, redirect_uri=None):
@@ -36,38 +48,49 @@ class LinkedInOAuthHelper(BaseOAuthHelper):
             'client_secret': self.client_secret,
         }
         logger.info("Exchanging authorization code for token")
-        response = requests.post(self.token_url, data=data)
+        response = self.transport.post(self.token_url, data=data)
         response.raise_for_status()
         token_data = response.json()
         if not token_data.get('access_token'):
             raise ValueError("Access token not found in the response.")
+        if not token_data.get('refresh_token'):
+            logger.warning("LinkedIn returned no refresh token; the user will have to sign in again when it expires")
+        # Resolve the member URN once and store it next to the token
+        token_data['user_urn'] = self.get_user_urn(token_data['access_token'])
         logger.info("Token exchange successful")
         return token_data
 
     def save_token(self, user_id, token_data):
         """Save user tokens to Firestore."""
+        self.stamp_expiry(token_data)
+        token_data['platform'] = self.platform
         user_tokens_ref = self.firestore_client.collection('user_tokens')
         user_tokens_ref.document(user_id).set(token_data)
+        self.token_cache.set(user_id, token_data)
         logger.info(f"Token saved for user {user_id}")
 
     def get_token(self, user_id):
-        """Retrieve user tokens from Firestore."""
-        user_tokens_ref = self.firestore_client.collection('user_tokens')
-        token_doc = user_tokens_ref.document(user_id).get()
-        if token_doc.exists:
+        """Retrieve user tokens from the token cache, falling back to Firestore."""
+        token_data = self.get_user_document(user_id)
+        if token_data is not None:
             logger.info(f"Retrieved token for user {user_id}")
-            return token_doc.to_dict()
+            return token_data
         logger.warning(f"No token found for user {user_id}")
         return None
     
-    def refresh_token(self, user_id):
-        """Refresh the user's access token using the refresh token."""
+    def refresh_token(self, user_id, force=False):
+        """Refresh the user's access token using the refresh token; `force` skips the still-valid shortcut."""
         try:
             token_data = self.get_token(user_id)
             if not token_data:
                 raise ValueError("No token found for user.")
 
-            refresh_token = token_data.get('access_token')
+            # Reuse the stored access token until it enters the refresh window
+            if not force and token_data.get('access_token') and not self.token_needs_refresh(token_data):
+                logger.info(f"Token for user {user_id} is still valid; skipping refresh")
+                return token_data['access_token']
+
+            refresh_token = token_data.get('refresh_token')
             if not refresh_token:
                 raise ValueError("No refresh token available.")
 
@@ -78,9 +101,9 @@ class LinkedInOAuthHelper(BaseOAuthHelper):
                 'client_secret': self.client_secret,
             }
             logger.info(f"Refreshing token for user {user_id}")
-            response = requests.post(self.token_url, data=data)
+            response = self.transport.post(self.token_url, data=data)
             response.raise_for_status()
-            new_token_data = response.json()
+            new_token_data = self._merge_refreshed(token_data, response.json())
             self.save_token(user_id, new_token_data)
             logger.info(f"Token refreshed for user {user_id}")
             return new_token_data.get('access_token')
@@ -88,15 +111,80 @@ class LinkedInOAuthHelper(BaseOAuthHelper):
             logger.error(f"Error refreshing token for user {user_id}: {e}")
             raise
 
-    def get_user_urn(self, access_token):
-        """Fetch the user URN using the LinkedIn 'userinfo' endpoint."""
+    async def refresh_token_async(self, user_id, force=False):
+        """Async variant of refresh_token used on the publishing path."""
+        token_data = await self.get_token_async(user_id)
+        if not token_data:
+            raise ValueError("No token found for user.")
+
+        # Reuse the stored access token until it enters the refresh window
+        if not force and token_data.get('access_token') and not self.token_needs_refresh(token_data):
+            return token_data['access_token']
+
+        refresh_token = token_data.get('refresh_token')
+        if not refresh_token:
+            raise ValueError("No refresh token available.")
+
+        data = {
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+        logger.info(f"Refreshing token for user {user_id}")
+        response = await self.async_transport.post(self.token_url, data=data)
+        response.raise_for_status()
+        new_token_data = self._merge_refreshed(token_data, response.json())
+        await asyncio.to_thread(self.save_token, user_id, new_token_data)
+        logger.info(f"Token refreshed for user {user_id}")
+        return new_token_data.get('access_token')
+
+    @staticmethod
+    def _merge_refreshed(token_data, new_token_data):
+        # LinkedIn only returns a new refresh token when it rotates it; keep the stored one and the URN
+        for key in ('refresh_token', 'refresh_token_expires_in', 'user_urn'):
+            if token_data.get(key):
+                new_token_data.setdefault(key, token_data[key])
+        return new_token_data
+
+    def _cached_user_urn(self, access_token, token_data=None):
+        user_urn = (token_data or {}).get('user_urn') or self.urn_cache.get(access_token)
+        if user_urn:
+            self.urn_cache.set(access_token, user_urn)
+        return user_urn
+
+    def get_user_urn(self, access_token, token_data=None):
+        """
+        Return the user URN, preferring the one stored with the token or memoized for the
+        access token, and only calling the LinkedIn 'userinfo' endpoint on a miss.
+        """
+        user_urn = self._cached_user_urn(access_token, token_data)
+        if user_urn:
+            return user_urn
+        headers = {'Authorization': f'Bearer {access_token}'}
+        response = self.transport.get(self.api_url, headers=headers)
+        response.raise_for_status()
+        user_info = response.json()
+        user_urn = user_info.get('sub')
+        if not user_urn:
+            raise ValueError("User URN not found in the LinkedIn API response.")
+        self.urn_cache.set(access_token, user_urn)
+        logger.info(f"User URN: {user_urn}")
+        return user_urn
+
+    async def get_user_urn_async(self, access_token, token_data=None):
+        """Async variant of get_user_urn used on the publishing path."""
+        user_urn = self._cached_user_urn(access_token, token_data)
+        if user_urn:
+            return user_urn
         headers = {'Authorization': f'Bearer {access_token}'}
-        response = requests.get(self.api_url, headers=headers)
+        response = await self.async_transport.get(self.api_url, headers=headers)
         response.raise_for_status()
         user_info = response.json()
         user_urn = user_info.get('sub')
         if not user_urn:
             raise ValueError("User URN not found in the LinkedIn API response.")
+        self.urn_cache.set(access_token, user_urn)
         logger.info(f"User URN: {user_urn}")
         return user_urn
 
@@ -0,0 +1,72 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 300
+
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU cache with per-entry TTL for `user_tokens` documents.
+
+    Sits in front of Firestore so repeated token lookups during a publish are served
+    from memory. Entries are evicted least-recently-used first once `max_entries`
+    is reached, and expire `ttl` seconds after they were stored.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Store a copy of value under key, evicting the least recently used entry if full."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_default_token_cache = None
+_default_token_cache_lock = threading.Lock()
+
+
+def get_default_token_cache():
+    """
+    Return the process-wide token cache shared by every OAuth helper.
+
+    All helpers read and write the same `user_tokens/{user_id}` document, so they must
+    share one cache for invalidation on save to be visible across platforms.
+    """
+    global _default_token_cache
+    if _default_token_cache is None:
+        with _default_token_cache_lock:
+            if _default_token_cache is None:
+                _default_token_cache = TokenCache()
+    return _default_token_cache
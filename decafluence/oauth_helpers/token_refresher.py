@@ -0,0 +1,183 @@
+import heapq
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_LEAD_TIME_SECONDS = 900  # Refresh this long before expiry, ahead of the helper's lazy window
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_RESCAN_INTERVAL_SECONDS = 900
+DEFAULT_RETRY_DELAY_SECONDS = 60
+DEFAULT_MAX_RETRY_DELAY_SECONDS = 3600
+DEFAULT_MAX_ATTEMPTS = 6  # Consecutive failures after which a token is left alone until it is saved again
+
+
+class TokenRefresher:
+    """
+    Background service that refreshes tokens shortly before they expire.
+
+    Keeps a min-heap of refresh due times built from the `expires_at` of the helper's
+    platform's documents in `user_tokens` that hold a refresh token, and refreshes due tokens
+    through the OAuth helper on a bounded worker pool. The lead time should exceed the
+    helper's refresh_window, so a publish always finds a valid token and never refreshes
+    inline. Failed refreshes are retried with exponential backoff; after `max_attempts`
+    consecutive failures the token is dropped until a new one is saved for the user.
+
+    The helper must declare its `platform` and support `refresh_token(user_id, force=True)`
+    and `get_token(user_id)`; LinkedIn and YouTube do.
+    """
+
+    def __init__(self, oauth_helper, lead_time=DEFAULT_LEAD_TIME_SECONDS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 rescan_interval=DEFAULT_RESCAN_INTERVAL_SECONDS, retry_delay=DEFAULT_RETRY_DELAY_SECONDS,
+                 max_retry_delay=DEFAULT_MAX_RETRY_DELAY_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        if not _supports_proactive_refresh(oauth_helper):
+            raise TypeError(
+                f"{type(oauth_helper).__name__} cannot be refreshed proactively; it needs a platform, "
+                "get_token(user_id) and refresh_token(user_id, force=...)."
+            )
+        self.oauth_helper = oauth_helper
+        self.platform = oauth_helper.platform
+        self.lead_time = lead_time
+        self.rescan_interval = rescan_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="token-refresher")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._heap = []  # (due_at, user_id)
+        self._scheduled = {}  # user_id -> due_at of its live heap entry
+        self._in_flight = set()
+        self._expires_at = {}  # user_id -> expiry its schedule was built from
+        self._failures = {}  # user_id -> consecutive failed refreshes
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._next_rescan = 0
+
+    def start(self):
+        """Load every token's expiry and start the scheduler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="token-refresher-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("TokenRefresher started")
+
+    def stop(self, wait=True):
+        """Stop scheduling new refreshes; optionally wait for in-flight ones to finish."""
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+        logger.info("TokenRefresher stopped")
+
+    def schedule(self, user_id, expires_at):
+        """Schedule (or reschedule) a user's token refresh from its absolute expiry."""
+        with self._condition:
+            self._expires_at[user_id] = expires_at
+            self._failures.pop(user_id, None)  # A new token starts with a clean slate
+        self._push(user_id, expires_at - self.lead_time)
+
+    def _push(self, user_id, due_at):
+        with self._condition:
+            if user_id in self._in_flight:
+                return
+            self._scheduled[user_id] = due_at
+            heapq.heappush(self._heap, (due_at, user_id))
+            self._condition.notify()
+
+    def rescan(self):
+        """Rebuild the schedule from `user_tokens`, picking up tokens saved since the last scan."""
+        query = self.oauth_helper.firestore_client.collection('user_tokens') \
+            .where('platform', '==', self.platform).select(['expires_at', 'refresh_token'])
+        count = 0
+        for doc in query.stream():
+            token_data = doc.to_dict() or {}
+            expires_at = token_data.get('expires_at')
+            if expires_at is None or not token_data.get('refresh_token'):
+                continue  # Nothing to refresh it with; the user has to sign in again
+            # Unchanged tokens keep their place, including a retry backoff or a refresh given up on
+            if self._expires_at.get(doc.id) != expires_at:
+                self.schedule(doc.id, expires_at)
+            count += 1
+        logger.info(f"TokenRefresher scheduled {count} {self.platform} tokens")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if time.time() >= self._next_rescan:
+                try:
+                    self.rescan()
+                except Exception as e:
+                    logger.error(f"TokenRefresher rescan failed: {e}")
+                self._next_rescan = time.time() + self.rescan_interval
+
+            user_id = self._next_due()
+            if user_id is None:
+                continue
+            # Bounded concurrency: wait for a free worker before dispatching
+            self._slots.acquire()
+            self._executor.submit(self._refresh, user_id)
+
+    def _next_due(self):
+        """Block until the earliest entry is due (or a rescan/stop is needed) and pop it."""
+        with self._condition:
+            while not self._stopped.is_set():
+                now = time.time()
+                wait_until = self._next_rescan
+                if self._heap:
+                    due_at, user_id = self._heap[0]
+                    if self._scheduled.get(user_id) != due_at:
+                        heapq.heappop(self._heap)  # Superseded entry
+                        continue
+                    if due_at <= now:
+                        heapq.heappop(self._heap)
+                        del self._scheduled[user_id]
+                        self._in_flight.add(user_id)
+                        return user_id
+                    wait_until = min(wait_until, due_at)
+                if wait_until <= now:
+                    return None
+                self._condition.wait(timeout=wait_until - now)
+        return None
+
+    def _refresh(self, user_id):
+        try:
+            self.oauth_helper.refresh_token(user_id, force=True)
+            token_data = self.oauth_helper.get_token(user_id) or {}
+            with self._condition:
+                self._in_flight.discard(user_id)
+                self._failures.pop(user_id, None)
+            if token_data.get('expires_at') is not None:
+                self.schedule(user_id, token_data['expires_at'])
+            logger.info(f"Proactively refreshed token for user {user_id}")
+        except Exception as e:
+            with self._condition:
+                self._in_flight.discard(user_id)
+                failures = self._failures[user_id] = self._failures.get(user_id, 0) + 1
+                if failures >= self.max_attempts:
+                    del self._failures[user_id]
+            if failures >= self.max_attempts:
+                logger.error(f"Proactive token refresh failed for user {user_id} {failures} times; giving up: {e}")
+                return
+            delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+            logger.error(f"Proactive token refresh failed for user {user_id}: {e}; retrying in {delay}s")
+            self._push(user_id, time.time() + delay)
+        finally:
+            self._slots.release()
+
+
+def _supports_proactive_refresh(oauth_helper):
+    refresh = getattr(oauth_helper, 'refresh_token', None)
+    if not getattr(oauth_helper, 'platform', None) or not callable(getattr(oauth_helper, 'get_token', None)) \
+            or not callable(refresh):
+        return False
+    try:
+        return 'force' in inspect.signature(refresh).parameters
+    except (TypeError, ValueError):
+        return False
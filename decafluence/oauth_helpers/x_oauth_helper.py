@@ -1,19 +1,21 @@
 import requests
-from firebase_admin import firestore
 from requests_oauthlib import OAuth1Session
 from decafluence.oauth_helpers.base_oauth import BaseOAuthHelper
+from decafluence.oauth_helpers.token_cache import get_default_token_cache
+from decafluence.transport.http_transport import get_default_transport
 
 class XOAuthHelper(BaseOAuthHelper):
-    def __init__(self):
+    def __init__(self, transport=None, token_cache=None):
         self.client_key = 'YOUR_X_API_KEY'
         self.client_secret = 'YOUR_X_API_SECRET'
         self.access_token_url = 'https://api.twitter.com/oauth/access_token'
         self.request_token_url = 'https://api.twitter.com/oauth/request_token'
         self.auth_url = 'https://api.twitter.com/oauth/authorize'
-        self.firestore_client = firestore.client()
+        self.token_cache = token_cache or get_default_token_cache()
+        self.transport = transport or get_default_transport()
 
     def get_authorization_url(self):
-        oauth = OAuth1Session(self.client_key, client_secret=self.client_secret)
+        oauth = self.transport.mount(OAuth1Session(self.client_key, client_secret=self.client_secret))
         fetch_response = oauth.fetch_request_token(self.request_token_url)
         resource_owner_key = fetch_response.get('oauth_token')
         resource_owner_secret = fetch_response.get('oauth_token_secret')
@@ -30,21 +32,23 @@ class XOAuthHelper(BaseOAuthHelper):
         oauth_token = temp_tokens.get('resource_owner_key')
         oauth_token_secret = temp_tokens.get('resource_owner_secret')
 
-        oauth = OAuth1Session(self.client_key, client_secret=self.client_secret,
-                              resource_owner_key=oauth_token,
-                              resource_owner_secret=oauth_token_secret,
-                              verifier=oauth_verifier)
+        oauth = self.transport.mount(OAuth1Session(self.client_key, client_secret=self.client_secret,
+                                                   resource_owner_key=oauth_token,
+                                                   resource_owner_secret=oauth_token_secret,
+                                                   verifier=oauth_verifier))
         access_token_response = oauth.fetch_access_token(self.access_token_url)
         return access_token_response
 
     def save_token(self, user_id, token_data):
         user_tokens_ref = self.firestore_client.collection('user_tokens')
         user_tokens_ref.document(user_id).set(token_data)
+        self.token_cache.set(user_id, token_data)
 
     def get_token(self, user_id):
-        user_tokens_ref = self.firestore_client.collection('user_tokens')
-        token_doc = user_tokens_ref.document(user_id).get()
-        return token_doc.to_dict() if token_doc.exists else None
+        return self.get_user_document(user_id)
+
+    def is_connected(self, user_document):
+        return bool(user_document.get('oauth_token') and user_document.get('oauth_token_secret'))
 
     def refresh_token(self, user_id):
         token_data = self.get_token(user_id)
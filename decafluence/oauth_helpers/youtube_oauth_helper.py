@@ -1,11 +1,16 @@
+import asyncio
 import os
-import requests
 from dotenv import load_dotenv
-from firebase_admin import firestore
-from decafluence.oauth_helpers.base_oauth import BaseOAuthHelper
+from decafluence.oauth_helpers.base_oauth import DEFAULT_REFRESH_WINDOW_SECONDS, BaseOAuthHelper
+from decafluence.oauth_helpers.token_cache import get_default_token_cache
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.transport.http_transport import get_default_transport
 
 class YouTubeOAuthHelper(BaseOAuthHelper):
-    def __init__(self):
+    platform = 'youtube'  # Stored on each user_tokens document so per-platform scans can filter
+
+    def __init__(self, transport=None, async_transport=None, token_cache=None,
+                 refresh_window=DEFAULT_REFRESH_WINDOW_SECONDS):
         load_dotenv()  # Load environment variables from .env
         self.client_id = os.getenv('YOUTUBE_CLIENT_ID')
         self.client_secret = os.getenv('YOUTUBE_CLIENT_SECRET')
@@ -13,7 +18,10 @@ class YouTubeOAuthHelper(BaseOAuthHelper):
         self.token_url = 'https://oauth2.googleapis.com/token'
         self.auth_url = 'https://accounts.google.com/o/oauth2/auth'
         self.scope = 'https://www.googleapis.com/auth/youtube.upload'
-        self.firestore_client = firestore.client()
+        self.refresh_window = refresh_window
+        self.token_cache = token_cache or get_default_token_cache()
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport or get_default_async_transport()
 
     def get_authorization_url(self, redirect_uri):
         """Generate the authorization URL for OAuth."""
@@ -29,7 +37,7 @@ class YouTubeOAuthHelper(BaseOAuthHelper):
             'redirect_uri': redirect_uri,
             'code': authorization_code
         }
-        response = requests.post(self.token_url, data=data)
+        response = self.transport.post(self.token_url, data=data)
         if response.status_code == 200:
             return response.json()  # Returns a JSON containing access_token and refresh_token
         else:
@@ -37,21 +45,26 @@ class YouTubeOAuthHelper(BaseOAuthHelper):
 
     def save_token(self, user_id, token_data):
         """Save token data to Firebase for persistent storage."""
+        self.stamp_expiry(token_data)
+        token_data['platform'] = self.platform
         user_tokens_ref = self.firestore_client.collection('user_tokens')
         user_tokens_ref.document(user_id).set(token_data)
+        self.token_cache.set(user_id, token_data)
 
     def get_token(self, user_id):
         """Retrieve saved token from Firebase."""
-        user_tokens_ref = self.firestore_client.collection('user_tokens')
-        token_doc = user_tokens_ref.document(user_id).get()
-        return token_doc.to_dict() if token_doc.exists else None
+        return self.get_user_document(user_id)
 
-    def refresh_token(self, user_id):
-        """Refresh access token using the refresh token."""
+    def refresh_token(self, user_id, force=False):
+        """Refresh access token using the refresh token; `force` skips the still-valid shortcut."""
         token_data = self.get_token(user_id)
         if not token_data:
             raise ValueError("No token found for user.")
-        
+
+        # Reuse the stored access token until it enters the refresh window
+        if not force and token_data.get('access_token') and not self.token_needs_refresh(token_data):
+            return token_data['access_token']
+
         refresh_token = token_data.get('refresh_token')
         if not refresh_token:
             raise ValueError("No refresh token available.")
@@ -63,11 +76,45 @@ class YouTubeOAuthHelper(BaseOAuthHelper):
             'refresh_token': refresh_token
         }
         
-        response = requests.post(self.token_url, data=data)
+        response = self.transport.post(self.token_url, data=data)
         if response.status_code == 200:
             new_token_data = response.json()
+            # Google omits the refresh token on refresh; keep the one we already have
+            new_token_data.setdefault('refresh_token', refresh_token)
             # Update the stored token data with the new access token
             self.save_token(user_id, new_token_data)
             return new_token_data['access_token']
         else:
             raise Exception(f"Failed to refresh token: {response.text}")
+
+    async def refresh_token_async(self, user_id, force=False):
+        """Async variant of refresh_token used on the publishing path."""
+        token_data = await self.get_token_async(user_id)
+        if not token_data:
+            raise ValueError("No token found for user.")
+
+        # Reuse the stored access token until it enters the refresh window
+        if not force and token_data.get('access_token') and not self.token_needs_refresh(token_data):
+            return token_data['access_token']
+
+        refresh_token = token_data.get('refresh_token')
+        if not refresh_token:
+            raise ValueError("No refresh token available.")
+
+        data = {
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token
+        }
+
+        response = await self.async_transport.post(self.token_url, data=data)
+        if response.status_code == 200:
+            new_token_data = response.json()
+            # Google omits the refresh token on refresh; keep the one we already have
+            new_token_data.setdefault('refresh_token', refresh_token)
+            # Update the stored token data with the new access token
+            await asyncio.to_thread(self.save_token, user_id, new_token_data)
+            return new_token_data['access_token']
+        else:
+            raise Exception(f"Failed to refresh token: {response.text}")
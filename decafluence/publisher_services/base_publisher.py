@@ -1,5 +1,14 @@
+import asyncio
+import atexit
+import threading
 from abc import ABC, abstractmethod
 
+
+class PublishError(Exception):
+    """Raised when a platform request fails while publishing; the request error is its __cause__."""
+    pass
+
+
 class BasePublisherService(ABC):
     def __init__(self, oauth_helper):
         self.oauth_helper = oauth_helper
@@ -23,3 +32,79 @@ class BasePublisherService(ABC):
     def post_document(self, user_id, content, document_path):
         """Post an update with a document attachment."""
         pass
+
+
+class AsyncBasePublisherService(ABC):
+    # Media types this platform can publish; the others raise NotImplementedError
+    supported_media_types = frozenset({'text', 'image', 'video', 'document'})
+
+    def __init__(self, oauth_helper):
+        self.oauth_helper = oauth_helper
+
+    def supports(self, media_type):
+        """Return True if this publisher can post the given media type."""
+        return media_type in self.supported_media_types
+
+    @abstractmethod
+    async def post_text(self, user_id, content):
+        """Post a text-only update."""
+        pass
+
+    @abstractmethod
+    async def post_image(self, user_id, content, image_path):
+        """Post an update with an image."""
+        pass
+
+    @abstractmethod
+    async def post_video(self, user_id, content, video_path):
+        """Post an update with a video."""
+        pass
+
+    @abstractmethod
+    async def post_document(self, user_id, content, document_path):
+        """Post an update with a document attachment."""
+        pass
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="decafluence-publisher-loop", daemon=True)
+                thread.start()
+                atexit.register(_shutdown_background_loop, loop)
+                _background_loop = loop
+    return _background_loop
+
+
+def _shutdown_background_loop(loop, timeout=5):
+    # Finalizes the loop's async generators, which closes the transports' pooled sessions
+    try:
+        asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result(timeout=timeout)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def run_sync(coro):
+    """
+    Run a publisher coroutine to completion from blocking code.
+
+    Every sync publisher shares one background event loop, so connection pools survive
+    across calls and any number of caller threads can publish concurrently.
+    """
+    loop = _get_background_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the publisher loop; await the async service instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
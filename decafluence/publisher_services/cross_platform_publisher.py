@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from decafluence.publisher_services.base_publisher import run_sync
+from decafluence.validators.content_validators import detect_media_type
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+
+@dataclass
+class PublishResult:
+    """Outcome of publishing one piece of content to one platform."""
+
+    PUBLISHED = "published"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    platform: str
+    status: str
+    response: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self):
+        return self.status == self.PUBLISHED
+
+
+class AsyncCrossPlatformPublisher:
+    """
+    Publishes the same content to every connected platform concurrently.
+
+    `publishers` maps a platform name to its publisher service. Sync facades are accepted
+    and unwrapped to the async service they delegate to. A platform counts as connected when
+    the user's `user_tokens` document holds its token, as judged by the publisher's OAuth helper.
+    """
+
+    def __init__(self, publishers):
+        self.publishers = {
+            platform: getattr(publisher, "async_service", publisher)
+            for platform, publisher in publishers.items()
+        }
+
+    @staticmethod
+    def _resolve_media_type(media, media_type):
+        if media_type:
+            return media_type
+        if media is None:
+            return "text"
+        detected = detect_media_type(media)
+        if not detected:
+            raise ValueError(f"Unable to determine media type for {media}; pass media_type explicitly.")
+        return detected
+
+    @staticmethod
+    def _post(publisher, media_type, user_id, content, media):
+        if media_type == "text":
+            return publisher.post_text(user_id, content)
+        if media_type == "image":
+            return publisher.post_image(user_id, content, media)
+        if media_type == "video":
+            return publisher.post_video(user_id, content, media)
+        if media_type == "document":
+            return publisher.post_document(user_id, content, media)
+        raise ValueError(f"Unsupported media type: {media_type}")
+
+    async def _connected_platforms(self, user_id, platforms):
+        """
+        Return the platforms, of those given, that the user's `user_tokens` document has a token
+        for. The document is read once, and from the shared token cache while it is fresh.
+        """
+        if not platforms:
+            return set()
+        user_document = await self.publishers[platforms[0]].oauth_helper.get_user_document_async(user_id) or {}
+        return {
+            platform for platform in platforms
+            if self.publishers[platform].oauth_helper.is_connected(user_document)
+        }
+
+    async def _publish_one(self, platform, coro):
+        try:
+            response = await coro
+            logger.info(f"Cross-post to {platform} succeeded.")
+            return PublishResult(platform, PublishResult.PUBLISHED, response=response)
+        except NotImplementedError as e:
+            return PublishResult(platform, PublishResult.SKIPPED, error=e)
+        except Exception as e:
+            logger.error(f"Cross-post to {platform} failed: {e}")
+            return PublishResult(platform, PublishResult.FAILED, error=e)
+
+    async def publish_everywhere(self, user_id, content, media=None, media_type=None):
+        """
+        Run the matching post_* on every connected platform at once and return a dict of
+        platform -> PublishResult. Platforms that cannot publish the media type are
+        skipped up front, before any token lookup or upload is spent on them, and
+        platforms the user hasn't connected are skipped before any upload.
+        """
+        media_type = self._resolve_media_type(media, media_type)
+
+        results = {}
+        supported = []
+        for platform, publisher in self.publishers.items():
+            if not publisher.supports(media_type):
+                logger.info(f"Skipping {platform}: {media_type} posts are not supported.")
+                results[platform] = PublishResult(
+                    platform, PublishResult.SKIPPED,
+                    error=NotImplementedError(f"{platform} does not support {media_type} posts."),
+                )
+            else:
+                supported.append(platform)
+
+        connected = await self._connected_platforms(user_id, supported)
+        pending = {}
+        for platform in supported:
+            if platform not in connected:
+                logger.info(f"Skipping {platform}: not connected for user {user_id}.")
+                results[platform] = PublishResult(
+                    platform, PublishResult.SKIPPED,
+                    error=ValueError(f"{platform} is not connected for user {user_id}."),
+                )
+                continue
+            pending[platform] = self._publish_one(
+                platform, self._post(self.publishers[platform], media_type, user_id, content, media)
+            )
+
+        outcomes = await asyncio.gather(*pending.values())
+        results.update(zip(pending.keys(), outcomes))
+        return results
+
+
+class CrossPlatformPublisher:
+    """Blocking facade over AsyncCrossPlatformPublisher."""
+
+    def __init__(self, publishers):
+        self.async_publisher = AsyncCrossPlatformPublisher(publishers)
+
+    def publish_everywhere(self, user_id, content, media=None, media_type=None):
+        """Publish to every connected platform concurrently; see AsyncCrossPlatformPublisher."""
+        return run_sync(self.async_publisher.publish_everywhere(user_id, content, media, media_type))
@@ -1,32 +1,59 @@
+import asyncio
 import os
 import requests
 from decafluence.oauth_helpers.facebook_oauth_helper import FacebookOAuthHelper
-from decafluence.publisher_services.base_publisher import BasePublisherService
+from decafluence.publisher_services.base_publisher import AsyncBasePublisherService, BasePublisherService, run_sync
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.uploads.facebook_resumable_upload import (
+    RESUMABLE_THRESHOLD, SESSION_MAX_AGE_SECONDS, FacebookResumableUploader,
+)
+from decafluence.uploads.session_store import UploadSessionStore, upload_session_directory
+from decafluence.uploads.streaming_multipart import StreamingMultipartEncoder
 from decafluence.validators.content_validators import ContentValidationError, ContentValidator
 from logger_config import setup_logger
 
-class FacebookPublisherService(BasePublisherService):
-    def __init__(self, oauth_helper: FacebookOAuthHelper):
+class AsyncFacebookPublisherService(AsyncBasePublisherService):
+    def __init__(self, oauth_helper: FacebookOAuthHelper, transport=None, uploader=None, upload_session_dir=None):
         self.oauth_helper = oauth_helper
+        self.transport = transport or get_default_async_transport()
         self.api_url = "https://graph.facebook.com/v11.0/"
+        # Upload sessions are kept on disk so a restarted worker resumes instead of re-sending the video
+        self.uploader = uploader or FacebookResumableUploader(
+            self.transport,
+            session_store=UploadSessionStore(upload_session_directory(upload_session_dir),
+                                             max_age=SESSION_MAX_AGE_SECONDS),
+        )
         self.validator = ContentValidator(platform="facebook")
         self.logger = setup_logger()
 
-    def _get_auth_header(self, user_id):
+    async def _get_auth_header(self, user_id):
         """
         Constructs the Authorization header using the refreshed token.
         """
-        access_token = self.oauth_helper.refresh_token(user_id)
+        access_token = await self.oauth_helper.refresh_token_async(user_id)
         return {"Authorization": f"Bearer {access_token}"}
 
-    def select_page(self, user_id):
+    async def _post_file(self, url, data, file_path):
+        """
+        Posts data plus the file as multipart/form-data, streaming the file from disk so
+        memory use doesn't grow with the file size.
+        """
+        encoder = StreamingMultipartEncoder(data, {"file": file_path})
+        return await self.transport.post(url, data=encoder, headers=encoder.headers)
+
+    async def select_page(self, user_id, page_id=None):
         """
-        Prompts the user to select a page to post to if multiple pages exist.
+        Returns the page to post to, with its page access token attached.
+        When page_id is given it is used directly and no page discovery happens. Otherwise
+        prompts the user to select a page if multiple pages exist.
         If only one page is available, it posts automatically.
         """
         try:
-            # Fetch user's pages
-            pages = self.oauth_helper.fetch_user_pages(self.oauth_helper.refresh_token(user_id))
+            if page_id:
+                return await self.oauth_helper.get_page_async(user_id, page_id)
+
+            # Fetch user's pages (served from the page cache when possible)
+            pages = list((await self.oauth_helper.get_pages_async(user_id)).values())
             
             if not pages:
                 raise Exception("User does not manage any pages.")
@@ -40,14 +67,14 @@ class FacebookPublisherService(BasePublisherService):
                     self.logger.info(f"{index + 1}. {page['name']}")
                 
                 # Let the user choose a page
-                selected_page_index = int(input(f"Select a page (1-{len(pages)}): ")) - 1
+                selected_page_index = int(await asyncio.to_thread(input, f"Select a page (1-{len(pages)}): ")) - 1
                 if selected_page_index < 0 or selected_page_index >= len(pages):
                     raise ValueError("Invalid page selection.")
                 
                 selected_page = pages[selected_page_index]
 
             # Fetch the page access token for the selected page
-            page_access_token = self.get_page_access_token(selected_page['id'], user_id)
+            page_access_token = await self.get_page_access_token(selected_page['id'], user_id)
             selected_page['access_token'] = page_access_token
             
             return selected_page
@@ -55,24 +82,14 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Error selecting page: {e}")
             raise
 
-    def get_page_access_token(self, page_id, user_id):
+    async def get_page_access_token(self, page_id, user_id):
         """
-        Fetches the page access token for a specific page.
+        Returns the page access token for a specific page, fetching it only if it is not cached.
         """
         try:
-            user_access_token = self.oauth_helper.refresh_token(user_id)
-            url = f"https://graph.facebook.com/v11.0/{page_id}?fields=access_token&access_token={user_access_token}"
-            response = requests.get(url)
-            response.raise_for_status()
-            page_data = response.json()
-
-            # Extract the page access token
-            page_access_token = page_data.get("access_token")
-            if not page_access_token:
-                raise Exception(f"Unable to fetch page access token for page {page_id}.")
-            
-            self.logger.info(f"Page access token fetched for page {page_id}.")
-            return page_access_token
+            page = await self.oauth_helper.get_page_async(user_id, page_id)
+            self.logger.info(f"Page access token resolved for page {page_id}.")
+            return page["access_token"]
         except requests.HTTPError as e:
             self.logger.error(f"Failed to fetch page access token: {str(e)}")
             raise
@@ -80,7 +97,7 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Error fetching page access token: {str(e)}")
             raise
 
-    def post_text(self, user_id, content):
+    async def post_text(self, user_id, content, page_id=None):
         """
         Posts a text-only update to the selected Facebook page.
         """
@@ -89,7 +106,7 @@ class FacebookPublisherService(BasePublisherService):
             self.validator.validate_text(content)
 
             # Select the page to post to
-            selected_page = self.select_page(user_id)
+            selected_page = await self.select_page(user_id, page_id)
 
             data = {
                 "message": content,
@@ -97,7 +114,7 @@ class FacebookPublisherService(BasePublisherService):
             }
 
             self.logger.info(f"Sending text post request to page: {selected_page['name']}...")
-            response = requests.post(f"{self.api_url}{selected_page['id']}/feed", data=data)
+            response = await self.transport.post(f"{self.api_url}{selected_page['id']}/feed", data=data)
             response.raise_for_status()
 
             self.logger.info("Text post successful.")
@@ -109,7 +126,7 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Failed to post text on Facebook: {str(e)}")
             raise
 
-    def post_image(self, user_id, content, image_path):
+    async def post_image(self, user_id, content, image_path, page_id=None):
         """
         Posts an image with a caption to the selected Facebook page.
         """
@@ -119,7 +136,7 @@ class FacebookPublisherService(BasePublisherService):
             self.validator.validate_text(content)
 
             # Select the page to post to
-            selected_page = self.select_page(user_id)
+            selected_page = await self.select_page(user_id, page_id)
 
             data = {
                 "message": content,
@@ -127,10 +144,8 @@ class FacebookPublisherService(BasePublisherService):
             }
 
             self.logger.info(f"Sending image post request to page: {selected_page['name']}...")
-            with open(image_path, "rb") as image_file:
-                files = {"file": image_file}
-                response = requests.post(f"{self.api_url}{selected_page['id']}/photos", data=data, files=files)
-                response.raise_for_status()
+            response = await self._post_file(f"{self.api_url}{selected_page['id']}/photos", data, image_path)
+            response.raise_for_status()
 
             self.logger.info("Image post successful.")
             return response.json()
@@ -144,7 +159,7 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Failed to post image on Facebook: {str(e)}")
             raise
 
-    def post_video(self, user_id, content, video_path):
+    async def post_video(self, user_id, content, video_path, page_id=None):
         """
         Posts a video with a description to the selected Facebook page.
         """
@@ -154,18 +169,25 @@ class FacebookPublisherService(BasePublisherService):
             self.validator.validate_text(content)
 
             # Select the page to post to
-            selected_page = self.select_page(user_id)
+            selected_page = await self.select_page(user_id, page_id)
 
             data = {
                 "description": content,
                 "access_token": selected_page['access_token'],  # Use page access token
             }
 
+            if os.path.getsize(video_path) >= RESUMABLE_THRESHOLD:
+                # Large videos go up in resumable chunks so a failure doesn't restart the whole file
+                self.logger.info(f"Uploading video in chunks to page: {selected_page['name']}...")
+                result = await self.uploader.upload(
+                    selected_page['id'], selected_page['access_token'], video_path, {"description": content}
+                )
+                self.logger.info("Video post successful.")
+                return result
+
             self.logger.info(f"Sending video post request to page: {selected_page['name']}...")
-            with open(video_path, "rb") as video_file:
-                files = {"file": video_file}
-                response = requests.post(f"{self.api_url}{selected_page['id']}/videos", data=data, files=files)
-                response.raise_for_status()
+            response = await self._post_file(f"{self.api_url}{selected_page['id']}/videos", data, video_path)
+            response.raise_for_status()
 
             self.logger.info("Video post successful.")
             return response.json()
@@ -179,7 +201,7 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Failed to post video on Facebook: {str(e)}")
             raise
 
-    def post_link(self, user_id, content, link_url):
+    async def post_link(self, user_id, content, link_url, page_id=None):
         """
         Posts a link with a description to the selected Facebook page.
         """
@@ -189,7 +211,7 @@ class FacebookPublisherService(BasePublisherService):
             self.validator.validate_text(content)
 
             # Select the page to post to
-            selected_page = self.select_page(user_id)
+            selected_page = await self.select_page(user_id, page_id)
 
             data = {
                 "message": content,
@@ -198,7 +220,7 @@ class FacebookPublisherService(BasePublisherService):
             }
 
             self.logger.info(f"Sending link post request to page: {selected_page['name']}...")
-            response = requests.post(f"{self.api_url}{selected_page['id']}/feed", data=data)
+            response = await self.transport.post(f"{self.api_url}{selected_page['id']}/feed", data=data)
             response.raise_for_status()
 
             self.logger.info("Link post successful.")
@@ -210,7 +232,7 @@ class FacebookPublisherService(BasePublisherService):
             self.logger.error(f"Failed to post link on Facebook: {str(e)}")
             raise
 
-    def post_document(self, user_id, content, document_path):
+    async def post_document(self, user_id, content, document_path, page_id=None):
         """
         Posts a document (as a file) to the selected Facebook page.
         Upload it as an image for the time being, as Facebook doesn't support documents directly.
@@ -220,25 +242,20 @@ class FacebookPublisherService(BasePublisherService):
             if not os.path.exists(document_path):
                 raise FileNotFoundError(f"Document file not found: {document_path}")
 
-            # Get the access token
-            access_token = self.oauth_helper.refresh_token(user_id)
-
             # Select the page to post to
-            selected_page = self.select_page(user_id)
+            selected_page = await self.select_page(user_id, page_id)
 
             data = {
                 "message": content,
-                "access_token": access_token,
+                "access_token": selected_page['access_token'],  # Use page access token
             }
 
             # Log the document upload
             self.logger.info(f"Uploading document as image to page: {selected_page['name']}...")
 
-            # Open the document and send it as a file
-            with open(document_path, "rb") as doc_file:
-                files = {"file": doc_file}
-                response = requests.post(f"{self.api_url}{selected_page['id']}/photos", data=data, files=files)
-                response.raise_for_status()
+            # Stream the document as a file
+            response = await self._post_file(f"{self.api_url}{selected_page['id']}/photos", data, document_path)
+            response.raise_for_status()
 
             # Log successful post
             self.logger.info("Document post successful.")
@@ -250,3 +267,44 @@ class FacebookPublisherService(BasePublisherService):
         except requests.HTTPError as e:
             self.logger.error(f"Failed to post document: {str(e)}")
             raise
+
+
+class FacebookPublisherService(BasePublisherService):
+    """Blocking facade over AsyncFacebookPublisherService; sends through `async_transport`."""
+
+    def __init__(self, oauth_helper: FacebookOAuthHelper, async_transport=None, uploader=None,
+                 upload_session_dir=None):
+        self.oauth_helper = oauth_helper
+        self.async_service = AsyncFacebookPublisherService(oauth_helper, transport=async_transport, uploader=uploader,
+                                                           upload_session_dir=upload_session_dir)
+        self.api_url = self.async_service.api_url
+        self.validator = self.async_service.validator
+        self.logger = self.async_service.logger
+
+    def select_page(self, user_id, page_id=None):
+        """Selects the page to post to and attaches its page access token."""
+        return run_sync(self.async_service.select_page(user_id, page_id))
+
+    def get_page_access_token(self, page_id, user_id):
+        """Fetches the page access token for a specific page."""
+        return run_sync(self.async_service.get_page_access_token(page_id, user_id))
+
+    def post_text(self, user_id, content, page_id=None):
+        """Posts a text-only update to the selected Facebook page."""
+        return run_sync(self.async_service.post_text(user_id, content, page_id))
+
+    def post_image(self, user_id, content, image_path, page_id=None):
+        """Posts an image with a caption to the selected Facebook page."""
+        return run_sync(self.async_service.post_image(user_id, content, image_path, page_id))
+
+    def post_video(self, user_id, content, video_path, page_id=None):
+        """Posts a video with a description to the selected Facebook page."""
+        return run_sync(self.async_service.post_video(user_id, content, video_path, page_id))
+
+    def post_link(self, user_id, content, link_url, page_id=None):
+        """Posts a link with a description to the selected Facebook page."""
+        return run_sync(self.async_service.post_link(user_id, content, link_url, page_id))
+
+    def post_document(self, user_id, content, document_path, page_id=None):
+        """Posts a document (as a file) to the selected Facebook page."""
+        return run_sync(self.async_service.post_document(user_id, content, document_path, page_id))
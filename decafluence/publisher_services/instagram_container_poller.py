@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import threading
+import weakref
+
+import requests
+
+from decafluence.transport.async_http_transport import get_default_async_transport
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+INSTAGRAM_API_URL = 'https://graph.instagram.com/v20.0'
+DEFAULT_INITIAL_DELAY = 0.5  # First check; most images are ready well within a second
+DEFAULT_MAX_DELAY = 15
+DEFAULT_BACKOFF = 1.5
+DEFAULT_TIMEOUT = 600  # Reels can take several minutes to process
+DEFAULT_BATCH_SIZE = 50  # Graph accepts up to 50 ids per multi-id lookup
+TRANSIENT_CLIENT_ERRORS = (408, 429)  # 4xx statuses worth polling again
+READY_STATUSES = ('FINISHED', 'PUBLISHED', 'READY')
+FAILED_STATUSES = ('ERROR', 'EXPIRED')
+
+
+class _PendingContainer:
+    __slots__ = ('access_token', 'future', 'delay', 'next_check', 'deadline')
+
+    def __init__(self, access_token, future, delay, next_check, deadline):
+        self.access_token = access_token
+        self.future = future
+        self.delay = delay
+        self.next_check = next_check
+        self.deadline = deadline
+
+
+class _LoopState:
+    """The containers watched on one event loop, with the task that polls them."""
+    __slots__ = ('pending', 'task', 'wakeup')
+
+    def __init__(self):
+        self.pending = {}  # container_id -> _PendingContainer
+        self.task = None
+        self.wakeup = asyncio.Event()
+
+
+class InstagramContainerPoller:
+    """
+    Watches pending Instagram media containers until they are ready to publish.
+
+    Every container registered with `wait()` is checked by a single background task. Containers
+    that are due are grouped by access token and looked up `batch_size` at a time with one
+    `?ids=` Graph request. Each container is first checked after `initial_delay` seconds and
+    then backs off by `backoff` up to `max_delay`, so images publish almost immediately while
+    long reels are polled cheaply. Each caller awaits a future that resolves once its container
+    is ready, or raises if it fails or exceeds `timeout`. A lookup rejected with a 4xx is
+    repeated one container at a time, so a bad id or expired token fails only the containers it
+    belongs to, and if the polling task dies every waiting caller gets its error. Futures belong to one event loop, so
+    callers on different loops are watched separately, each loop with its own polling task.
+    """
+
+    def __init__(self, transport=None, api_url=INSTAGRAM_API_URL, initial_delay=DEFAULT_INITIAL_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.transport = transport or get_default_async_transport()
+        self.api_url = api_url
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._states = weakref.WeakKeyDictionary()  # event loop -> _LoopState
+        self._states_lock = threading.Lock()
+
+    def pending_count(self):
+        """Number of containers currently being watched."""
+        return sum(len(state.pending) for state in list(self._states.values()))
+
+    def _state_for(self, loop):
+        state = self._states.get(loop)
+        if state is None:
+            with self._states_lock:
+                state = self._states.get(loop)
+                if state is None:
+                    state = self._states[loop] = _LoopState()
+        return state
+
+    async def wait(self, access_token, container_id):
+        """Wait until container_id is ready to publish."""
+        loop = asyncio.get_running_loop()
+        state = self._state_for(loop)
+        entry = state.pending.get(container_id)
+        if entry is None:
+            now = loop.time()
+            entry = _PendingContainer(
+                access_token, loop.create_future(), self.initial_delay,
+                now + self.initial_delay, now + self.timeout
+            )
+            state.pending[container_id] = entry
+            state.wakeup.set()
+        if state.task is None or state.task.done():
+            state.task = loop.create_task(self._run(state))
+        # Shielded so one cancelled caller doesn't fail others waiting on the same container
+        return await asyncio.shield(entry.future)
+
+    async def _run(self, state):
+        # Nothing else would resolve the pending futures, so whatever ends the task reaches every caller
+        try:
+            await self._poll(state)
+        except asyncio.CancelledError:
+            self._fail_pending(state, None)
+            raise
+        except Exception as e:
+            logger.error(f"Instagram container polling stopped: {e!r}")
+            self._fail_pending(state, e)
+
+    @staticmethod
+    def _fail_pending(state, error):
+        """Fail every pending container with error, or cancel them if error is None."""
+        while state.pending:
+            _, entry = state.pending.popitem()
+            if entry.future.done():
+                continue
+            if error is None:
+                entry.future.cancel()
+            else:
+                entry.future.set_exception(error)
+
+    async def _poll(self, state):
+        loop = asyncio.get_running_loop()
+        while state.pending:
+            now = loop.time()
+            due = [cid for cid, entry in state.pending.items() if entry.next_check <= now]
+            if not due:
+                next_check = min(entry.next_check for entry in state.pending.values())
+                state.wakeup.clear()
+                try:
+                    await asyncio.wait_for(state.wakeup.wait(), timeout=next_check - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            by_token = {}
+            for container_id in due:
+                by_token.setdefault(state.pending[container_id].access_token, []).append(container_id)
+            await asyncio.gather(*(
+                self._check_batch(state, access_token, container_ids[i:i + self.batch_size])
+                for access_token, container_ids in by_token.items()
+                for i in range(0, len(container_ids), self.batch_size)
+            ))
+
+    async def _check_batch(self, state, access_token, container_ids):
+        params = {"ids": ",".join(container_ids), "fields": "status_code,status", "access_token": access_token}
+        try:
+            response = await self.transport.get(f"{self.api_url}/", params=params)
+            response.raise_for_status()
+            statuses = response.json()
+        except requests.HTTPError as e:
+            status = getattr(e.response, 'status_code', None)
+            if status is None or status >= 500 or status in TRANSIENT_CLIENT_ERRORS:
+                logger.warning(f"Container status lookup for {len(container_ids)} containers failed: {e}")
+                statuses = {}
+            elif len(container_ids) > 1:
+                # One bad id or token rejects the whole lookup; find out which containers it was
+                await asyncio.gather(*(
+                    self._check_batch(state, access_token, [container_id]) for container_id in container_ids
+                ))
+                return
+            else:
+                if container_ids[0] in state.pending:
+                    self._resolve(state, container_ids[0], e)
+                return
+        except (requests.RequestException, ValueError) as e:
+            # Treat as "not ready yet"; affected containers back off and are retried
+            logger.warning(f"Container status lookup for {len(container_ids)} containers failed: {e}")
+            statuses = {}
+
+        now = asyncio.get_running_loop().time()
+        for container_id in container_ids:
+            entry = state.pending.get(container_id)
+            if entry is None:
+                continue
+            info = statuses.get(container_id) or {}
+            status_code = info.get('status_code')
+            if status_code in READY_STATUSES:
+                self._resolve(state, container_id, None)
+            elif status_code in FAILED_STATUSES:
+                self._resolve(state, container_id, Exception(
+                    f"Media container {container_id} failed processing: {info.get('status', status_code)}"
+                ))
+            elif now >= entry.deadline:
+                self._resolve(state, container_id, TimeoutError(
+                    f"Media container {container_id} did not become ready within {self.timeout} seconds."
+                ))
+            else:
+                entry.delay = min(entry.delay * self.backoff, self.max_delay)
+                entry.next_check = now + entry.delay
+
+    @staticmethod
+    def _resolve(state, container_id, error):
+        entry = state.pending.pop(container_id)
+        if entry.future.done():
+            return
+        if error is None:
+            logger.info(f"Media container {container_id} is ready.")
+            entry.future.set_result(None)
+        else:
+            entry.future.set_exception(error)
+
+
+_default_container_poller = None
+_default_container_poller_lock = threading.Lock()
+
+
+def get_default_container_poller():
+    """
+    Return the process-wide container poller shared by every Instagram publisher, so all
+    pending containers are batched into the same status lookups.
+    """
+    global _default_container_poller
+    if _default_container_poller is None:
+        with _default_container_poller_lock:
+            if _default_container_poller is None:
+                _default_container_poller = InstagramContainerPoller()
+    return _default_container_poller
@@ -1,95 +1,131 @@
-import os
+import asyncio
 import requests
 from decafluence.oauth_helpers.instagram_oauth_helper import InstagramOAuthHelper
-from decafluence.publisher_services.base_publisher import BasePublisherService
-from decafluence.validators.content_validators import ContentValidator
-from google.cloud import storage
-from firebase_config import initialize_firebase  # Import Firebase initialization function
+from decafluence.publisher_services.base_publisher import AsyncBasePublisherService, BasePublisherService, run_sync
+from decafluence.publisher_services.instagram_container_poller import get_default_container_poller
+from decafluence.staging.media_staging import get_default_staging_cache, is_remote_url
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.transport.quota_tracker import QuotaExceededError, get_default_quota_tracker
+from decafluence.validators.content_validators import ContentValidator, detect_media_type
 from logger_config import setup_logger
-import time
 
-class InstagramPublisherService(BasePublisherService):
-    def __init__(self, oauth_helper: InstagramOAuthHelper):
+CAROUSEL_MAX_CONCURRENCY = 5  # Carousel items staged and containerised at once
+
+class AsyncInstagramPublisherService(AsyncBasePublisherService):
+    supported_media_types = frozenset({'image', 'video'})
+
+    def __init__(self, oauth_helper: InstagramOAuthHelper, transport=None, carousel_concurrency=CAROUSEL_MAX_CONCURRENCY,
+                 poller=None, staging=None, quota_tracker=None):
         """
-        Initializes the Instagram Publisher Service with Firebase and GCP Storage setup.
+        Initializes the Instagram Publisher Service with the shared GCP Storage staging cache.
         """
         self.oauth_helper = oauth_helper
+        self.transport = transport or get_default_async_transport()
+        self.quota_tracker = quota_tracker or get_default_quota_tracker()
+        self.carousel_concurrency = carousel_concurrency
+        self.poller = poller or get_default_container_poller()
         self.api_url = 'https://graph.instagram.com/v20.0'  # Instagram Graph API base URL
         self.validator = ContentValidator(platform='instagram')
         self.logger = setup_logger()
 
-        # Initialize Firebase (Firestore) and GCP storage
-        self.firestore_client = initialize_firebase()  # Initialize Firestore client from Firebase config
-        self.client = storage.Client()  # Initialize GCP Storage client
-        self.bucket = self.client.get_bucket(os.getenv('GCP_BUCKET_NAME'))  # Replace with your GCP bucket name
-        if not self.bucket:
-            raise ValueError("Failed to initialize GCP bucket.")
+        # Staging bucket and client are shared process-wide and created on first use
+        self.staging = staging or get_default_staging_cache()
 
-    def post_image(self, system_user_id, content, image_file):
+    async def post_image(self, system_user_id, content, image_file):
         """
         Posts an image to Instagram with a caption.
         """
         if not image_file:
             raise ValueError("Parameter 'image_file' is required for posting an image.")
-        return self._post_media(system_user_id, content, media_file=image_file, media_type="IMAGE")
+        return await self._post_media(system_user_id, content, media_file=image_file, media_type="IMAGE")
 
-    def post_video(self, system_user_id, content, video_file):
+    async def post_video(self, system_user_id, content, video_file):
         """
         Posts a video to Instagram with a caption.
         """
         if not video_file:
             raise ValueError("Parameter 'video_file' is required for posting a video.")
-        return self._post_media(system_user_id, content, media_file=video_file, media_type="VIDEO")
+        return await self._post_media(system_user_id, content, media_file=video_file, media_type="VIDEO")
 
-    def post_reels(self, system_user_id, content, video_file):
+    async def post_reels(self, system_user_id, content, video_file):
         """
         Posts a reel to Instagram with a caption.
         """
         if not video_file:
             raise ValueError("Parameter 'video_file' is required for posting a reel.")
-        return self._post_media(system_user_id, content, media_file=video_file, media_type="REELS")
+        return await self._post_media(system_user_id, content, media_file=video_file, media_type="REELS")
 
-    def post_carousel(self, system_user_id, content, media_files):
+    async def post_carousel(self, system_user_id, content, media_files):
         """
         Posts a carousel to Instagram with a caption.
         """
         if not media_files or len(media_files) < 2:
             raise ValueError("Parameter 'media_files' is required for posting a carousel and must contain at least 2 items.")
 
+        media_urls = []
         try:
+            self.logger.info("Validating carousel content...")
+            self.validator.validate_text(content)
+            for file in media_files:
+                self._validate_media(file, "VIDEO" if detect_media_type(file) == 'video' else "IMAGE")
+
             self.logger.info("Fetching access token and Instagram user ID...")
-            access_token, instagram_user_id = self._get_access_token_and_user_id(system_user_id)
+            access_token, instagram_user_id = await self._get_access_token_and_user_id(system_user_id)
 
-            self.logger.info("Uploading media to GCP Storage...")
-            media_urls = [self._upload_to_gcp(file) for file in media_files]
+            self.logger.info(f"Staging and creating containers for {len(media_files)} carousel items...")
+            semaphore = asyncio.Semaphore(self.carousel_concurrency)
+            results = await asyncio.gather(*(
+                self._prepare_carousel_item(semaphore, access_token, instagram_user_id, file) for file in media_files
+            ), return_exceptions=True)
 
-            self.logger.info("Creating media containers for carousel items...")
-            container_ids = []
-            for media_url in media_urls:
-                container_id = self._create_carousel_item_container(access_token, instagram_user_id, media_url)
-                container_ids.append(container_id)
+            media_urls = [result[0] for result in results if not isinstance(result, BaseException)]
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if errors:
+                raise errors[0]
+            container_ids = [container_id for _, container_id in results]
 
             self.logger.info("Creating carousel container...")
-            carousel_container_id = self._create_carousel_container(
+            carousel_container_id = await self._create_carousel_container(
                 access_token, instagram_user_id, container_ids, caption=content
             )
 
             self.logger.info("Publishing carousel...")
-            response = self._publish_media(access_token, carousel_container_id, instagram_user_id)
-
-            # Cleanup: Delete media from GCP storage
-            self.logger.info("Deleting uploaded media from GCP storage...")
-            media_urls = list(set(media_urls))
-            for url in media_urls:
-                self._delete_from_gcp(url)
+            response = await self._publish_media(access_token, carousel_container_id, instagram_user_id)
 
             self.logger.info("Carousel post successful.")
             return response
         except Exception as e:
             self.logger.error(f"Error posting carousel: {e}")
             raise
+        finally:
+            # Cleanup: release staged media; the staging janitor deletes it in the background
+            for url in media_urls:
+                self._delete_from_gcp(url)
 
-    def _create_carousel_item_container(self, access_token, user_id, media_url):
+    async def _prepare_carousel_item(self, semaphore, access_token, user_id, media_file):
+        """
+        Stages one carousel item and creates its container as soon as its own upload finishes.
+        Video children are then polled until ready, concurrently with the other items.
+        Returns (media_url, container_id).
+        """
+        media_type = "VIDEO" if detect_media_type(media_file) == 'video' else "IMAGE"
+        async with semaphore:
+            media_url = await asyncio.to_thread(self._upload_to_gcp, media_file)
+            try:
+                container_id = await self._create_carousel_item_container(access_token, user_id, media_url, media_type)
+            except Exception:
+                self._delete_from_gcp(media_url)
+                raise
+        if media_type == "VIDEO":
+            # Polled outside the semaphore so a slow video doesn't hold up other uploads
+            try:
+                await self._wait_until_ready(access_token, container_id)
+            except Exception:
+                self._delete_from_gcp(media_url)
+                raise
+        return media_url, container_id
+
+    async def _create_carousel_item_container(self, access_token, user_id, media_url, media_type="IMAGE"):
         """
         Creates an Instagram media container for a carousel item.
         """
@@ -97,10 +133,14 @@ class InstagramPublisherService(BasePublisherService):
             url = f"{self.api_url}/{user_id}/media"
             payload = {
                 "is_carousel_item": "true",
-                "image_url": media_url,
                 "access_token": access_token
             }
-            response = requests.post(url, params=payload)
+            if media_type == "VIDEO":
+                payload["media_type"] = "VIDEO"
+                payload["video_url"] = media_url
+            else:
+                payload["image_url"] = media_url
+            response = await self.transport.post(url, params=payload)
             response.raise_for_status()
             container_id = response.json().get("id")
             if not container_id:
@@ -114,7 +154,7 @@ class InstagramPublisherService(BasePublisherService):
             raise
 
 
-    def _create_carousel_container(self, access_token, user_id, container_ids, caption):
+    async def _create_carousel_container(self, access_token, user_id, container_ids, caption):
         """
         Creates a carousel container with multiple media containers.
         """
@@ -126,7 +166,7 @@ class InstagramPublisherService(BasePublisherService):
                 "caption": caption,
                 "access_token": access_token
             }
-            response = requests.post(url, params=payload)
+            response = await self.transport.post(url, params=payload)
             response.raise_for_status()
             container_id = response.json().get("id")
             if not container_id:
@@ -140,25 +180,26 @@ class InstagramPublisherService(BasePublisherService):
             raise
 
 
-    def _post_media(self, system_user_id, content, media_file=None, media_files=None, media_type=None):
+    async def _post_media(self, system_user_id, content, media_file=None, media_files=None, media_type=None):
         """
         General method to post media to Instagram.
         """
+        media_urls = []
         try:
             self.logger.info(f"Validating content for {media_type}...")
             self.validator.validate_text(content)
+            for file in media_files or [media_file]:
+                self._validate_media(file, media_type)
 
             self.logger.info("Fetching access token and Instagram user ID...")
-            access_token, instagram_user_id = self._get_access_token_and_user_id(system_user_id)
+            access_token, instagram_user_id = await self._get_access_token_and_user_id(system_user_id)
 
             self.logger.info("Uploading media to GCP Storage...")
-            if media_files:
-                media_urls = [self._upload_to_gcp(file) for file in media_files]
-            else:
-                media_urls = [self._upload_to_gcp(media_file)]
+            for file in media_files or [media_file]:
+                media_urls.append(await asyncio.to_thread(self._upload_to_gcp, file))
 
             self.logger.info(f"Creating {media_type} media container...")
-            media_response = self._create_media_container(
+            media_response = await self._create_media_container(
                 access_token, media_urls, caption=content, user_id=instagram_user_id, media_type=media_type
             )
 
@@ -168,27 +209,36 @@ class InstagramPublisherService(BasePublisherService):
                 raise Exception("Media container creation failed.")
 
             self.logger.info(f"Publishing {media_type}...")
-            response = self._publish_media(access_token, media_id, instagram_user_id)
+            response = await self._publish_media(access_token, media_id, instagram_user_id)
             self.logger.info(f"{media_type} post successful.")
-
-            # Cleanup: Delete media from GCP storage
-            self.logger.info("Deleting uploaded media from GCP storage...")
-            for url in media_urls:
-                self._delete_from_gcp(url)
-
             return response
         except Exception as e:
             self.logger.error(f"Unexpected error: {e}")
             raise
+        finally:
+            # Cleanup: release staged media; the staging janitor deletes it in the background
+            for url in media_urls:
+                self._delete_from_gcp(url)
 
-    def _get_access_token_and_user_id(self, system_user_id):
+    def _validate_media(self, media_file, media_type):
+        """
+        Check a local file against Instagram's size, dimension, aspect ratio and duration limits
+        before it is staged. Remote URLs are fetched by Instagram itself and are not checked here.
         """
-        Retrieves the access token and Instagram user ID from Firestore.
+        if is_remote_url(media_file):
+            return
+        if media_type in ("VIDEO", "REELS"):
+            self.validator.validate_video(media_file)
+        else:
+            self.validator.validate_image(media_file)
+
+    async def _get_access_token_and_user_id(self, system_user_id):
+        """
+        Retrieves the access token and Instagram user ID from the cached token document.
         """
         try:
-            self.logger.info("Fetching access token and Instagram user ID from Firestore...")
-            user_ref = self.firestore_client.collection('user_tokens').document(system_user_id)
-            user_data = user_ref.get().to_dict()
+            self.logger.info("Fetching access token and Instagram user ID...")
+            user_data = await self.oauth_helper.get_user_document_async(system_user_id)
 
             if user_data and 'token_data' in user_data:
                 access_token = user_data['token_data'].get('access_token')
@@ -207,42 +257,27 @@ class InstagramPublisherService(BasePublisherService):
 
     def _upload_to_gcp(self, media_file):
         """
-        Upload media to GCP Storage and return the public URL.
-        Handles local files.
+        Stage media in GCP Storage and return a URL Instagram can fetch it from.
+        Identical content reuses the existing blob; http(s) URLs are returned as-is.
         """
         try:
-            # Check if media_file is a local file path (not a URL)
-            if isinstance(media_file, str):  # Check if it's a file path
-                # Open the file for reading in binary mode
-                with open(media_file, 'rb') as file:
-                    file_name = os.path.basename(media_file)  # Get the file name from the path
-                    blob = self.bucket.blob(f"instagram-media/{file_name}")
-                    blob.upload_from_file(file)
-                    blob.make_public()
-                    self.logger.info(f"Uploaded {file_name} to GCP Storage.")
-                    return blob.public_url
-            else:
-                raise ValueError("Invalid media file. Expected a file path (string).")
-
+            return self.staging.stage(media_file)
         except Exception as e:
             self.logger.error(f"Error uploading media to GCP: {e}")
             raise
 
     def _delete_from_gcp(self, media_url):
         """
-        Delete media from GCP Storage.
+        Release a staged media URL. This is in-memory bookkeeping only; the staging janitor deletes
+        the blob in the background once no post references it and its reuse TTL expires.
         """
         try:
-            media_name = media_url.split("/")[-1]
-            blob = self.bucket.blob(f"instagram-media/{media_name}")
-            blob.delete()
-
-            self.logger.info(f"Deleted {media_name} from GCP Storage.")
+            self.staging.release(media_url)
         except Exception as e:
             self.logger.error(f"Error deleting media from GCP: {e}")
             raise
 
-    def _create_media_container(self, access_token, media_urls, caption, user_id, media_type):
+    async def _create_media_container(self, access_token, media_urls, caption, user_id, media_type):
         """
         Creates a media container for Instagram posts, including images, videos, reels, and carousels.
         """
@@ -276,7 +311,7 @@ class InstagramPublisherService(BasePublisherService):
             else:
                 raise ValueError("Unsupported media type. Use 'IMAGE', 'VIDEO', 'REELS', or 'CAROUSEL'.")
 
-            response = requests.post(url, params=media_payload)
+            response = await self.transport.post(url, params=media_payload)
             response.raise_for_status()
 
             self.logger.info(f"{media_type} media container created successfully.")
@@ -288,7 +323,7 @@ class InstagramPublisherService(BasePublisherService):
             self.logger.error(f"Error creating {media_type} container: {e}")
             raise
 
-    def _publish_media(self, access_token, media_id, user_id):
+    async def _publish_media(self, access_token, media_id, user_id):
         """
         Publishes media on Instagram using the media_publish endpoint, with a polling mechanism
         to ensure the media container is ready.
@@ -297,31 +332,17 @@ class InstagramPublisherService(BasePublisherService):
             self.logger.info(f"Publishing media ID {media_id} for user {user_id}...")
             url = f"{self.api_url}/{user_id}/media_publish"
 
-            # Polling configuration
-            max_retries = 10  # Number of retries
-            delay = 5  # Delay between retries in seconds
-
-            for attempt in range(max_retries):
-                self.logger.info(f"Checking readiness of media ID {media_id} (Attempt {attempt + 1}/{max_retries})...")
-                
-                # Check the media container status
-                status_response = self._check_media_status(access_token, media_id)
-                if status_response.get("status") == "READY" or status_response.get("status") == "FINISHED":
-                    self.logger.info("Media container is ready. Proceeding to publish.")
-                    break
-                else:
-                    self.logger.warning(f"Media container is not ready. Waiting {delay} seconds...")
-                    time.sleep(delay)
-            else:
-                raise TimeoutError("Media container did not become ready within the maximum retry limit.")
+            await self._wait_until_ready(access_token, media_id)
+            await self._check_publishing_limit(access_token, user_id)
 
             # Publish the media
             params = {
                 "creation_id": media_id,
                 "access_token": access_token
             }
-            response = requests.post(url, params=params)
+            response = await self.transport.post(url, params=params)
             response.raise_for_status()
+            self.quota_tracker.record_publish(user_id)
 
             self.logger.info("Media published successfully.")
             return response.json()
@@ -333,24 +354,73 @@ class InstagramPublisherService(BasePublisherService):
             self.logger.error(f"Error publishing media: {e}")
             raise
 
-    def _check_media_status(self, access_token, media_id):
+    async def _check_publishing_limit(self, access_token, user_id):
         """
-        Checks the status of the media container.
+        Raises QuotaExceededError if the account has used its 24-hour publishing quota. The
+        content_publishing_limit reading is cached by the shared quota tracker and counted
+        down locally, so most publishes don't need the extra lookup.
         """
-        try:
-            url = f"{self.api_url}/{media_id}"
-            params = {"access_token": access_token}
-
-            response = requests.get(url, params=params)
+        reading = self.quota_tracker.publishing_limit(user_id)
+        if reading is None:
+            params = {"fields": "config,quota_usage", "access_token": access_token}
+            response = await self.transport.get(f"{self.api_url}/{user_id}/content_publishing_limit", params=params)
             response.raise_for_status()
+            data = (response.json().get('data') or [{}])[0]
+            total = (data.get('config') or {}).get('quota_total')
+            if total is None:
+                return
+            reading = (data.get('quota_usage', 0), total)
+            self.quota_tracker.record_publishing_limit(user_id, *reading)
+
+        usage, total = reading
+        if usage >= total:
+            raise QuotaExceededError(f"Instagram account {user_id} has used its {total} posts for the last 24 hours.")
+
+    async def _wait_until_ready(self, access_token, media_id):
+        """
+        Waits until a media container is ready, via the shared batched container poller.
+        """
+        self.logger.info(f"Waiting for media container {media_id} to become ready...")
+        await self.poller.wait(access_token, media_id)
 
-            return response.json()
-        except requests.HTTPError as e:
-            self.logger.error(f"HTTP error while checking media status: {e.response.text}")
-            raise
-        except Exception as e:
-            self.logger.error(f"Error checking media status: {e}")
-            raise
+    # Unsupported methods for Instagram
+    async def post_document(self, *args, **kwargs):
+        raise NotImplementedError("Instagram does not support posting documents.")
+
+    async def post_text(self, *args, **kwargs):
+        raise NotImplementedError("Instagram does not support posting text as a separate operation.")
+
+
+class InstagramPublisherService(BasePublisherService):
+    """Blocking facade over AsyncInstagramPublisherService; sends through `async_transport`."""
+
+    def __init__(self, oauth_helper: InstagramOAuthHelper, async_transport=None,
+                 carousel_concurrency=CAROUSEL_MAX_CONCURRENCY, poller=None, staging=None, quota_tracker=None):
+        self.oauth_helper = oauth_helper
+        self.async_service = AsyncInstagramPublisherService(
+            oauth_helper, transport=async_transport, carousel_concurrency=carousel_concurrency, poller=poller,
+            staging=staging, quota_tracker=quota_tracker
+        )
+        self.api_url = self.async_service.api_url
+        self.validator = self.async_service.validator
+        self.logger = self.async_service.logger
+        self.staging = self.async_service.staging
+
+    def post_image(self, system_user_id, content, image_file):
+        """Posts an image to Instagram with a caption."""
+        return run_sync(self.async_service.post_image(system_user_id, content, image_file))
+
+    def post_video(self, system_user_id, content, video_file):
+        """Posts a video to Instagram with a caption."""
+        return run_sync(self.async_service.post_video(system_user_id, content, video_file))
+
+    def post_reels(self, system_user_id, content, video_file):
+        """Posts a reel to Instagram with a caption."""
+        return run_sync(self.async_service.post_reels(system_user_id, content, video_file))
+
+    def post_carousel(self, system_user_id, content, media_files):
+        """Posts a carousel to Instagram with a caption."""
+        return run_sync(self.async_service.post_carousel(system_user_id, content, media_files))
 
     # Unsupported methods for Instagram
     def post_document(self, *args, **kwargs):
@@ -2,34 +2,38 @@ import os
 import requests
 import logging
 from decafluence.oauth_helpers.linkedin_oauth_helper import LinkedInOAuthHelper
-from decafluence.publisher_services.base_publisher import BasePublisherService
+from decafluence.publisher_services.base_publisher import AsyncBasePublisherService, BasePublisherService, PublishError, run_sync
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.uploads.linkedin_multipart_upload import LINKEDIN_VERSION, LinkedInMultipartUploader
 from decafluence.validators.content_validators import ContentValidationError, ContentValidator
 
-class LinkedInPublisherService(BasePublisherService):
-    def __init__(self, oauth_helper: LinkedInOAuthHelper):
+class AsyncLinkedInPublisherService(AsyncBasePublisherService):
+    def __init__(self, oauth_helper: LinkedInOAuthHelper, transport=None, uploader=None):
         self.oauth_helper = oauth_helper
+        self.transport = transport or get_default_async_transport()
         self.api_url = 'https://api.linkedin.com/v2/'
         self.validator = ContentValidator(platform='linkedin')
         self.logger = logging.getLogger(__name__)
+        self.uploader = uploader or LinkedInMultipartUploader(self.transport)
 
-    def _get_auth_header(self, user_id):
+    async def _get_auth_header(self, user_id):
         """Helper to get the authorization headers using access token."""
         try:
-            tokens = self.oauth_helper.get_token(user_id)
-            access_token = tokens.get('access_token')
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
             if not access_token:
                 raise ValueError("Access token not found")
             self.logger.debug(f"Access token retrieved for user {user_id}")
             return {'Authorization': f'Bearer {access_token}'}
         except Exception as e:
             self.logger.error(f"Error getting auth header for user {user_id}: {e}")
-            raise Exception(f"Error getting auth header for user {user_id}: {e}")
+            raise PublishError(f"Error getting auth header for user {user_id}: {e}") from e
 
-    def post_text(self, user_id, content):
+    async def post_text(self, user_id, content):
         """Post a text message to LinkedIn."""
         try:
-            access_token = self.oauth_helper.get_token(user_id).get('access_token')
-            user_urn = self.oauth_helper.get_user_urn(access_token)
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
+            token_data = await self.oauth_helper.get_token_async(user_id)
+            user_urn = await self.oauth_helper.get_user_urn_async(access_token, token_data)
             self.logger.info(f"Attempting to post text for user {user_urn}")
             self.validator.validate_text(content)
             headers = { 
@@ -49,7 +53,7 @@ class LinkedInPublisherService(BasePublisherService):
                 },
                 "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
             }
-            post_response = requests.post(f"{self.api_url}ugcPosts", headers=headers, json=post_data)
+            post_response = await self.transport.post(f"{self.api_url}ugcPosts", headers=headers, json=post_data)
             post_response.raise_for_status()
             self.logger.info(f"Text post successful for user {user_urn}")
             return post_response.json()
@@ -57,14 +61,15 @@ class LinkedInPublisherService(BasePublisherService):
             self.logger.error(f"Content validation failed for text post: {e}")
             raise e
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request failed during text post for user {user_urn}: {e}")
-            raise Exception(f"Failed to post text on LinkedIn: {e}")
+            self.logger.error(f"Request failed during text post for user {user_id}: {e}")
+            raise PublishError(f"Failed to post text on LinkedIn: {e}") from e
 
-    def post_image(self, user_id, content, image_path):
+    async def post_image(self, user_id, content, image_path):
         """Post an image to LinkedIn."""
         try:
-            access_token = self.oauth_helper.get_token(user_id).get('access_token')
-            user_urn = self.oauth_helper.get_user_urn(access_token)
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
+            token_data = await self.oauth_helper.get_token_async(user_id)
+            user_urn = await self.oauth_helper.get_user_urn_async(access_token, token_data)
             self.logger.info(f"Attempting to post image for user {user_urn}")
             self.validator.validate_image(image_path)
             self.validator.validate_text(content)
@@ -80,7 +85,7 @@ class LinkedInPublisherService(BasePublisherService):
                     ]
                 }
             }
-            register_response = requests.post(f"{self.api_url}assets?action=registerUpload", headers=headers, json=register_data)
+            register_response = await self.transport.post(f"{self.api_url}assets?action=registerUpload", headers=headers, json=register_data)
             register_response.raise_for_status()
             register_json = register_response.json()
             upload_url = register_json['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
@@ -92,7 +97,7 @@ class LinkedInPublisherService(BasePublisherService):
                     'Authorization': f'Bearer {access_token}',
                     'Content-Type': 'image/jpeg'
                 }
-                upload_response = requests.put(upload_url, headers=upload_headers, data=image_file)
+                upload_response = await self.transport.put(upload_url, headers=upload_headers, data=image_file)
                 upload_response.raise_for_status()
 
             self.logger.info(f"Image uploaded successfully for user {user_urn}")
@@ -112,7 +117,7 @@ class LinkedInPublisherService(BasePublisherService):
                 },
                 "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
             }
-            post_response = requests.post(f"{self.api_url}ugcPosts", headers=headers, json=post_data)
+            post_response = await self.transport.post(f"{self.api_url}ugcPosts", headers=headers, json=post_data)
             post_response.raise_for_status()
             self.logger.info(f"Image post successful for user {user_urn}")
             return post_response.json()
@@ -120,95 +125,71 @@ class LinkedInPublisherService(BasePublisherService):
             self.logger.error(f"Content validation failed for image post: {e}")
             raise e
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request failed during image post for user {user_urn}: {e}")
-            raise Exception(f"Failed to post image on LinkedIn: {e}")
+            self.logger.error(f"Request failed during image post for user {user_id}: {e}")
+            raise PublishError(f"Failed to post image on LinkedIn: {e}") from e
 
-    def post_video(self, user_id, content, video_path):
+    async def post_video(self, user_id, content, video_path):
         """Post a video to LinkedIn."""
         try:
             # Step 1: Retrieve Access Token and User URN
-            access_token = self.oauth_helper.get_token(user_id).get('access_token')
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
+            token_data = await self.oauth_helper.get_token_async(user_id)
             if not access_token:
                 raise ValueError("Access token not found")
-            user_urn = self.oauth_helper.get_user_urn(access_token)  # Use the get_user_urn method
+            user_urn = await self.oauth_helper.get_user_urn_async(access_token, token_data)
             self.logger.info(f"Attempting to post video for user {user_urn}")
 
             # Step 2: Validate Input
             self.validator.validate_video(video_path)
             self.validator.validate_text(content)
-            headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+            # Step 3: Upload the Video in parts and finalize it
+            video_urn = await self.uploader.upload(access_token, f"urn:li:person:{user_urn}", video_path)
+            self.logger.info(f"Video upload successful: {video_urn}")
 
-            # Step 3: Register Video for Upload
-            register_data = {
-                "registerUploadRequest": {
-                    "owner": f"urn:li:person:{user_urn}",
-                    "recipes": ["urn:li:digitalmediaRecipe:feedshare-video"],
-                    "serviceRelationships": [
-                        {"identifier": "urn:li:userGeneratedContent", "relationshipType": "OWNER"}
-                    ]
-                }
+            # Step 4: Publish the Post with Video
+            headers = {
+                'Authorization': f'Bearer {access_token}',
+                'LinkedIn-Version': LINKEDIN_VERSION,
+                'X-Restli-Protocol-Version': '2.0.0',
+                'Content-Type': 'application/json'
             }
-            register_response = requests.post(
-                f"{self.api_url}assets?action=registerUpload", headers=headers, json=register_data
-            )
-            register_response.raise_for_status()
-            register_result = register_response.json()
-
-            # Extract Upload URL and Asset ID
-            upload_url = register_result['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
-            asset = register_result['value']['asset']
-            self.logger.debug(f"Video registered for upload. Asset: {asset}, Upload URL: {upload_url}")
-
-            # Step 4: Upload the Video
-            with open(video_path, 'rb') as video_file:
-                upload_headers = {'Authorization': headers['Authorization'], 'Content-Type': 'video/mp4'}
-                upload_response = requests.put(upload_url, headers=upload_headers, data=video_file)
-                upload_response.raise_for_status()
-
-            if upload_response.status_code != 201:
-                self.logger.error(f"Video upload failed with status {upload_response.status_code}")
-                raise Exception("Video upload failed")
-
-            self.logger.info(f"Video upload successful for asset: {asset}")
-
-            # Step 5: Publish the Post with Video
-            post_data = {
+            post_body = {
                 "author": f"urn:li:person:{user_urn}",
-                "lifecycleState": "PUBLISHED",
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {"text": content},
-                        "shareMediaCategory": "VIDEO",
-                        "media": [
-                            {
-                                "status": "READY",
-                                "description": {"text": content},
-                                "media": asset,
-                                "title": {"text": "Uploaded Video"}
-                            }
-                        ]
+                "commentary": content,
+                "visibility": "PUBLIC",
+                "distribution": {
+                    "feedDistribution": "MAIN_FEED",
+                    "targetEntities": [],
+                    "thirdPartyDistributionChannels": []
+                },
+                "content": {
+                    "media": {
+                        "title": "Uploaded Video",
+                        "id": video_urn
                     }
                 },
-                "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
+                "lifecycleState": "PUBLISHED",
+                "isReshareDisabledByAuthor": False
             }
-            post_response = requests.post(
-                f"{self.api_url}ugcPosts", headers=headers, json=post_data
+            post_response = await self.transport.post(
+                "https://api.linkedin.com/rest/posts", headers=headers, json=post_body
             )
             post_response.raise_for_status()
-            self.logger.info(f"Video post published successfully for user {user_urn}")
-            return post_response.json()
+            post_id = post_response.headers.get('x-restli-id')
+            self.logger.info(f"Video post published successfully for user {user_urn}. Post ID: {post_id}")
+            return {"post_id": post_id}
 
         except ContentValidationError as e:
             self.logger.error(f"Content validation failed for video post: {e}")
             raise e
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request failed during video post for user {user_urn}: {e}")
-            raise Exception(f"Failed to post video on LinkedIn: {e}")
+            self.logger.error(f"Request failed during video post for user {user_id}: {e}")
+            raise PublishError(f"Failed to post video on LinkedIn: {e}") from e
         except Exception as e:
             self.logger.error(f"Unexpected error during video post: {e}")
             raise
 
-    def post_document(self, user_id, commentary, document_path):
+    async def post_document(self, user_id, commentary, document_path):
         """Posts a document on LinkedIn.
 
         Args:
@@ -226,12 +207,13 @@ class LinkedInPublisherService(BasePublisherService):
         """
         try:
             # Step 1: Retrieve Access Token
-            access_token = self.oauth_helper.get_token(user_id).get('access_token')
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
+            token_data = await self.oauth_helper.get_token_async(user_id)
             if not access_token:
                 raise ValueError("Access token not found.")
             self.logger.info(f"Access token retrieved for user {user_id}")
 
-            user_urn = self.oauth_helper.get_user_urn(access_token)
+            user_urn = await self.oauth_helper.get_user_urn_async(access_token, token_data)
             if not user_urn:
                 raise ValueError("User URN not found.")
             self.logger.info(f"Attempting to post document for user {user_urn}")
@@ -255,7 +237,7 @@ class LinkedInPublisherService(BasePublisherService):
                     "owner": f"urn:li:person:{user_urn}"
                 }
             }
-            initialize_response = requests.post(
+            initialize_response = await self.transport.post(
                 f"https://api.linkedin.com/rest/documents?action=initializeUpload",
                 headers=headers, json=initialize_upload_body
             )
@@ -271,7 +253,7 @@ class LinkedInPublisherService(BasePublisherService):
             # Step 4: Upload the Document
             with open(document_path, 'rb') as document_file:
                 upload_headers = {'Authorization': f'Bearer {access_token}'}
-                upload_response = requests.put(upload_url, headers=upload_headers, data=document_file)
+                upload_response = await self.transport.put(upload_url, headers=upload_headers, data=document_file)
                 upload_response.raise_for_status()
 
             self.logger.info(f"Document uploaded successfully. Document ID: {document_id}")
@@ -295,7 +277,7 @@ class LinkedInPublisherService(BasePublisherService):
                 "lifecycleState": "PUBLISHED",
                 "isReshareDisabledByAuthor": False
             }
-            post_response = requests.post(
+            post_response = await self.transport.post(
                 f"https://api.linkedin.com/rest/posts",
                 headers=headers, json=post_body
             )
@@ -317,7 +299,34 @@ class LinkedInPublisherService(BasePublisherService):
 
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request error during document post: {e}")
-            raise Exception(f"Failed to post document on LinkedIn: {e}")
+            raise PublishError(f"Failed to post document on LinkedIn: {e}") from e
         except Exception as e:
             self.logger.error(f"Unexpected error during document post: {e}")
             raise
+
+
+class LinkedInPublisherService(BasePublisherService):
+    """Blocking facade over AsyncLinkedInPublisherService; sends through `async_transport`."""
+
+    def __init__(self, oauth_helper: LinkedInOAuthHelper, async_transport=None, uploader=None):
+        self.oauth_helper = oauth_helper
+        self.async_service = AsyncLinkedInPublisherService(oauth_helper, transport=async_transport, uploader=uploader)
+        self.api_url = self.async_service.api_url
+        self.validator = self.async_service.validator
+        self.logger = self.async_service.logger
+
+    def post_text(self, user_id, content):
+        """Post a text message to LinkedIn."""
+        return run_sync(self.async_service.post_text(user_id, content))
+
+    def post_image(self, user_id, content, image_path):
+        """Post an image to LinkedIn."""
+        return run_sync(self.async_service.post_image(user_id, content, image_path))
+
+    def post_video(self, user_id, content, video_path):
+        """Post a video to LinkedIn."""
+        return run_sync(self.async_service.post_video(user_id, content, video_path))
+
+    def post_document(self, user_id, commentary, document_path):
+        """Posts a document on LinkedIn."""
+        return run_sync(self.async_service.post_document(user_id, commentary, document_path))
@@ -1,72 +1,109 @@
-from datetime import time
 import requests
+from requests_oauthlib import OAuth1
 from decafluence.oauth_helpers.x_oauth_helper import XOAuthHelper
-from decafluence.publisher_services.base_publisher import BasePublisherService
-import uuid
+from decafluence.publisher_services.base_publisher import AsyncBasePublisherService, BasePublisherService, PublishError, run_sync
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.uploads.x_chunked_upload import XChunkedUploader
 
 from decafluence.validators.content_validators import ContentValidationError, ContentValidator
 
-class XPublisherService(BasePublisherService):
-    def __init__(self, oauth_helper: XOAuthHelper):
+class AsyncXPublisherService(AsyncBasePublisherService):
+    supported_media_types = frozenset({'text', 'image', 'video'})
+
+    def __init__(self, oauth_helper: XOAuthHelper, transport=None, uploader=None):
         self.oauth_helper = oauth_helper
+        self.transport = transport or get_default_async_transport()
         self.api_url = 'https://api.twitter.com/1.1/'
         self.validator = ContentValidator(platform='x')
+        self.uploader = uploader or XChunkedUploader(self.transport)
 
-    def _get_auth_header(self, user_id):
-        access_token, access_token_secret = self.oauth_helper.refresh_token(user_id)
-        return {
-            'Authorization': f'OAuth oauth_consumer_key="{self.oauth_helper.client_key}", '
-                             f'oauth_token="{access_token}", '
-                             f'oauth_signature_method="HMAC-SHA1", '
-                             f'oauth_timestamp="{int(time.time())}", '
-                             f'oauth_nonce="{uuid.uuid4()}", '
-                             f'oauth_version="1.0", '
-                             f'oauth_signature="{self._generate_signature(user_id, access_token)}"'
-        }
+    async def _get_auth_header(self, user_id, method, url, params=None, data=None):
+        """Build the OAuth 1.0a Authorization header for one request, signed with HMAC-SHA1."""
+        access_token, access_token_secret = await self.oauth_helper.refresh_token_async(user_id)
+        return self._sign(access_token, access_token_secret, method, url, params=params, data=data)
 
-    def _generate_signature(self, user_id, access_token):
-        # This method will create the OAuth signature required for the request
-        # You will need to implement this according to Twitter's requirements.
-        # It requires creating a base string and signing it using HMAC-SHA1.
-        pass  # Implement signature generation logic here
+    def _sign(self, access_token, access_token_secret, method, url, params=None, data=None):
+        # Signed the same way as XOAuthHelper's OAuth1Session requests
+        auth = OAuth1(self.oauth_helper.client_key, client_secret=self.oauth_helper.client_secret,
+                      resource_owner_key=access_token, resource_owner_secret=access_token_secret)
+        request = auth(requests.Request(method, url, params=params, data=data).prepare())
+        return {'Authorization': requests.utils.to_native_string(request.headers['Authorization'])}
 
-    def post_text(self, user_id, content):
+    async def post_text(self, user_id, content):
         try:
             self.validator.validate_text(content)
-            headers = self._get_auth_header(user_id)
+            url = f"{self.api_url}statuses/update.json"
             data = {
                 "status": content
             }
-            response = requests.post(f"{self.api_url}statuses/update.json", headers=headers, data=data)
+            headers = await self._get_auth_header(user_id, 'POST', url, data=data)
+            response = await self.transport.post(url, headers=headers, data=data)
             return response.json()
         except ContentValidationError as e:
             raise e  # Reraise the validation error
         except requests.HTTPError as e:
-            raise Exception(f"Failed to post text on X: {str(e)}")
+            raise PublishError(f"Failed to post text on X: {str(e)}") from e
 
-    def post_image(self, user_id, content, image_path):
+    async def post_image(self, user_id, content, image_path):
         try:
             self.validator.validate_image(image_path)  # Validate image
             self.validator.validate_text(content)
-            headers = self._get_auth_header(user_id)
-
-            image_data = {'media': open(image_path, 'rb')}
-            upload_response = requests.post(f"{self.api_url}media/upload.json", headers=headers, files=image_data)
-            media_id = upload_response.json().get('media_id_string')
+            media_id = await self._upload_media(user_id, image_path)
+            return await self._post_with_media(user_id, content, media_id)
+        except ContentValidationError as e:
+            raise e  # Reraise the validation error
+        except requests.HTTPError as e:
+            raise PublishError(f"Failed to post image on X: {str(e)}") from e
 
-            tweet_data = {
-                "status": content,
-                "media_ids": media_id
-            }
-            response = requests.post(f"{self.api_url}statuses/update.json", headers=headers, data=tweet_data)
-            return response.json()
+    async def post_video(self, user_id, content, video_path):
+        try:
+            self.validator.validate_video(video_path)  # Validate video
+            self.validator.validate_text(content)
+            media_id = await self._upload_media(user_id, video_path)
+            return await self._post_with_media(user_id, content, media_id)
         except ContentValidationError as e:
             raise e  # Reraise the validation error
         except requests.HTTPError as e:
-            raise Exception(f"Failed to post text on X: {str(e)}")
+            raise PublishError(f"Failed to post video on X: {str(e)}") from e
+
+    async def _upload_media(self, user_id, media_path):
+        """Upload media with the chunked INIT/APPEND/FINALIZE flow and return its media id."""
+        # Every upload request needs its own OAuth nonce and timestamp
+        return await self.uploader.upload(
+            media_path, lambda method, url, **request: self._get_auth_header(user_id, method, url, **request)
+        )
+
+    async def _post_with_media(self, user_id, content, media_id):
+        url = f"{self.api_url}statuses/update.json"
+        tweet_data = {
+            "status": content,
+            "media_ids": media_id
+        }
+        headers = await self._get_auth_header(user_id, 'POST', url, data=tweet_data)
+        response = await self.transport.post(url, headers=headers, data=tweet_data)
+        return response.json()
+
+    async def post_document(self, user_id, content, document_path):
+        raise NotImplementedError("Twitter does not allow document uploads directly.")
+
+
+class XPublisherService(BasePublisherService):
+    """Blocking facade over AsyncXPublisherService; sends through `async_transport`."""
+
+    def __init__(self, oauth_helper: XOAuthHelper, async_transport=None, uploader=None):
+        self.oauth_helper = oauth_helper
+        self.async_service = AsyncXPublisherService(oauth_helper, transport=async_transport, uploader=uploader)
+        self.api_url = self.async_service.api_url
+        self.validator = self.async_service.validator
+
+    def post_text(self, user_id, content):
+        return run_sync(self.async_service.post_text(user_id, content))
+
+    def post_image(self, user_id, content, image_path):
+        return run_sync(self.async_service.post_image(user_id, content, image_path))
 
     def post_video(self, user_id, content, video_path):
-        raise NotImplementedError("Video uploads are complex and require chunked uploads.")
+        return run_sync(self.async_service.post_video(user_id, content, video_path))
 
     def post_document(self, user_id, content, document_path):
-        raise NotImplementedError("Twitter does not allow document uploads directly.")
+        return run_sync(self.async_service.post_document(user_id, content, document_path))
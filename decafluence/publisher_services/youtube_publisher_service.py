@@ -1,50 +1,62 @@
 import os
 import requests
 from decafluence.oauth_helpers.youtube_oauth_helper import YouTubeOAuthHelper
-from decafluence.publisher_services.base_publisher import BasePublisherService
+from decafluence.publisher_services.base_publisher import AsyncBasePublisherService, BasePublisherService, PublishError, run_sync
+from decafluence.transport.async_http_transport import get_default_async_transport
+from decafluence.uploads.session_store import UploadSessionStore, upload_session_directory
+from decafluence.uploads.youtube_resumable_upload import SESSION_MAX_AGE_SECONDS, YouTubeResumableUploader
 from decafluence.validators.content_validators import ContentValidationError, ContentValidator
 
-class YouTubePublisherService(BasePublisherService):
-    def __init__(self, oauth_helper: YouTubeOAuthHelper):
+class AsyncYouTubePublisherService(AsyncBasePublisherService):
+    supported_media_types = frozenset({'video'})
+
+    def __init__(self, oauth_helper: YouTubeOAuthHelper, transport=None, uploader=None, upload_session_dir=None):
         self.oauth_helper = oauth_helper
+        self.transport = transport or get_default_async_transport()
         self.api_url = 'https://www.googleapis.com/upload/youtube/v3/videos'
+        # Upload sessions are kept on disk so a restarted worker resumes instead of re-sending the video
+        self.uploader = uploader or YouTubeResumableUploader(
+            self.transport, upload_url=self.api_url,
+            session_store=UploadSessionStore(upload_session_directory(upload_session_dir),
+                                             max_age=SESSION_MAX_AGE_SECONDS),
+        )
         self.validator = ContentValidator(platform='youtube')
 
-    def _get_auth_header(self, user_id):
+    async def _get_auth_header(self, user_id):
         """Get the authorization header to interact with YouTube API."""
-        access_token = self.oauth_helper.refresh_token(user_id)
+        access_token = await self.oauth_helper.refresh_token_async(user_id)
         return {'Authorization': f'Bearer {access_token}'}
 
-    def post_text(self, user_id, content):
+    async def post_text(self, user_id, content):
         """Posting text-only content is not directly supported by YouTube."""
         raise NotImplementedError("YouTube does not support text-only posts. Please use videos or other media.")
 
-    def post_image(self, user_id, content, image_path):
+    async def post_image(self, user_id, content, image_path):
         """YouTube does not support direct image posts, so this is not implemented."""
         raise NotImplementedError("YouTube does not support direct image uploads. Please use videos.")
 
-    def post_video(self, user_id, content, video_path):
+    async def post_video(self, user_id, content, video_path):
         """Post a video to YouTube."""
         try:
             self.validator.validate_video(video_path)  # Validate the video
             self.validator.validate_text(content)  # Validate the content
-            access_token = self.oauth_helper.refresh_token(user_id)
+            access_token = await self.oauth_helper.refresh_token_async(user_id)
 
             # Step 1: Upload the video
-            video_url = self._upload_video(access_token, video_path, content)
+            video_url = await self._upload_video(access_token, video_path, content)
 
             # Step 2: Return the response from the YouTube API
             return video_url  # The URL or details of the uploaded video
         except ContentValidationError as e:
             raise e  # Reraise the validation error
         except requests.HTTPError as e:
-            raise Exception(f"Failed to post video on YouTube: {str(e)}")
+            raise PublishError(f"Failed to post video on YouTube: {str(e)}") from e
 
-    def post_document(self, user_id, content, document_path):
+    async def post_document(self, user_id, content, document_path):
         """YouTube does not support document uploads."""
         raise NotImplementedError("YouTube does not allow document uploads directly.")
 
-    def _upload_video(self, access_token, video_path, title):
+    async def _upload_video(self, access_token, video_path, title):
         """Upload a video to YouTube."""
         video_metadata = {
             'snippet': {
@@ -57,17 +69,33 @@ class YouTubePublisherService(BasePublisherService):
             }
         }
 
-        headers = self._get_auth_header(user_id)
+        # Upload the video file in resumable chunks; an interrupted upload continues where it stopped
+        return await self.uploader.upload(access_token, video_path, video_metadata)  # Return the video details
 
-        # Upload the video file
-        with open(video_path, 'rb') as video_file:
-            files = {
-                'media': video_file,
-                'metadata': (None, str(video_metadata), 'application/json')
-            }
 
-            response = requests.post(self.api_url, headers=headers, files=files)
-            if response.status_code != 200:
-                raise Exception(f"Failed to upload video: {response.text}")
-            
-            return response.json()  # Return the response (video details)
+class YouTubePublisherService(BasePublisherService):
+    """Blocking facade over AsyncYouTubePublisherService; sends through `async_transport`."""
+
+    def __init__(self, oauth_helper: YouTubeOAuthHelper, async_transport=None, uploader=None,
+                 upload_session_dir=None):
+        self.oauth_helper = oauth_helper
+        self.async_service = AsyncYouTubePublisherService(oauth_helper, transport=async_transport, uploader=uploader,
+                                                          upload_session_dir=upload_session_dir)
+        self.api_url = self.async_service.api_url
+        self.validator = self.async_service.validator
+
+    def post_text(self, user_id, content):
+        """Posting text-only content is not directly supported by YouTube."""
+        return run_sync(self.async_service.post_text(user_id, content))
+
+    def post_image(self, user_id, content, image_path):
+        """YouTube does not support direct image posts, so this is not implemented."""
+        return run_sync(self.async_service.post_image(user_id, content, image_path))
+
+    def post_video(self, user_id, content, video_path):
+        """Post a video to YouTube."""
+        return run_sync(self.async_service.post_video(user_id, content, video_path))
+
+    def post_document(self, user_id, content, document_path):
+        """YouTube does not support document uploads."""
+        return run_sync(self.async_service.post_document(user_id, content, document_path))
@@ -0,0 +1,193 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from gcp_config import get_storage_client
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+RESUMABLE_CHUNK_GRANULARITY = 256 * 1024  # GCS requires resumable chunks in multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = int(os.getenv('GCS_UPLOAD_CHUNK_SIZE', 32 * RESUMABLE_CHUNK_GRANULARITY))  # 8 MiB
+DEFAULT_PARALLEL_THRESHOLD = int(os.getenv('GCS_PARALLEL_UPLOAD_THRESHOLD', 256 * 1024 * 1024))
+DEFAULT_PARALLEL_CHUNK_SIZE = 32 * 1024 * 1024
+DEFAULT_PARALLEL_WORKERS = 8
+DEFAULT_SIGNED_URL_TTL = timedelta(hours=2)  # Long enough for Instagram to fetch and process a reel
+SIGNING_SCOPES = ('https://www.googleapis.com/auth/cloud-platform',)
+MAX_BATCH_SIZE = 100  # Calls per GCS JSON batch request
+
+
+class GCSStagingBackend:
+    """
+    Process-wide access to the staging bucket.
+
+    Holds one storage client and bucket handle for the life of the process, both created on
+    first use; the handle is built with `client.bucket()`, which makes no RPC, instead of
+    `get_bucket()`. Staged media is
+    served through short-lived V4 signed URLs, so no per-object ACL change is needed. URLs are
+    signed locally with a service-account key, or otherwise through the IAM signBlob API as
+    `signer_email` (default: the credentials' own service account, as on Cloud Run); user
+    credentials such as `gcloud auth application-default login` need `signer_email` set to a
+    service account they may impersonate. Uploads use resumable `chunk_size` chunks, and files of `parallel_threshold` bytes
+    or more are split and uploaded concurrently.
+    """
+
+    def __init__(self, bucket_name=None, client=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 parallel_threshold=DEFAULT_PARALLEL_THRESHOLD, parallel_chunk_size=DEFAULT_PARALLEL_CHUNK_SIZE,
+                 parallel_workers=DEFAULT_PARALLEL_WORKERS, signed_url_ttl=DEFAULT_SIGNED_URL_TTL,
+                 credentials=None, signer_email=None):
+        if chunk_size % RESUMABLE_CHUNK_GRANULARITY:
+            raise ValueError(f"chunk_size must be a multiple of {RESUMABLE_CHUNK_GRANULARITY} bytes.")
+        self.bucket_name = bucket_name or os.getenv('GCP_BUCKET_NAME')
+        if not self.bucket_name:
+            raise ValueError("GCP_BUCKET_NAME environment variable is not set.")
+        self._client = client
+        self._bucket = None
+        self._lock = threading.Lock()
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.parallel_chunk_size = parallel_chunk_size
+        self.parallel_workers = parallel_workers
+        self.signed_url_ttl = signed_url_ttl
+        self._credentials = credentials
+        self.signer_email = signer_email or os.getenv('GCS_SIGNER_EMAIL')
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = get_storage_client()
+        return self._client
+
+    @property
+    def credentials(self):
+        """Credentials used to sign URLs: the ones given, else Application Default Credentials."""
+        if self._credentials is None:
+            import google.auth
+
+            with self._lock:
+                if self._credentials is None:
+                    self._credentials, _ = google.auth.default(scopes=SIGNING_SCOPES)
+        return self._credentials
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            self._bucket = self.client.bucket(self.bucket_name)
+        return self._bucket
+
+    def upload(self, file_path, blob_name, content_type=None):
+        """Upload a local file to blob_name, in parallel parts when it is large."""
+        from google.cloud.storage import transfer_manager
+
+        blob = self.bucket.blob(blob_name, chunk_size=self.chunk_size)
+        blob.custom_time = datetime.now(timezone.utc)  # Last-used marker for the staging janitor
+        if os.path.getsize(file_path) >= self.parallel_threshold:
+            transfer_manager.upload_chunks_concurrently(
+                file_path, blob, content_type=content_type, chunk_size=self.parallel_chunk_size,
+                worker_type=transfer_manager.THREAD, max_workers=self.parallel_workers
+            )
+        else:
+            blob.upload_from_filename(file_path, content_type=content_type)
+
+    def signed_url(self, blob_name):
+        """Return a V4 signed GET URL for blob_name, valid for signed_url_ttl."""
+        import google.auth.transport.requests
+        from google.auth.credentials import Signing
+
+        blob = self.bucket.blob(blob_name)
+        credentials = self.credentials
+        if isinstance(credentials, Signing) and not self.signer_email:
+            # Service-account key: signed locally without any network call
+            return blob.generate_signed_url(
+                version='v4', expiration=self.signed_url_ttl, method='GET', credentials=credentials
+            )
+
+        # Token-only credentials sign through the IAM signBlob API as a service account
+        with self._lock:
+            if not credentials.valid:
+                credentials.refresh(google.auth.transport.requests.Request())
+            access_token = credentials.token
+        signer_email = self.signer_email or getattr(credentials, 'service_account_email', None)
+        if not signer_email or signer_email == 'default':
+            raise ValueError(
+                f"Cannot sign staging URLs with {type(credentials).__name__} credentials: set GCS_SIGNER_EMAIL to a "
+                "service account these credentials may sign as (roles/iam.serviceAccountTokenCreator)."
+            )
+        return blob.generate_signed_url(
+            version='v4', expiration=self.signed_url_ttl, method='GET',
+            service_account_email=signer_email, access_token=access_token
+        )
+
+    def touch(self, blob_name):
+        """
+        Move blob_name's custom time to now, marking it as recently used. Returns False if the
+        blob does not exist.
+        """
+        from google.api_core.exceptions import NotFound
+
+        blob = self.bucket.blob(blob_name)
+        blob.custom_time = datetime.now(timezone.utc)
+        try:
+            blob.patch()
+        except NotFound:
+            return False
+        return True
+
+    def list_staged(self, prefix):
+        """Yield (blob name, last used) for every blob under prefix."""
+        blobs = self.client.list_blobs(
+            self.bucket, prefix=prefix, fields='items(name,timeCreated,customTime),nextPageToken'
+        )
+        for blob in blobs:
+            yield blob.name, blob.custom_time or blob.time_created
+
+    def delete(self, blob_name):
+        """Delete blob_name; a blob that is already gone counts as deleted."""
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(blob_name).delete()
+        except NotFound:
+            pass
+
+    def delete_many(self, blob_names):
+        """
+        Delete blobs with GCS batch requests of up to MAX_BATCH_SIZE calls each; a batch that
+        fails is redone blob by blob to find out which deletes failed. Returns the names that
+        could not be deleted; blobs that are already gone count as deleted.
+        """
+        failed = []
+        for i in range(0, len(blob_names), MAX_BATCH_SIZE):
+            chunk = blob_names[i:i + MAX_BATCH_SIZE]
+            try:
+                with self.client.batch():
+                    for name in chunk:
+                        self.bucket.delete_blob(name)
+                continue
+            except Exception as e:
+                # The batch reports only that something failed; find out which blobs one by one
+                logger.warning(f"Batch delete of {len(chunk)} staged blobs failed ({e}); retrying individually")
+            for name in chunk:
+                try:
+                    self.delete(name)
+                except Exception as e:
+                    logger.warning(f"Could not delete staged blob {name}: {e}")
+                    failed.append(name)
+        return failed
+
+
+_default_staging_backend = None
+_default_staging_backend_lock = threading.Lock()
+
+
+def get_default_staging_backend():
+    """Return the process-wide staging backend, creating the storage client on first use."""
+    global _default_staging_backend
+    if _default_staging_backend is None:
+        with _default_staging_backend_lock:
+            if _default_staging_backend is None:
+                _default_staging_backend = GCSStagingBackend()
+    return _default_staging_backend
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_SWEEP_INTERVAL_SECONDS = 3600
+DEFAULT_SWEEP_TTL_SECONDS = 48 * 3600  # Orphans untouched for this long are swept
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY_SECONDS = 5
+
+
+class StagingJanitor:
+    """
+    Background thread that deletes staged media off the publish path.
+
+    Every `interval` seconds it claims the blobs whose reuse TTL has expired in the staging
+    cache and deletes them with batched requests, retrying failed deletes with backoff. Every
+    `sweep_interval` seconds it also lists the staging prefix and deletes blobs that have not
+    been used for `sweep_ttl` seconds and are not referenced by any pending publish in this
+    process, such as blobs left behind by a crashed worker.
+    """
+
+    def __init__(self, cache, interval=DEFAULT_INTERVAL_SECONDS, sweep_interval=DEFAULT_SWEEP_INTERVAL_SECONDS,
+                 sweep_ttl=DEFAULT_SWEEP_TTL_SECONDS, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY_SECONDS):
+        self.cache = cache
+        self.backend = cache.backend
+        self.interval = interval
+        self.sweep_interval = sweep_interval
+        self.sweep_ttl = sweep_ttl
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._next_sweep = time.time() + sweep_interval
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="staging-janitor", daemon=True)
+        self._thread.start()
+        logger.info("StagingJanitor started")
+
+    def stop(self, wait=True):
+        self._stopped.set()
+        self._wakeup.set()
+        if wait and self._thread:
+            self._thread.join()
+        logger.info("StagingJanitor stopped")
+
+    def wake(self):
+        """Run a cleanup pass now instead of at the next interval."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"StagingJanitor pass failed: {e}")
+            self._wakeup.wait(timeout=self.interval)
+            self._wakeup.clear()
+
+    def run_once(self, now=None):
+        """Delete expired blobs, and sweep for orphans when a sweep is due; returns the deleted names."""
+        now = now if now is not None else time.time()
+        deleted = self._delete(self.cache.collect_expired(now))
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            deleted += self.sweep(now)
+        return deleted
+
+    def sweep(self, now=None):
+        """Delete blobs under the staging prefix that are unused past sweep_ttl and not referenced here."""
+        now = now if now is not None else time.time()
+        cutoff = datetime.fromtimestamp(now, timezone.utc) - timedelta(seconds=self.sweep_ttl)
+        stale = [name for name, last_used in self.backend.list_staged(self.cache.prefix)
+                 if last_used is not None and last_used <= cutoff]
+        deleted = self._delete(self.cache.claim_untracked(stale))
+        if deleted:
+            logger.info(f"StagingJanitor swept {len(deleted)} orphaned blobs")
+        return deleted
+
+    def _delete(self, blob_names):
+        """Batch-delete claimed blobs with retries, then release the claims."""
+        if not blob_names:
+            return []
+        pending = list(blob_names)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    pending = self.backend.delete_many(pending)
+                except Exception as e:
+                    logger.warning(f"StagingJanitor delete failed: {e}")
+                if not pending or attempt == self.max_retries or self._stopped.is_set():
+                    break
+                time.sleep(self.retry_delay * 2 ** attempt)
+        finally:
+            self.cache.finish_delete(blob_names)
+        if pending:
+            # Left for a later sweep once they pass sweep_ttl
+            logger.error(f"StagingJanitor could not delete {len(pending)} blobs: {pending[:5]}")
+        failed = set(pending)
+        return [name for name in blob_names if name not in failed]
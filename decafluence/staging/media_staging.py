@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+
+from decafluence.staging.gcs_backend import get_default_staging_backend
+from decafluence.staging.janitor import StagingJanitor
+from decafluence.uploads.session_store import file_fingerprint
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_PREFIX = 'instagram-media/'
+DEFAULT_REUSE_TTL_SECONDS = 24 * 3600  # Keep unreferenced blobs this long for re-posts
+TOUCH_INTERVAL_SECONDS = 3600  # Refresh a reused blob's custom time at most this often
+HASH_BLOCK_SIZE = 1024 * 1024
+MAX_HASH_MEMO_ENTRIES = 4096
+
+
+def is_remote_url(media):
+    """Return True for inputs that are already reachable URLs and need no staging."""
+    return isinstance(media, str) and media.startswith(('http://', 'https://'))
+
+
+class _StagedBlob:
+    __slots__ = ('refs', 'released_at', 'touched_at')
+
+    def __init__(self):
+        self.refs = 0
+        self.released_at = None
+        self.touched_at = time.time()
+
+
+class MediaStagingCache:
+    """
+    Content-addressed staging of local media in the GCS staging bucket.
+
+    Blobs are named after the SHA-256 of their content, so re-posting the same asset reuses
+    the blob already in the bucket instead of uploading it again, and two different files
+    with the same basename can never overwrite each other. Concurrent stages of the same
+    content share one upload. Each `stage()` takes a reference that `release()` drops; once a
+    blob is unreferenced and has gone `ttl` seconds without being reused, the StagingJanitor
+    claims it through `collect_expired()` and deletes it in the background (or `purge_expired()`
+    deletes it inline). The janitor starts with the first local stage(); call `start_janitor()`
+    before that to start it with other options.
+    Inputs that are already http(s) URLs are passed through untouched. Every stage returns a
+    freshly signed URL, so reused blobs never hand out an expired link.
+
+    Reference counts only cover this process. Across workers, the guarantee comes from the
+    blob's custom time: before a URL is returned, the blob's custom time has been moved to
+    within TOUCH_INTERVAL_SECONDS of now (re-uploading it if another worker deleted it), and
+    janitor sweeps only delete blobs unused for `sweep_ttl`, which must exceed `ttl` plus
+    TOUCH_INTERVAL_SECONDS plus the longest publish.
+    """
+
+    def __init__(self, backend=None, prefix=DEFAULT_PREFIX, ttl=DEFAULT_REUSE_TTL_SECONDS):
+        self.backend = backend or get_default_staging_backend()
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # blob name -> _StagedBlob
+        self._urls = {}  # issued url -> (blob name, times issued), until released
+        self._busy = {}  # blob name -> Event set when its upload or delete finishes
+        self._hashes = {}  # (path, size, mtime_ns) -> sha256 hex digest
+        self._stats = {'uploaded': 0, 'reused': 0, 'bytes_uploaded': 0, 'bytes_reused': 0}
+        self._janitor = None
+
+    def start_janitor(self, **options):
+        """
+        Start the StagingJanitor that deletes this cache's expired and orphaned blobs in the
+        background, creating it with `options` on the first call; returns the janitor.
+        """
+        with self._lock:
+            if self._janitor is None:
+                janitor = StagingJanitor(self, **options)
+                if janitor.sweep_ttl <= self.ttl + TOUCH_INTERVAL_SECONDS:
+                    raise ValueError("sweep_ttl must exceed the reuse ttl plus TOUCH_INTERVAL_SECONDS, or sweeps "
+                                     "could delete blobs other workers are still using.")
+                self._janitor = janitor
+        self._janitor.start()
+        return self._janitor
+
+    def stats(self):
+        """Counts of uploaded vs. reused blobs and bytes since start-up."""
+        with self._lock:
+            return dict(self._stats)
+
+    def content_hash(self, file_path):
+        """SHA-256 of a file, memoized by path, size and mtime."""
+        fingerprint = file_fingerprint(file_path)
+        key = (fingerprint['path'], fingerprint['size'], fingerprint['mtime_ns'])
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest:
+            return digest
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as media_file:
+            for block in iter(lambda: media_file.read(HASH_BLOCK_SIZE), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        with self._lock:
+            if len(self._hashes) >= MAX_HASH_MEMO_ENTRIES:
+                self._hashes.pop(next(iter(self._hashes)))
+            self._hashes[key] = digest
+        return digest
+
+    def blob_name(self, file_path):
+        extension = os.path.splitext(file_path)[1].lower()
+        return f"{self.prefix}{self.content_hash(file_path)}{extension}"
+
+    def stage(self, media):
+        """Return a URL Instagram can fetch `media` from, uploading it only if needed."""
+        if is_remote_url(media):
+            return media
+        if not isinstance(media, str):
+            raise ValueError("Invalid media file. Expected a file path or URL (string).")
+        if self._janitor is None:
+            self.start_janitor()  # Anything staged from here on must be cleaned up
+
+        blob_name = self.blob_name(media)
+        touch = False
+        while True:
+            with self._lock:
+                entry = self._entries.get(blob_name)
+                busy = self._busy.get(blob_name)
+                if entry is not None and busy is None:
+                    entry.refs += 1
+                    entry.released_at = None
+                    self._stats['reused'] += 1
+                    self._stats['bytes_reused'] += os.path.getsize(media)
+                    if time.time() - entry.touched_at >= TOUCH_INTERVAL_SECONDS:
+                        entry.touched_at = time.time()
+                        touch = True
+                    break
+                if busy is None:
+                    busy = self._busy[blob_name] = threading.Event()
+                    entry = None
+                    break
+            # Another thread is uploading or deleting this content; wait, then re-check
+            busy.wait()
+
+        if touch:
+            try:
+                self._ensure_staged(media, blob_name)
+            except Exception:
+                self._drop_reference(blob_name)
+                raise
+        if entry is None:
+            try:
+                # Staged by an earlier run or another worker, or not at all; the name guarantees identical content
+                reused = self._ensure_staged(media, blob_name)
+                with self._lock:
+                    entry = self._entries[blob_name] = _StagedBlob()
+                    entry.refs = 1
+                    kind = 'reused' if reused else 'uploaded'
+                    self._stats[kind] += 1
+                    self._stats[f'bytes_{kind}'] += os.path.getsize(media)
+                if reused:
+                    logger.info(f"Reusing staged media {blob_name}")
+            finally:
+                with self._lock:
+                    self._busy.pop(blob_name).set()
+
+        try:
+            url = self.backend.signed_url(blob_name)
+        except Exception:
+            self._drop_reference(blob_name)
+            raise
+        with self._lock:
+            # Two stages in the same second can be issued the same signed URL
+            _, issued = self._urls.get(url, (blob_name, 0))
+            self._urls[url] = (blob_name, issued + 1)
+        return url
+
+    def _ensure_staged(self, file_path, blob_name):
+        """
+        Mark blob_name as in use, uploading file_path if the bucket no longer holds it, and
+        return True if it was already there. The touch lands before the URL is handed out.
+        """
+        if self.backend.touch(blob_name):
+            return True
+        self.backend.upload(file_path, blob_name, content_type=mimetypes.guess_type(file_path)[0])
+        logger.info(f"Uploaded {os.path.basename(file_path)} to GCP Storage as {blob_name}.")
+        return False
+
+    def release(self, url):
+        """Drop one reference taken by stage(); unknown (passed-through) URLs are ignored."""
+        with self._lock:
+            blob_name, issued = self._urls.get(url, (None, 0))
+            if blob_name is None:
+                return
+            if issued > 1:
+                self._urls[url] = (blob_name, issued - 1)
+            else:
+                del self._urls[url]
+        self._drop_reference(blob_name)
+
+    def _drop_reference(self, blob_name):
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            if entry.refs == 0:
+                entry.released_at = time.time()
+
+    def collect_expired(self, now=None):
+        """
+        Claim unreferenced blobs whose reuse TTL has passed and return their names. They stay
+        claimed, so no stage() can reuse them, until finish_delete() is called.
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [
+                name for name, entry in self._entries.items()
+                if entry.refs == 0 and entry.released_at is not None and entry.released_at + self.ttl <= now
+                and name not in self._busy
+            ]
+            for name in expired:
+                del self._entries[name]
+                self._busy[name] = threading.Event()
+        return expired
+
+    def claim_untracked(self, blob_names):
+        """Claim blobs this process neither references nor is staging; returns the claimed names."""
+        with self._lock:
+            claimed = [name for name in blob_names if name not in self._entries and name not in self._busy]
+            for name in claimed:
+                self._busy[name] = threading.Event()
+        return claimed
+
+    def finish_delete(self, blob_names):
+        """Release the claims taken by collect_expired() or claim_untracked()."""
+        with self._lock:
+            for name in blob_names:
+                busy = self._busy.pop(name, None)
+                if busy is not None:
+                    busy.set()
+
+    def purge_expired(self, now=None):
+        """Delete expired blobs inline; returns the deleted blob names."""
+        expired = self.collect_expired(now)
+        try:
+            failed = set(self.backend.delete_many(expired)) if expired else set()
+        finally:
+            self.finish_delete(expired)
+        return [name for name in expired if name not in failed]
+
+
+_default_staging_cache = None
+_default_staging_cache_lock = threading.Lock()
+
+
+def get_default_staging_cache():
+    """
+    Return the process-wide staging cache. Publishers must share it so reference counts
+    cover every pending post that uses a blob. Its janitor starts with the first local stage().
+    """
+    global _default_staging_cache
+    if _default_staging_cache is None:
+        with _default_staging_cache_lock:
+            if _default_staging_cache is None:
+                _default_staging_cache = MediaStagingCache()
+    return _default_staging_cache
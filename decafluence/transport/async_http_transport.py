@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from decafluence.transport.concurrency_limiter import endpoint_of, get_default_concurrency_limiters
+from decafluence.transport.http_transport import DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT
+from decafluence.transport.quota_tracker import get_default_quota_tracker
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_CONNECTION_LIMIT = 1000  # Total concurrent connections across all hosts
+DEFAULT_KEEPALIVE_TIMEOUT = 60  # Seconds an idle connection stays in the pool
+
+
+class AsyncHttpTransport:
+    """
+    asyncio counterpart of HttpTransport, backed by a pooled aiohttp.ClientSession.
+
+    Responses are returned as fully-read requests.Response objects and client errors are
+    re-raised as requests exceptions, so publisher code keeps using response.json(),
+    raise_for_status() and `except requests.HTTPError` exactly as on the blocking path.
+    Every request is paced by, and every response reported to, the shared QuotaTracker, and
+    waits for a slot from its host's adaptive concurrency limiter.
+    """
+
+    def __init__(self, limit=DEFAULT_CONNECTION_LIMIT, limit_per_host=DEFAULT_POOL_MAXSIZE,
+                 timeout=DEFAULT_TIMEOUT, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT, quota_tracker=None,
+                 concurrency_limiters=None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.quota_tracker = quota_tracker or get_default_quota_tracker()
+        self.concurrency_limiters = concurrency_limiters or get_default_concurrency_limiters()
+        # aiohttp sessions are bound to the loop that created them, so keep one per loop
+        self._sessions = weakref.WeakKeyDictionary()  # loop -> (session, closer)
+        logger.info(f"AsyncHttpTransport initialized (limit={limit}, limit_per_host={limit_per_host})")
+
+    async def _get_session(self):
+        loop = asyncio.get_running_loop()
+        session, _ = self._sessions.get(loop, (None, None))
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+            closer = _close_on_loop_shutdown(session)
+            self._sessions[loop] = (session, closer)
+            await closer.__anext__()
+        return session
+
+    @staticmethod
+    def _client_timeout(timeout):
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=timeout)
+
+    @staticmethod
+    def _build_form(data, files):
+        """Translate requests-style `data` + `files` arguments into an aiohttp multipart form."""
+        form = aiohttp.FormData()
+        for name, value in (data or {}).items():
+            form.add_field(name, str(value))
+        for name, value in files.items():
+            if isinstance(value, tuple):
+                filename, content = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+                form.add_field(name, content, filename=filename, content_type=content_type)
+            else:
+                form.add_field(name, value, filename=os.path.basename(getattr(value, "name", name)))
+        return form
+
+    @staticmethod
+    def _to_response(method, url, status, reason, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = url
+        response._content = body
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+    async def request(self, method, url, params=None, data=None, json=None, files=None, headers=None,
+                      timeout=None, allow_redirects=True):
+        """Send a request through the pooled session and return a requests.Response."""
+        if params:
+            params = {key: str(value) for key, value in params.items() if value is not None}
+        # Upload bodies (bytes, open files, streams) take as long as their size dictates; their latency isn't load
+        bulk_body = bool(files) or isinstance(data, (bytes, bytearray)) or hasattr(data, '__aiter__') \
+            or hasattr(data, 'read')
+        fields = data  # The quota tracker reads a Graph access_token sent as a form field
+        if files:
+            data = self._build_form(data, files)
+
+        await self.quota_tracker.pace(url, headers, params, fields)
+        limiter = self.concurrency_limiters.for_host(urlsplit(url).hostname)
+        started_at = await limiter.acquire()
+        try:
+            session = await self._get_session()
+            async with session.request(
+                method, url, params=params, data=data, json=json, headers=headers,
+                timeout=self._client_timeout(timeout or self.timeout), allow_redirects=allow_redirects,
+            ) as resp:
+                body = await resp.read()
+                response = self._to_response(method, str(resp.url), resp.status, resp.reason, resp.headers, body)
+        except asyncio.CancelledError:
+            limiter.release_unused()
+            raise
+        except asyncio.TimeoutError as e:
+            limiter.release(started_at, error=True)
+            raise requests.Timeout(f"Request to {url} timed out") from e
+        except aiohttp.ClientConnectionError as e:
+            limiter.release(started_at, error=True)
+            raise requests.ConnectionError(str(e)) from e
+        except aiohttp.ClientError as e:
+            limiter.release(started_at, error=True)
+            raise requests.RequestException(str(e)) from e
+        except BaseException:
+            limiter.release_unused()
+            raise
+        latency = None if bulk_body else time.monotonic() - started_at
+        limiter.release(started_at, status=response.status_code, latency=latency, endpoint=endpoint_of(method, url))
+        self.quota_tracker.observe(url, headers, response, params, fields)
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def close(self):
+        """Close the session owned by the running loop."""
+        _, closer = self._sessions.pop(asyncio.get_running_loop(), (None, None))
+        if closer is not None:
+            await closer.aclose()
+
+
+async def _close_on_loop_shutdown(session):
+    """
+    Async generator that closes session when finalized. The loop's shutdown_asyncgens(), run by
+    asyncio.run() and the publisher loop at exit, finalizes it, so sessions don't leak.
+    """
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+_default_async_transport = None
+_default_async_transport_lock = threading.Lock()
+
+
+def get_default_async_transport():
+    """
+    Return the process-wide async transport, creating it on first use.
+    """
+    global _default_async_transport
+    if _default_async_transport is None:
+        with _default_async_transport_lock:
+            if _default_async_transport is None:
+                _default_async_transport = AsyncHttpTransport()
+    return _default_async_transport
+
+
+def set_default_async_transport(transport):
+    """
+    Replace the process-wide async transport (e.g. to tune connection limits at startup).
+    """
+    global _default_async_transport
+    with _default_async_transport_lock:
+        _default_async_transport = transport
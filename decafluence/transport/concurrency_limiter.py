@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from decafluence.transport.quota_tracker import NUMERIC_SEGMENT
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_INITIAL_LIMIT = 10
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 200
+DEFAULT_DECREASE_FACTOR = 0.5
+DEFAULT_LATENCY_TOLERANCE = 2.0  # A response this many times slower than the baseline counts as a spike
+DEFAULT_LATENCY_SMOOTHING = 0.05  # Weight of each new sample in the baseline latency average
+OVERLOAD_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits in-flight requests to one host with additive increase, multiplicative decrease.
+
+    While responses come back healthy and the limit is actually in use, the limit grows by
+    about one request per round trip's worth of completions. A 429, a 5xx, a connection
+    failure or a response slower than `latency_tolerance` times the baseline latency cuts it
+    by `decrease_factor`. Only requests sent after the previous cut can trigger another, so a
+    burst of failures from one overload cuts the limit once. Requests over the limit wait in
+    FIFO order. A limiter may be shared by event loops on different threads.
+    """
+
+    def __init__(self, name, initial_limit=DEFAULT_INITIAL_LIMIT, min_limit=DEFAULT_MIN_LIMIT,
+                 max_limit=DEFAULT_MAX_LIMIT, decrease_factor=DEFAULT_DECREASE_FACTOR,
+                 latency_tolerance=DEFAULT_LATENCY_TOLERANCE, latency_smoothing=DEFAULT_LATENCY_SMOOTHING):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters = deque()  # (loop, future) of requests waiting for a slot
+        self._baseline_latency = {}  # (method, path template) -> smoothed latency
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        """The number of requests currently allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    async def acquire(self):
+        """Wait for a slot and return the time it was granted, to pass back to release()."""
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return time.monotonic()
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            self._release_slot()  # The slot was granted as the wait was cancelled; hand it on
+            raise
+        return time.monotonic()
+
+    def release(self, started_at, status=None, error=False, latency=None, endpoint=None):
+        """
+        Free the slot taken at started_at and adjust the limit from the outcome: the response
+        status, whether the request failed outright, and its latency if it is representative
+        (bulk uploads are left out, since their time depends on their size), compared with
+        the baseline of the endpoint it was sent to.
+        """
+        with self._lock:
+            if error or status in OVERLOAD_STATUSES:
+                self._decrease(started_at, f"status {status}" if status else "request failure")
+            elif latency is not None:
+                baseline = self._baseline_latency.get(endpoint)
+                if baseline is None:
+                    baseline = latency
+                elif latency > baseline * self.latency_tolerance:
+                    self._decrease(started_at, f"latency {latency:.2f}s vs baseline {baseline:.2f}s"
+                                               f" for {' '.join(endpoint or ())}")
+                else:
+                    self._increase()
+                self._baseline_latency[endpoint] = baseline + self.latency_smoothing * (latency - baseline)
+            else:
+                self._increase()
+        self._release_slot()
+
+    def release_unused(self):
+        """
+        Free a slot without adjusting the limit, for requests that ended without a response
+        from the host (cancelled, or failed before or after the round trip).
+        """
+        self._release_slot()
+
+    def _increase(self):
+        # Grow only while the limit is the bottleneck; an idle host says nothing about capacity
+        if self._in_flight >= self.limit and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def _decrease(self, started_at, reason):
+        if started_at < self._last_decrease:
+            return  # Sent under the old limit; that overload has already been acted on
+        self._last_decrease = time.monotonic()
+        previous = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        logger.warning(f"Concurrency limit for {self.name} cut from {previous} to {self.limit} ({reason})")
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            while self._waiters and self._in_flight < self.limit:
+                loop, future = self._waiters.popleft()
+                self._in_flight += 1
+                loop.call_soon_threadsafe(_grant, future)
+
+    def snapshot(self):
+        return {
+            'limit': self.limit,
+            'in_flight': self._in_flight,
+            'waiting': len(self._waiters),
+            'baseline_latency': {' '.join(endpoint or ()): latency
+                                 for endpoint, latency in list(self._baseline_latency.items())},
+        }
+
+
+def endpoint_of(method, url):
+    """Return the (method, path template) a request's latency is judged against, with object ids folded."""
+    return method.upper(), NUMERIC_SEGMENT.sub('/:id', urlsplit(url).path)
+
+
+def _grant(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class HostConcurrencyLimiters:
+    """One AdaptiveConcurrencyLimiter per host, created on first use with shared settings."""
+
+    def __init__(self, **limiter_options):
+        self.limiter_options = limiter_options
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def for_host(self, host):
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(host)
+                if limiter is None:
+                    limiter = self._limiters[host] = AdaptiveConcurrencyLimiter(host, **self.limiter_options)
+        return limiter
+
+    def limits(self):
+        """Return the current limiter state per host, for monitoring."""
+        return {host: limiter.snapshot() for host, limiter in list(self._limiters.items())}
+
+
+_default_concurrency_limiters = None
+_default_concurrency_limiters_lock = threading.Lock()
+
+
+def get_default_concurrency_limiters():
+    """
+    Return the process-wide per-host limiters, so every publisher shares each host's limit.
+    """
+    global _default_concurrency_limiters
+    if _default_concurrency_limiters is None:
+        with _default_concurrency_limiters_lock:
+            if _default_concurrency_limiters is None:
+                _default_concurrency_limiters = HostConcurrencyLimiters()
+    return _default_concurrency_limiters
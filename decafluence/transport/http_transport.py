@@ -0,0 +1,93 @@
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+DEFAULT_POOL_CONNECTIONS = 10  # Number of per-host pools kept alive
+DEFAULT_POOL_MAXSIZE = 20  # Max keep-alive connections per host
+DEFAULT_TIMEOUT = (10, 120)  # (connect, read) timeout in seconds
+
+
+class HttpTransport:
+    """
+    Shared HTTP transport used by every publisher service and OAuth helper.
+
+    Wraps a single requests.Session with a pooled HTTPAdapter, so repeated calls to
+    the same host (graph.facebook.com, api.linkedin.com, ...) reuse keep-alive
+    TCP+TLS connections instead of opening a new one per request.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 timeout=DEFAULT_TIMEOUT, max_retries=0):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        # Tokens travel in headers/params; never carry cookies from one user's call into another's
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        self.mount(self.session)
+        logger.info(f"HttpTransport initialized (pools={pool_connections}, maxsize={pool_maxsize})")
+
+    def mount(self, session):
+        """Route another requests.Session (e.g. an OAuth1Session) through this transport's pools."""
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the pooled session, applying the default timeout."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """
+    Return the process-wide transport, creating it on first use.
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HttpTransport()
+    return _default_transport
+
+
+def set_default_transport(transport):
+    """
+    Replace the process-wide transport (e.g. to tune pool sizes or timeouts at startup).
+    """
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+GRAPH_HOSTS = {
+    'graph.facebook.com': 'facebook',
+    'graph-video.facebook.com': 'facebook',
+    'graph.instagram.com': 'instagram',
+}
+X_HOSTS = ('api.twitter.com', 'upload.twitter.com', 'api.x.com', 'upload.x.com')
+DEFAULT_PACE_THRESHOLD = 75  # Percent of a limit used at which requests start being spaced out
+DEFAULT_BLOCK_THRESHOLD = 95  # Percent used at which requests wait for the window to recover
+DEFAULT_MAX_INTERVAL = 5.0  # Longest gap between requests while pacing on a Graph usage percentage
+DEFAULT_RECOVERY_SECONDS = 60  # Wait after a limit is hit when the platform doesn't say for how long
+USAGE_STALE_SECONDS = 300  # Graph usage without a reset time is ignored once this old
+PUBLISHING_LIMIT_TTL = 300  # How long a fetched Instagram content_publishing_limit is trusted
+NUMERIC_SEGMENT = re.compile(r'/\d{5,}(?=/|$)')  # Object ids, not API versions like /2/
+
+
+class QuotaExceededError(Exception):
+    """Raised when a platform quota is used up and the request would be rejected."""
+    pass
+
+
+@dataclass
+class QuotaState:
+    """The latest reading of one rate limit."""
+    usage: float  # Percent of the limit used, 0-100
+    observed_at: float
+    reset_at: Optional[float] = None  # When the window resets or access is regained, if the platform says
+    remaining: Optional[int] = None  # Requests left in the window, for count-based limits
+    next_slot: float = 0.0  # Earliest time the next paced request may go out
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+
+
+def _token_id(headers):
+    """A short hash identifying the user token in an Authorization header, without keeping the token."""
+    authorization = (headers or {}).get('Authorization', '')
+    match = re.search(r'oauth_token="([^"]+)"', authorization)
+    token = match.group(1) if match else authorization
+    return _hash_token(token) if token else 'anonymous'
+
+
+def _graph_token_id(url, headers, params, data):
+    """
+    A short hash of the Graph access token a request is sent with, or None without one. The token
+    goes as an `access_token` query parameter or form field, or as an Authorization Bearer header.
+    """
+    token = None
+    for fields in (params, data):
+        if isinstance(fields, dict) and fields.get('access_token'):
+            token = str(fields['access_token'])
+            break
+    if token is None:
+        token = (parse_qs(urlsplit(url).query).get('access_token') or [None])[0]
+    if token is None:
+        match = re.match(r'Bearer\s+(\S+)', (headers or {}).get('Authorization', ''))
+        token = match.group(1) if match else None
+    return _hash_token(token) if token else None
+
+
+def _usage_percent(usage):
+    return max((float(value) for key, value in usage.items() if key != 'estimated_time_to_regain_access'
+                and isinstance(value, (int, float))), default=0.0)
+
+
+class QuotaTracker:
+    """
+    Tracks platform rate limits from the headers on every response and paces outgoing requests.
+
+    Graph API responses carry `X-App-Usage` (per app, and recorded per access token as well) and
+    `X-Business-Use-Case-Usage` (per page or business), X responses carry `x-rate-limit-*` (per token and endpoint), and
+    Instagram's content publishing quota is recorded per account by the publisher. Below
+    `pace_threshold` percent requests go out immediately; above it they are spaced out so the
+    remaining budget lasts until the window resets, and above `block_threshold` they wait for
+    the reset. One tracker is shared by every publisher through the async transport.
+    """
+
+    def __init__(self, pace_threshold=DEFAULT_PACE_THRESHOLD, block_threshold=DEFAULT_BLOCK_THRESHOLD,
+                 max_interval=DEFAULT_MAX_INTERVAL, recovery_seconds=DEFAULT_RECOVERY_SECONDS):
+        self.pace_threshold = pace_threshold
+        self.block_threshold = block_threshold
+        self.max_interval = max_interval
+        self.recovery_seconds = recovery_seconds
+        self._states = {}  # key tuple -> QuotaState
+        self._publishing_limits = {}  # instagram user id -> (usage, total, checked_at)
+        self._lock = threading.Lock()  # Publishers on different event loops share one tracker
+
+    @staticmethod
+    def keys_for(url, headers=None, params=None, data=None):
+        """Return the quota keys a request to url counts against."""
+        parts = urlsplit(url)
+        host = parts.hostname or ''
+        if host in GRAPH_HOSTS:
+            platform = GRAPH_HOSTS[host]
+            keys = [('app', platform)]
+            token_id = _graph_token_id(url, headers, params, data)
+            if token_id:
+                keys.append(('token', token_id))
+            segments = [segment for segment in parts.path.split('/') if segment]
+            if segments and re.match(r'v\d', segments[0]):
+                segments = segments[1:]
+            if segments and segments[0].isdigit():
+                keys.append(('business', segments[0]))
+            return keys
+        if host in X_HOSTS:
+            return [('x', _token_id(headers), host + NUMERIC_SEGMENT.sub('/:id', parts.path))]
+        return []
+
+    def _wait_for(self, key, now):
+        state = self._states.get(key)
+        if state is None:
+            return 0.0
+        if (state.reset_at is not None and now >= state.reset_at) or \
+                (state.reset_at is None and now - state.observed_at > USAGE_STALE_SECONDS):
+            del self._states[key]  # The window has moved on; the next response will report afresh
+            return 0.0
+        if state.usage >= self.block_threshold:
+            return (state.reset_at or state.observed_at + self.recovery_seconds) - now
+        if state.usage < self.pace_threshold:
+            return 0.0
+
+        if state.reset_at is not None and state.remaining is not None:
+            interval = (state.reset_at - now) / max(state.remaining, 1)  # Spread what's left over the window
+        else:
+            interval = self.max_interval * (state.usage - self.pace_threshold) / (self.block_threshold - self.pace_threshold)
+        slot = max(now, state.next_slot)
+        state.next_slot = slot + interval
+        if state.remaining:
+            state.remaining -= 1
+        return slot - now
+
+    def reserve(self, url, headers=None, params=None, data=None):
+        """Claim a send slot for a request and return how many seconds to wait before sending it."""
+        keys = self.keys_for(url, headers, params, data)
+        if not keys:
+            return 0.0
+        now = time.time()
+        with self._lock:
+            return max(self._wait_for(key, now) for key in keys)
+
+    async def pace(self, url, headers=None, params=None, data=None):
+        """Sleep as long as the quota for url requires before the request is sent."""
+        delay = self.reserve(url, headers, params, data)
+        if delay > 0:
+            logger.info(f"Pacing request to {urlsplit(url).hostname} by {delay:.2f}s to stay within rate limits")
+            await asyncio.sleep(delay)
+
+    def _record(self, key, usage, now, reset_at=None, remaining=None):
+        previous = self._states.get(key)
+        self._states[key] = QuotaState(
+            usage=usage, observed_at=now, reset_at=reset_at, remaining=remaining,
+            next_slot=previous.next_slot if previous else 0.0,
+        )
+        if usage >= self.pace_threshold and (previous is None or previous.usage < self.pace_threshold):
+            logger.warning(f"Rate limit {key[0]}:{key[-1]} at {usage:.0f}% of quota")
+
+    def observe(self, url, headers, response, params=None, data=None):
+        """Update quota state from a response's rate-limit headers (and from a 429 without them)."""
+        keys = self.keys_for(url, headers, params, data)
+        if not keys:
+            return
+        now = time.time()
+        response_headers = response.headers
+        observed = False
+        with self._lock:
+            app_usage = response_headers.get('X-App-Usage')
+            if app_usage:
+                try:
+                    usage = _usage_percent(json.loads(app_usage))
+                    for key in keys:
+                        if key[0] in ('app', 'token'):
+                            self._record(key, usage, now)
+                    observed = True
+                except (ValueError, AttributeError):
+                    logger.debug(f"Unreadable X-App-Usage header: {app_usage}")
+
+            business_usage = response_headers.get('X-Business-Use-Case-Usage')
+            if business_usage:
+                try:
+                    for business_id, entries in json.loads(business_usage).items():
+                        usage = max((_usage_percent(entry) for entry in entries), default=0.0)
+                        regain_minutes = max((entry.get('estimated_time_to_regain_access', 0) for entry in entries),
+                                             default=0)
+                        reset_at = now + regain_minutes * 60 if regain_minutes else None
+                        self._record(('business', str(business_id)), usage, now, reset_at=reset_at)
+                    observed = True
+                except (ValueError, AttributeError):
+                    logger.debug(f"Unreadable X-Business-Use-Case-Usage header: {business_usage}")
+
+            limit = response_headers.get('x-rate-limit-limit')
+            remaining = response_headers.get('x-rate-limit-remaining')
+            reset = response_headers.get('x-rate-limit-reset')
+            if limit and remaining is not None and reset:
+                try:
+                    limit, remaining, reset_at = int(limit), int(remaining), float(reset)
+                    usage = 100.0 * (1 - remaining / limit) if limit else 100.0
+                    self._record(keys[0], 100.0 if remaining == 0 else usage, now, reset_at=reset_at,
+                                 remaining=remaining)
+                    observed = True
+                except (ValueError, TypeError):
+                    logger.debug(f"Unreadable x-rate-limit headers: {limit}, {remaining}, {reset}")
+
+            if response.status_code == 429 and not observed:
+                retry_after = response_headers.get('Retry-After')
+                reset_at = now + (float(retry_after) if retry_after and retry_after.isdigit() else self.recovery_seconds)
+                for key in keys:
+                    self._record(key, 100.0, now, reset_at=reset_at)
+
+    def record_publishing_limit(self, instagram_user_id, usage, total):
+        """Remember an account's content_publishing_limit reading (posts used and allowed per 24 hours)."""
+        with self._lock:
+            self._publishing_limits[instagram_user_id] = (usage, total, time.time())
+
+    def publishing_limit(self, instagram_user_id):
+        """Return (usage, total) for an account if read within PUBLISHING_LIMIT_TTL, else None."""
+        with self._lock:
+            reading = self._publishing_limits.get(instagram_user_id)
+        if reading is None or time.time() - reading[2] > PUBLISHING_LIMIT_TTL:
+            return None
+        return reading[0], reading[1]
+
+    def record_publish(self, instagram_user_id):
+        """Count a successful publish against the account's cached quota until it is read again."""
+        with self._lock:
+            reading = self._publishing_limits.get(instagram_user_id)
+            if reading is not None:
+                self._publishing_limits[instagram_user_id] = (reading[0] + 1, reading[1], reading[2])
+
+    def snapshot(self):
+        """Return the current readings, keyed by 'kind:id', for monitoring."""
+        with self._lock:
+            return {
+                ':'.join(key): {'usage': state.usage, 'reset_at': state.reset_at, 'remaining': state.remaining}
+                for key, state in self._states.items()
+            }
+
+
+_default_quota_tracker = None
+_default_quota_tracker_lock = threading.Lock()
+
+
+def get_default_quota_tracker():
+    """
+    Return the process-wide quota tracker, so every publisher paces against the same readings.
+    """
+    global _default_quota_tracker
+    if _default_quota_tracker is None:
+        with _default_quota_tracker_lock:
+            if _default_quota_tracker is None:
+                _default_quota_tracker = QuotaTracker()
+    return _default_quota_tracker
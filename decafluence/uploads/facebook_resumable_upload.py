@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import mimetypes
+import os
+
+import requests
+
+from decafluence.uploads.retry import RETRYABLE_STATUSES, TRANSIENT_ERRORS, RetryableUploadError, UploadRetry
+from decafluence.uploads.session_store import UploadSessionStore, file_fingerprint
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+FACEBOOK_VIDEO_URL = 'https://graph-video.facebook.com/v11.0/'
+RESUMABLE_THRESHOLD = 32 * 1024 * 1024  # Smaller videos go up in a single request
+DEFAULT_MAX_RETRIES = 5
+SESSION_MAX_AGE_SECONDS = 6 * 3600  # Facebook drops idle upload sessions; don't resume very old ones
+
+
+class FacebookResumableUploader:
+    """
+    Uploads page videos with the Graph API resumable protocol (start / transfer / finish).
+
+    `start` opens an upload session and names the first byte range to send; every `transfer`
+    answers with the next range, until start and end offsets meet and `finish` publishes the
+    video. The session id and next range are saved in an UploadSessionStore after each chunk,
+    so a restarted worker continues from the last acknowledged chunk instead of re-sending
+    the file; the publisher passes a store on disk for that, as the uploader's default one is
+    in memory. Only
+    the chunk in flight is held in memory.
+    """
+
+    def __init__(self, transport, api_url=FACEBOOK_VIDEO_URL, session_store=None,
+                 max_retries=DEFAULT_MAX_RETRIES):
+        self.transport = transport
+        self.api_url = api_url
+        self.session_store = session_store or UploadSessionStore(None, max_age=SESSION_MAX_AGE_SECONDS)
+        self.max_retries = max_retries
+
+    async def upload(self, page_id, access_token, video_path, fields=None):
+        """Upload video_path to page_id, publish it with the given fields and return {"id": video_id, ...}."""
+        fingerprint = file_fingerprint(video_path)
+        key = self.session_store.session_key("facebook", page_id, fingerprint)
+        url = f"{self.api_url}{page_id}/videos"
+
+        state = self.session_store.load(key)
+        resumed = state is not None
+        if resumed:
+            logger.info(f"Resuming Facebook upload of {video_path} at byte {state['start_offset']}/{fingerprint['size']}")
+        else:
+            state = await self._start(url, access_token, fingerprint['size'], key)
+
+        with open(video_path, "rb") as video_file:
+            retry = UploadRetry(self.max_retries, f"Facebook chunk transfer of {video_path}")
+            while state['start_offset'] < state['end_offset']:
+                try:
+                    start_offset, end_offset = await self._transfer(url, access_token, state, video_file, video_path)
+                    retry.reset()
+                    resumed = False
+                except TRANSIENT_ERRORS as e:
+                    await retry.backoff(e)
+                    continue
+                except requests.HTTPError as e:
+                    if not resumed:
+                        raise
+                    # The saved session is no longer accepted; start a fresh one once
+                    logger.warning(f"Saved Facebook upload session for {video_path} was rejected ({e}); starting over")
+                    self.session_store.delete(key)
+                    state = await self._start(url, access_token, fingerprint['size'], key)
+                    resumed = False
+                    continue
+
+                state['start_offset'], state['end_offset'] = start_offset, end_offset
+                self.session_store.save(key, state)
+
+        data = dict(fields or {})
+        data.update({
+            "upload_phase": "finish",
+            "upload_session_id": state['upload_session_id'],
+            "access_token": access_token,
+        })
+        response = await self.transport.post(url, data=data)
+        response.raise_for_status()
+        self.session_store.delete(key)
+        logger.info(f"Facebook upload of {video_path} complete: video {state['video_id']}")
+        return {"id": state['video_id'], **response.json()}
+
+    async def _start(self, url, access_token, file_size, key):
+        data = {"upload_phase": "start", "file_size": file_size, "access_token": access_token}
+        response = await self.transport.post(url, data=data)
+        response.raise_for_status()
+        session = response.json()
+        state = {
+            "upload_session_id": session['upload_session_id'],
+            "video_id": session['video_id'],
+            "start_offset": int(session['start_offset']),
+            "end_offset": int(session['end_offset']),
+        }
+        logger.info(f"Facebook upload session {state['upload_session_id']} started for {file_size} bytes")
+        return self.session_store.save(key, state)
+
+    async def _transfer(self, url, access_token, state, video_file, video_path):
+        """Send the chunk named by state; returns the next (start_offset, end_offset) to send."""
+        start_offset, end_offset = state['start_offset'], state['end_offset']
+        video_file.seek(start_offset)
+        chunk = await asyncio.to_thread(video_file.read, end_offset - start_offset)
+        data = {
+            "upload_phase": "transfer",
+            "upload_session_id": state['upload_session_id'],
+            "start_offset": start_offset,
+            "access_token": access_token,
+        }
+        content_type = mimetypes.guess_type(video_path)[0] or 'application/octet-stream'
+        files = {"video_file_chunk": (os.path.basename(video_path), chunk, content_type)}
+        response = await self.transport.post(url, data=data, files=files)
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RetryableUploadError(f"Server returned {response.status_code}")
+
+        if response.status_code >= 400:
+            # An offset mismatch (e.g. a chunk that arrived before a crash) names the range it expects next
+            try:
+                error_data = response.json().get('error', {}).get('error_data') or {}
+            except ValueError:
+                error_data = {}
+            if 'start_offset' in error_data and 'end_offset' in error_data:
+                logger.info(f"Facebook expects bytes {error_data['start_offset']}-{error_data['end_offset']} next")
+                return int(error_data['start_offset']), int(error_data['end_offset'])
+            response.raise_for_status()
+
+        body = response.json()
+        return int(body['start_offset']), int(body['end_offset'])
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+
+from decafluence.uploads.retry import call_with_retries
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+LINKEDIN_REST_URL = 'https://api.linkedin.com/rest/'
+LINKEDIN_VERSION = '202307'
+DEFAULT_MAX_CONCURRENCY = 4  # Parts in flight (and in memory) at once
+DEFAULT_MAX_RETRIES = 5
+
+
+class LinkedInMultipartUploader:
+    """
+    Uploads videos with LinkedIn's multi-part Videos API.
+
+    `initializeUpload` returns one upload instruction (URL plus byte range) per part. Parts are
+    read from disk on demand and PUT concurrently, at most `max_concurrency` at a time, and a
+    failed part is retried on its own without touching the others. The ETag returned for each
+    part is handed to `finalizeUpload` in part order.
+    """
+
+    def __init__(self, transport, api_url=LINKEDIN_REST_URL, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES):
+        self.transport = transport
+        self.api_url = api_url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    def _headers(self, access_token):
+        return {
+            'Authorization': f'Bearer {access_token}',
+            'LinkedIn-Version': LINKEDIN_VERSION,
+            'X-Restli-Protocol-Version': '2.0.0',
+            'Content-Type': 'application/json'
+        }
+
+    async def upload(self, access_token, owner_urn, video_path):
+        """Upload video_path for owner_urn and return the video URN once finalized."""
+        file_size = os.path.getsize(video_path)
+        initialize_body = {
+            "initializeUploadRequest": {
+                "owner": owner_urn,
+                "fileSizeBytes": file_size,
+                "uploadCaptions": False,
+                "uploadThumbnail": False
+            }
+        }
+        initialize_response = await self.transport.post(
+            f"{self.api_url}videos?action=initializeUpload", headers=self._headers(access_token), json=initialize_body
+        )
+        initialize_response.raise_for_status()
+        value = initialize_response.json()['value']
+        video_urn = value['video']
+        instructions = value['uploadInstructions']
+        logger.info(f"LinkedIn video {video_urn} initialized: {file_size} bytes in {len(instructions)} parts")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        etags = await asyncio.gather(*(
+            self._upload_part(semaphore, video_path, instruction, index)
+            for index, instruction in enumerate(instructions)
+        ))
+
+        finalize_body = {
+            "finalizeUploadRequest": {
+                "video": video_urn,
+                "uploadToken": value.get('uploadToken', ''),
+                "uploadedPartIds": list(etags)
+            }
+        }
+        finalize_response = await self.transport.post(
+            f"{self.api_url}videos?action=finalizeUpload", headers=self._headers(access_token), json=finalize_body
+        )
+        finalize_response.raise_for_status()
+        logger.info(f"LinkedIn video {video_urn} upload finalized")
+        return video_urn
+
+    @staticmethod
+    def _read_part(video_path, first_byte, last_byte):
+        with open(video_path, 'rb') as video_file:
+            video_file.seek(first_byte)
+            return video_file.read(last_byte - first_byte + 1)
+
+    async def _upload_part(self, semaphore, video_path, instruction, index):
+        async with semaphore:
+            part = await asyncio.to_thread(
+                self._read_part, video_path, instruction['firstByte'], instruction['lastByte']
+            )
+            headers = {'Content-Type': 'application/octet-stream'}
+            return await call_with_retries(
+                lambda: self._put_part(instruction['uploadUrl'], headers, part, index), self.max_retries,
+                f"LinkedIn upload of part {index}"
+            )
+
+    async def _put_part(self, upload_url, headers, part, index):
+        response = await self.transport.put(upload_url, headers=headers, data=part)
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        if not etag:
+            raise Exception(f"LinkedIn did not return an ETag for part {index}.")
+        return etag
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import random
+
+import requests
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_MAX_DELAY = 32  # Seconds; the backoff stops doubling here
+
+
+class RetryableUploadError(Exception):
+    """Raised for transient server errors during an upload request; always retried."""
+    pass
+
+
+# Errors that say nothing about the upload itself, only that the request didn't get through
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, RetryableUploadError)
+
+
+def is_transient(error, retryable_statuses=RETRYABLE_STATUSES):
+    """True for connection failures, timeouts and HTTP errors with a retryable status."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, requests.HTTPError):
+        status = getattr(error.response, 'status_code', None)
+        return status is None or status in retryable_statuses
+    return False
+
+
+class UploadRetry:
+    """
+    Counts consecutive transient failures of one upload step and waits between attempts with
+    jittered exponential backoff. Call `reset()` after progress is made, so a long upload
+    survives any number of blips as long as no `max_retries + 1` failures come in a row.
+    """
+
+    def __init__(self, max_retries, description, max_delay=DEFAULT_MAX_DELAY):
+        self.max_retries = max_retries
+        self.description = description
+        self.max_delay = max_delay
+        self.failures = 0
+
+    def reset(self):
+        self.failures = 0
+
+    async def backoff(self, error):
+        """Sleep before the next attempt, or re-raise error once the retries are used up."""
+        self.failures += 1
+        if self.failures > self.max_retries:
+            raise error
+        delay = min(2 ** self.failures, self.max_delay) + random.random()
+        logger.warning(f"{self.description} failed ({error}); retry {self.failures} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def call_with_retries(attempt, max_retries, description, retryable_statuses=RETRYABLE_STATUSES):
+    """Await attempt() until it succeeds, retrying transient failures up to max_retries times."""
+    retry = UploadRetry(max_retries, description)
+    while True:
+        try:
+            return await attempt()
+        except (requests.RequestException, RetryableUploadError) as e:
+            if not is_transient(e, retryable_statuses):
+                raise
+            await retry.backoff(e)
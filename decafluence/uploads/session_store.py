@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+SESSION_DIR_ENV = "UPLOAD_SESSION_DIR"
+DEFAULT_SESSION_SUBDIR = os.path.join(".decafluence", "upload_sessions")  # Under the user's home directory
+
+
+def file_fingerprint(file_path):
+    """Identify a file by absolute path, size and mtime so edited files never resume an old session."""
+    stat = os.stat(file_path)
+    return {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def upload_session_directory(directory=None):
+    """
+    Return the directory resumable upload sessions are persisted in: `directory` if given, else
+    the UPLOAD_SESSION_DIR environment variable, else ~/.decafluence/upload_sessions. Resolved
+    when a publisher is built rather than at import, so configuration loaded at startup applies.
+    """
+    return directory or os.getenv(SESSION_DIR_ENV) or os.path.join(os.path.expanduser("~"), DEFAULT_SESSION_SUBDIR)
+
+
+class UploadSessionStore:
+    """
+    Persists in-progress upload sessions as small JSON files in `directory`.
+
+    Lets a restarted worker pick up a resumable upload (session URI, confirmed offset,
+    uploaded parts) instead of re-sending the whole file. Writes are atomic, so a crash
+    mid-save never leaves a truncated state file. The directory must be given explicitly;
+    with `directory=None` sessions are kept in memory and only survive within the process.
+    """
+
+    def __init__(self, directory, max_age=None):
+        self.directory = directory
+        self.max_age = max_age  # Seconds after which a saved session is considered expired
+        self._lock = threading.Lock()
+        self._memory = {}  # key -> JSON state, when there is no directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def session_key(*parts):
+        """Build a stable key from any JSON-serialisable parts (platform, file fingerprint, metadata...)."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key):
+        """Return the saved state for key, or None if there is none or it has expired."""
+        try:
+            if self.directory is None:
+                with self._lock:
+                    state = json.loads(self._memory[key])
+            else:
+                with open(self._path(key)) as f:
+                    state = json.load(f)
+        except (FileNotFoundError, KeyError):
+            return None
+        except ValueError:
+            logger.warning(f"Discarding unreadable upload session {key}")
+            self.delete(key)
+            return None
+        if self.max_age is not None and time.time() - state.get("created_at", 0) > self.max_age:
+            logger.info(f"Upload session {key} expired; starting over")
+            self.delete(key)
+            return None
+        return state
+
+    def save(self, key, state):
+        """Atomically write state for key, stamping created_at on first save."""
+        state.setdefault("created_at", time.time())
+        if self.directory is None:
+            with self._lock:
+                self._memory[key] = json.dumps(state)
+            return state
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._path(key))
+        return state
+
+    def delete(self, key):
+        if self.directory is None:
+            with self._lock:
+                self._memory.pop(key, None)
+            return
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
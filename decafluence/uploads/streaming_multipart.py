@@ -0,0 +1,100 @@
+import asyncio
+import mimetypes
+import os
+import uuid
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # Bytes of file content read (and held in memory) at a time
+
+
+def _quote(value):
+    # Per the HTML form-data encoding: quotes and line breaks can't appear raw in a header parameter
+    return value.replace('\r', '%0D').replace('\n', '%0A').replace('"', '%22')
+
+
+class StreamingMultipartEncoder:
+    """
+    A multipart/form-data body that is streamed from disk instead of built in memory.
+
+    `fields` maps form names to values, sent as text parts. `files` maps form names to a file
+    path or a (filename, path, content_type) tuple. File contents are read `chunk_size` bytes at
+    a time while the body is sent, so memory per upload stays flat however large the file is.
+    The exact body length is known up front and sent as Content-Length.
+
+    The encoder can be passed as `data` to both transports: requests iterates it, and aiohttp
+    consumes it as an async iterable with file reads done off the event loop. Each iteration
+    starts from the beginning, so a failed request can be retried with the same encoder.
+    """
+
+    def __init__(self, fields=None, files=None, chunk_size=DEFAULT_CHUNK_SIZE, boundary=None):
+        self.chunk_size = chunk_size
+        self.boundary = boundary or uuid.uuid4().hex
+        self._parts = []  # bytes, or (path, size) for file contents
+        for name, value in (fields or {}).items():
+            if value is None:
+                continue
+            self._parts.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                f'{value}\r\n'.encode('utf-8')
+            )
+        for name, value in (files or {}).items():
+            if isinstance(value, tuple):
+                filename, path, content_type = value
+            else:
+                path = value
+                filename = os.path.basename(path)
+                content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            self._parts.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8')
+            )
+            self._parts.append((path, os.path.getsize(path)))
+            self._parts.append(b'\r\n')
+        self._parts.append(f'--{self.boundary}--\r\n'.encode('utf-8'))
+        self.content_length = sum(part[1] if isinstance(part, tuple) else len(part) for part in self._parts)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    @property
+    def headers(self):
+        """Content-Type and Content-Length headers to send with the body."""
+        return {'Content-Type': self.content_type, 'Content-Length': str(self.content_length)}
+
+    def __len__(self):
+        return self.content_length
+
+    def _check_chunk(self, path, chunk, remaining):
+        if not chunk:
+            raise IOError(f"{path} shrank while it was being uploaded ({remaining} bytes missing).")
+        return chunk
+
+    def __iter__(self):
+        for part in self._parts:
+            if not isinstance(part, tuple):
+                yield part
+                continue
+            path, remaining = part
+            with open(path, 'rb') as source:
+                while remaining:
+                    chunk = self._check_chunk(path, source.read(min(self.chunk_size, remaining)), remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+
+    async def __aiter__(self):
+        for part in self._parts:
+            if not isinstance(part, tuple):
+                yield part
+                continue
+            path, remaining = part
+            source = await asyncio.to_thread(open, path, 'rb')
+            try:
+                while remaining:
+                    chunk = await asyncio.to_thread(source.read, min(self.chunk_size, remaining))
+                    self._check_chunk(path, chunk, remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                source.close()
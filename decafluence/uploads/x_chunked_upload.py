@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import mimetypes
+import os
+
+from decafluence.uploads.retry import call_with_retries
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+X_UPLOAD_URL = 'https://upload.twitter.com/1.1/media/upload.json'
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024  # X accepts APPEND segments of up to 5 MB
+DEFAULT_MAX_CONCURRENCY = 4  # Segments in flight (and in memory) at once
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_STATUS_TIMEOUT = 600  # Give up on media processing after this many seconds
+
+
+class MediaProcessingError(Exception):
+    """Raised when X reports that uploaded media failed processing."""
+    pass
+
+
+def media_category_for(file_path):
+    """Pick the X media_category for a file: tweet_gif, tweet_video or tweet_image."""
+    mime_type = mimetypes.guess_type(file_path)[0] or ''
+    if mime_type == 'image/gif':
+        return 'tweet_gif'
+    if mime_type.startswith('video/'):
+        return 'tweet_video'
+    return 'tweet_image'
+
+
+class XChunkedUploader:
+    """
+    Uploads media to X with the chunked INIT / APPEND / FINALIZE / STATUS commands.
+
+    Segments are read from disk on demand, so at most `max_concurrency` segments are held
+    in memory, and APPENDs for different segments run concurrently. Video and GIF processing
+    is then polled with asyncio sleeps, honouring the server's check_after_secs.
+
+    `auth_headers(method, url, params=None, data=None)` is an async callable returning fresh
+    headers for each request, since OAuth 1.0a headers carry a per-request nonce and timestamp
+    and sign the method, URL, query and form fields (multipart bodies are not signed).
+    """
+
+    def __init__(self, transport, upload_url=X_UPLOAD_URL, segment_size=DEFAULT_SEGMENT_SIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 status_timeout=DEFAULT_STATUS_TIMEOUT):
+        self.transport = transport
+        self.upload_url = upload_url
+        self.segment_size = segment_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.status_timeout = status_timeout
+
+    async def upload(self, file_path, auth_headers, media_category=None):
+        """Upload file_path and return its media_id_string once X can attach it to a post."""
+        total_bytes = os.path.getsize(file_path)
+        media_category = media_category or media_category_for(file_path)
+        media_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+        init_response = await self._command(auth_headers, data={
+            'command': 'INIT',
+            'total_bytes': total_bytes,
+            'media_type': media_type,
+            'media_category': media_category,
+        })
+        media_id = init_response['media_id_string']
+        logger.info(f"X media upload initialized: {media_id} ({total_bytes} bytes, {media_category})")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        segment_count = max(1, -(-total_bytes // self.segment_size))
+        await asyncio.gather(*(
+            self._append(auth_headers, semaphore, file_path, media_id, index)
+            for index in range(segment_count)
+        ))
+
+        finalize_response = await self._command(auth_headers, data={'command': 'FINALIZE', 'media_id': media_id})
+        await self._wait_for_processing(auth_headers, media_id, finalize_response.get('processing_info'))
+        logger.info(f"X media upload finalized: {media_id}")
+        return media_id
+
+    async def _command(self, auth_headers, data=None, params=None, files=None):
+        if params is not None:
+            headers = await auth_headers('GET', self.upload_url, params=params)
+            response = await self.transport.get(self.upload_url, headers=headers, params=params)
+        else:
+            headers = await auth_headers('POST', self.upload_url, data=None if files else data)
+            response = await self.transport.post(self.upload_url, headers=headers, data=data, files=files)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def _read_segment(self, file_path, index):
+        with open(file_path, 'rb') as media_file:
+            media_file.seek(index * self.segment_size)
+            return media_file.read(self.segment_size)
+
+    async def _append(self, auth_headers, semaphore, file_path, media_id, index):
+        async with semaphore:
+            segment = await asyncio.to_thread(self._read_segment, file_path, index)
+            data = {'command': 'APPEND', 'media_id': media_id, 'segment_index': index}
+            files = {'media': ('blob', segment, 'application/octet-stream')}
+            await call_with_retries(
+                lambda: self._command(auth_headers, data=data, files=files), self.max_retries,
+                f"APPEND of segment {index} for {media_id}"
+            )
+
+    async def _wait_for_processing(self, auth_headers, media_id, processing_info):
+        waited = 0
+        while processing_info:
+            state = processing_info.get('state')
+            if state == 'succeeded':
+                return
+            if state == 'failed':
+                error = processing_info.get('error', {})
+                raise MediaProcessingError(f"X media {media_id} failed processing: {error.get('message', error)}")
+            if waited >= self.status_timeout:
+                raise TimeoutError(f"X media {media_id} was still processing after {waited} seconds.")
+
+            delay = processing_info.get('check_after_secs', 1)
+            await asyncio.sleep(delay)
+            waited += delay
+            status_response = await self._command(
+                auth_headers, params={'command': 'STATUS', 'media_id': media_id}
+            )
+            processing_info = status_response.get('processing_info')
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import mimetypes
+
+from decafluence.uploads.retry import TRANSIENT_ERRORS, RetryableUploadError, UploadRetry
+from decafluence.uploads.session_store import UploadSessionStore, file_fingerprint
+
+# Set up the logger
+logger = logging.getLogger("app_logger")
+
+YOUTUBE_UPLOAD_URL = 'https://www.googleapis.com/upload/youtube/v3/videos'
+CHUNK_GRANULARITY = 256 * 1024  # YouTube requires chunks in multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = 32 * CHUNK_GRANULARITY  # 8 MiB
+DEFAULT_MAX_RETRIES = 8
+SESSION_MAX_AGE_SECONDS = 6 * 24 * 3600  # Upload session URIs are valid for about a week
+RESUME_INCOMPLETE = 308
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+
+
+class UploadSessionExpiredError(Exception):
+    """Raised when the server no longer recognises a saved upload session."""
+    pass
+
+
+class YouTubeResumableUploader:
+    """
+    Uploads videos with the YouTube resumable-upload protocol.
+
+    Opens an upload session, streams fixed-size chunks from disk, and after a failure asks
+    the server for the last confirmed byte and continues from there. The session URI and
+    confirmed offset are saved in an UploadSessionStore, so a restarted worker resumes the
+    same upload instead of starting over; the publisher passes a store on disk for that, as
+    the uploader's default one is in memory. `upload_url` can point at a local stand-in server.
+    """
+
+    def __init__(self, transport, upload_url=YOUTUBE_UPLOAD_URL, session_store=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_retries=DEFAULT_MAX_RETRIES):
+        if chunk_size % CHUNK_GRANULARITY:
+            raise ValueError(f"chunk_size must be a multiple of {CHUNK_GRANULARITY} bytes.")
+        self.transport = transport
+        self.upload_url = upload_url
+        self.session_store = session_store or UploadSessionStore(None, max_age=SESSION_MAX_AGE_SECONDS)
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+
+    async def upload(self, access_token, video_path, metadata):
+        """Upload video_path with the given snippet/status metadata and return the video resource."""
+        fingerprint = file_fingerprint(video_path)
+        total_size = fingerprint["size"]
+        key = self.session_store.session_key("youtube", fingerprint, metadata)
+
+        state = self.session_store.load(key)
+        resumed = state is not None
+        if resumed:
+            logger.info(f"Resuming saved YouTube upload session for {video_path}")
+        else:
+            state = await self._new_session(access_token, video_path, total_size, metadata, key)
+        offset = state["offset"]
+
+        with open(video_path, "rb") as video_file:
+            retry = UploadRetry(self.max_retries, f"YouTube chunk upload of {video_path}")
+            # A resumed session starts by asking the server which bytes actually arrived
+            needs_status = resumed
+            while True:
+                try:
+                    if needs_status:
+                        offset, result = await self._query_offset(access_token, state["session_uri"], total_size)
+                        needs_status = False
+                        if resumed and result is None:
+                            logger.info(f"Resuming YouTube upload of {video_path} at byte {offset}/{total_size}")
+                    else:
+                        offset, result = await self._send_chunk(
+                            access_token, state["session_uri"], video_file, offset, total_size
+                        )
+                        retry.reset()
+                    resumed = False
+                except UploadSessionExpiredError:
+                    if not resumed:
+                        raise
+                    logger.warning(f"Saved YouTube upload session for {video_path} expired; starting over")
+                    state = await self._new_session(access_token, video_path, total_size, metadata, key)
+                    offset = state["offset"]
+                    resumed = False
+                    continue
+                except TRANSIENT_ERRORS as e:
+                    await retry.backoff(e)
+                    needs_status = True
+                    continue
+
+                if result is not None:
+                    self.session_store.delete(key)
+                    logger.info(f"YouTube upload of {video_path} complete")
+                    return result
+                state["offset"] = offset
+                self.session_store.save(key, state)
+
+    async def _new_session(self, access_token, video_path, total_size, metadata, key):
+        session_uri = await self._start_session(access_token, video_path, total_size, metadata)
+        return self.session_store.save(key, {"session_uri": session_uri, "offset": 0})
+
+    async def _start_session(self, access_token, video_path, total_size, metadata):
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json; charset=UTF-8',
+            'X-Upload-Content-Length': str(total_size),
+            'X-Upload-Content-Type': mimetypes.guess_type(video_path)[0] or 'video/*',
+        }
+        params = {'uploadType': 'resumable', 'part': ','.join(metadata.keys())}
+        response = await self.transport.post(self.upload_url, params=params, headers=headers, json=metadata)
+        response.raise_for_status()
+        session_uri = response.headers.get('Location')
+        if not session_uri:
+            raise Exception("YouTube did not return an upload session URI.")
+        return session_uri
+
+    async def _send_chunk(self, access_token, session_uri, video_file, offset, total_size):
+        video_file.seek(offset)
+        chunk = await asyncio.to_thread(video_file.read, self.chunk_size)
+        end = offset + len(chunk) - 1
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Range': f'bytes {offset}-{end}/{total_size}',
+        }
+        response = await self.transport.put(session_uri, headers=headers, data=chunk, allow_redirects=False)
+        return self._parse_progress(response)
+
+    async def _query_offset(self, access_token, session_uri, total_size):
+        """Ask the server how many bytes it has; returns (offset, result-or-None)."""
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Range': f'bytes */{total_size}',
+        }
+        response = await self.transport.put(session_uri, headers=headers, data=b'', allow_redirects=False)
+        if response.status_code in (404, 410):
+            raise UploadSessionExpiredError(session_uri)
+        return self._parse_progress(response)
+
+    @staticmethod
+    def _parse_progress(response):
+        if response.status_code in (200, 201):
+            return None, response.json()
+        if response.status_code == RESUME_INCOMPLETE:
+            # Range: bytes=0-N means bytes 0..N are stored; no header means nothing is stored yet
+            confirmed = response.headers.get('Range')
+            return (int(confirmed.rsplit('-', 1)[1]) + 1 if confirmed else 0), None
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RetryableUploadError(f"Server returned {response.status_code}")
+        response.raise_for_status()
+        raise Exception(f"Unexpected YouTube upload response: {response.status_code} {response.text}")
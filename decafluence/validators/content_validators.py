@@ -1,88 +1,272 @@
 import json
 import os
 import re
+import stat
+import threading
+import time
+from dataclasses import dataclass, field
+from importlib import resources
+from typing import List
+
+from decafluence.validators.media_probe import probe_media
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.pptx')
+
+LIMITS_RESOURCE = 'platform_limits.json'
+LIMITS_CHECK_INTERVAL_SECONDS = 1.0  # How often the limits file's mtime is re-checked
+
+URL_REGEX = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]*[A-Z0-9])?\.)+(?:[A-Z]{2,})'  # domain (supporting all TLDs)
+    r'|'  # or
+    r'localhost|'  # localhost
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # or IPv4
+    r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # or IPv6
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE  # path (optional)
+)
+
+_limits_lock = threading.Lock()
+_limits_state = {'limits': None, 'mtime_ns': None, 'checked_at': 0.0}
+
+
+def detect_media_type(file_path):
+    """Return 'image', 'video' or 'document' based on the file extension, or None if unknown."""
+    lowered = file_path.lower()
+    if lowered.endswith(IMAGE_EXTENSIONS):
+        return 'image'
+    if lowered.endswith(VIDEO_EXTENSIONS):
+        return 'video'
+    if lowered.endswith(DOCUMENT_EXTENSIONS):
+        return 'document'
+    return None
+
+
+def load_platform_limits():
+    """
+    Return the platform limits, loaded once per process from the package's platform_limits.json
+    and reloaded when the file's mtime changes (checked at most once a second).
+    """
+    now = time.monotonic()
+    state = _limits_state
+    if state['limits'] is not None and now - state['checked_at'] < LIMITS_CHECK_INTERVAL_SECONDS:
+        return state['limits']
+
+    with _limits_lock:
+        resource = resources.files(__package__) / LIMITS_RESOURCE
+        try:
+            mtime_ns = os.stat(resource).st_mtime_ns
+        except TypeError:
+            mtime_ns = None  # Not a real file (e.g. zipped package); loaded once
+        if state['limits'] is None or (mtime_ns is not None and mtime_ns != state['mtime_ns']):
+            state['limits'] = json.loads(resource.read_text())
+            state['mtime_ns'] = mtime_ns
+        state['checked_at'] = now
+        return state['limits']
+
 
 class ContentValidationError(Exception):
     """Custom exception for content validation errors."""
     pass
 
+
+@dataclass
+class ValidationResult:
+    """Outcome of validating one campaign item for one platform."""
+    item: int
+    platform: str
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _stat(file_path):
+    try:
+        return os.stat(file_path)
+    except OSError:
+        return None
+
+
+def _check_text(platform, limits, content):
+    max_length = limits['max_text_length']
+    if len(content) > max_length:
+        return f"{platform.capitalize()} content exceeds the maximum length of {max_length} characters."
+
+
+def _check_file(platform, limits, file_path, file_type, stat_result):
+    """
+    Check a file against a platform's limits using an already-taken stat (None if missing).
+    A platform without a `max_<type>_size` limit does not accept that media type at all.
+    """
+    max_size = limits.get(f'max_{file_type}_size')
+    if max_size is None:
+        return f"{platform.capitalize()} does not support {file_type} posts."
+
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        return f"{file_type.capitalize()} file not found: {file_path}"
+
+    if file_type == 'image' and not file_path.lower().endswith(IMAGE_EXTENSIONS):
+        return f"Invalid image format for {platform.capitalize()}. Only PNG, JPG, and GIF are allowed."
+
+    if file_type == 'video' and not file_path.lower().endswith(VIDEO_EXTENSIONS):
+        return f"Invalid video format for {platform.capitalize()}. Only MP4, MOV, and AVI are allowed."
+
+    if file_type == 'document' and not file_path.lower().endswith(DOCUMENT_EXTENSIONS):
+        return f"Invalid document format for {platform.capitalize()}. Only PDF, DOCX, and PPTX are allowed."
+
+    if stat_result.st_size > max_size:
+        return f"{platform.capitalize()} {file_type} exceeds the maximum size of {max_size / (1024 * 1024)} MB."
+
+    try:
+        info = probe_media(file_path, stat_result)
+    except OSError:
+        return f"{file_type.capitalize()} file not found: {file_path}"
+    return _check_media(platform, limits, file_path, file_type, info)
+
+
+def _check_media(platform, limits, file_path, file_type, info):
+    """Check probed dimensions, duration and bitrate against any `min_`/`max_` limits the platform defines."""
+    if info is None or info.kind != file_type:
+        return f"{file_path} does not contain valid {file_type} data."
+
+    name = platform.capitalize()
+    for dimension, value in (('width', info.width), ('height', info.height)):
+        if value is None:
+            continue
+        min_value = limits.get(f'min_{file_type}_{dimension}')
+        if min_value is not None and value < min_value:
+            return f"{name} {file_type} {dimension} of {value}px is below the minimum of {min_value}px."
+        max_value = limits.get(f'max_{file_type}_{dimension}')
+        if max_value is not None and value > max_value:
+            return f"{name} {file_type} {dimension} of {value}px exceeds the maximum of {max_value}px."
+
+    if info.width and info.height:
+        max_pixels = limits.get(f'max_{file_type}_pixels')
+        if max_pixels is not None and info.width * info.height > max_pixels:
+            return f"{name} {file_type} resolution of {info.width}x{info.height} exceeds {max_pixels} pixels."
+        aspect_ratio = info.width / info.height
+        min_ratio = limits.get(f'min_{file_type}_aspect_ratio')
+        max_ratio = limits.get(f'max_{file_type}_aspect_ratio')
+        if (min_ratio is not None and aspect_ratio < min_ratio) or (max_ratio is not None and aspect_ratio > max_ratio):
+            return f"{name} {file_type} aspect ratio of {aspect_ratio:.2f} is outside the allowed range."
+
+    if info.duration is not None:
+        min_duration = limits.get(f'min_{file_type}_duration')
+        if min_duration is not None and info.duration < min_duration:
+            return f"{name} {file_type} is {info.duration:.1f} seconds long; the minimum is {min_duration} seconds."
+        max_duration = limits.get(f'max_{file_type}_duration')
+        if max_duration is not None and info.duration > max_duration:
+            return f"{name} {file_type} is {info.duration:.1f} seconds long; the maximum is {max_duration} seconds."
+
+    max_bitrate = limits.get(f'max_{file_type}_bitrate')
+    if max_bitrate is not None and info.bitrate is not None and info.bitrate > max_bitrate:
+        return f"{name} {file_type} bitrate of {info.bitrate} bps exceeds the maximum of {max_bitrate} bps."
+
+
+def _check_url(platform, limits, url):
+    # Check if the URL is well-formed
+    if not URL_REGEX.match(url):
+        return f"Invalid URL format: {url}"
+
+    # Validate URL length
+    max_url_length = limits.get('max_url_length', 2000)
+    if len(url) > max_url_length:
+        return f"URL exceeds the maximum length of {max_url_length} characters."
+
+    # You could add further checks based on platform restrictions, e.g., supported domains.
+    supported_domains = limits.get('supported_url_domains', [])
+    if supported_domains:
+        domain = url.split('/')[2]
+        if domain not in supported_domains:
+            return f"The URL domain {domain} is not supported by {platform.capitalize()}."
+
+
+def validate_many(items, platforms):
+    """
+    Validate a whole campaign against several platforms in one pass.
+
+    Each item is a dict with any of `content` (text), `media` (a file path or list of paths),
+    `media_type` ('image', 'video' or 'document'; detected from the extension if omitted) and
+    `url`. Every file is stat'ed and probed once, however many platforms it is checked against. Returns one
+    ValidationResult per (item, platform) instead of raising on the first error.
+    """
+    all_limits = load_platform_limits()
+    stats = {}
+    results = []
+    for index, item in enumerate(items):
+        media = item.get('media') or []
+        media_files = [media] if isinstance(media, str) else list(media)
+        for file_path in media_files:
+            if file_path not in stats:
+                stats[file_path] = _stat(file_path)
+
+        for platform in platforms:
+            result = ValidationResult(item=index, platform=platform)
+            results.append(result)
+            limits = all_limits.get(platform)
+            if limits is None:
+                result.errors.append(f"No content limits are defined for {platform}.")
+                continue
+
+            checks = []
+            if item.get('content') is not None:
+                checks.append(_check_text(platform, limits, item['content']))
+            for file_path in media_files:
+                file_type = item.get('media_type') or detect_media_type(file_path)
+                if file_type is None:
+                    checks.append(f"Unsupported media file: {file_path}")
+                else:
+                    checks.append(_check_file(platform, limits, file_path, file_type, stats[file_path]))
+            if item.get('url'):
+                checks.append(_check_url(platform, limits, item['url']))
+            result.errors.extend(error for error in checks if error)
+    return results
+
+
 class ContentValidator:
     """Validates content based on platform-specific requirements."""
 
     def __init__(self, platform):
         self.platform = platform
-        self.PLATFORM_LIMITS = self.load_limits()
+
+    @property
+    def PLATFORM_LIMITS(self):
+        return load_platform_limits()
 
     def load_limits(self):
-        with open('decafluence/validators/platform_limits.json') as f:
-            return json.load(f)
+        return load_platform_limits()
+
+    def _limits(self):
+        return self.PLATFORM_LIMITS[self.platform]
+
+    @staticmethod
+    def _raise_if(error):
+        if error:
+            raise ContentValidationError(error)
 
     def validate_text(self, content):
-        max_length = self.PLATFORM_LIMITS[self.platform]['max_text_length']
-        if len(content) > max_length:
-            raise ContentValidationError(f"{self.platform.capitalize()} content exceeds the maximum length of {max_length} characters.")
+        self._raise_if(_check_text(self.platform, self._limits(), content))
 
     def validate_image(self, image_path):
         self._validate_file(image_path, 'image')
-        
-        if os.path.getsize(image_path) > self.PLATFORM_LIMITS[self.platform]['max_image_size']:
-            raise ContentValidationError(f"{self.platform.capitalize()} image exceeds the maximum size of {self.PLATFORM_LIMITS[self.platform]['max_image_size'] / (1024 * 1024)} MB.")
 
     def validate_video(self, video_path):
         self._validate_file(video_path, 'video')
-        
-        if os.path.getsize(video_path) > self.PLATFORM_LIMITS[self.platform]['max_video_size']:
-            raise ContentValidationError(f"{self.platform.capitalize()} video exceeds the maximum size of {self.PLATFORM_LIMITS[self.platform]['max_video_size'] / (1024 * 1024)} MB.")
 
     def validate_document(self, document_path):
         self._validate_file(document_path, 'document')
 
-        if os.path.getsize(document_path) > self.PLATFORM_LIMITS[self.platform]['max_document_size']:
-            raise ContentValidationError(f"{self.platform.capitalize()} document exceeds the maximum size of {self.PLATFORM_LIMITS[self.platform]['max_document_size'] / (1024 * 1024)} MB.")
-
     def validate_url(self, url):
         """
         Validates the URL to check if it is well-formed.
         It also ensures the URL is not too long and that it is supported by the platform.
         """
-        # Check if the URL is well-formed
-        regex = re.compile(
-            r'^(?:http|ftp)s?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]*[A-Z0-9])?\.)+(?:[A-Z]{2,})'  # domain (supporting all TLDs)
-            r'|'  # or
-            r'localhost|'  # localhost
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # or IPv4
-            r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # or IPv6
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE  # path (optional)
-        )
-
-        
-        if not re.match(regex, url):
-            raise ContentValidationError(f"Invalid URL format: {url}")
-        
-        # Validate URL length
-        max_url_length = self.PLATFORM_LIMITS[self.platform].get('max_url_length', 2000)
-        if len(url) > max_url_length:
-            raise ContentValidationError(f"URL exceeds the maximum length of {max_url_length} characters.")
-        
-        # You could add further checks based on platform restrictions, e.g., supported domains.
-        # For example:
-        supported_domains = self.PLATFORM_LIMITS[self.platform].get('supported_url_domains', [])
-        if supported_domains:
-            domain = url.split('/')[2]
-            if domain not in supported_domains:
-                raise ContentValidationError(f"The URL domain {domain} is not supported by {self.platform.capitalize()}.")
+        self._raise_if(_check_url(self.platform, self._limits(), url))
 
     def _validate_file(self, file_path, file_type):
-        if not os.path.isfile(file_path):
-            raise ContentValidationError(f"{file_type.capitalize()} file not found: {file_path}")
-
-        if file_type == 'image' and not file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-            raise ContentValidationError(f"Invalid image format for {self.platform.capitalize()}. Only PNG, JPG, and GIF are allowed.")
-
-        if file_type == 'video' and not file_path.lower().endswith(('.mp4', '.mov', '.avi')):
-            raise ContentValidationError(f"Invalid video format for {self.platform.capitalize()}. Only MP4, MOV, and AVI are allowed.")
-
-        if file_type == 'document' and not file_path.lower().endswith(('.pdf', '.docx', '.pptx')):
-            raise ContentValidationError(f"Invalid document format for {self.platform.capitalize()}. Only PDF, DOCX, and PPTX are allowed.")
+        # One stat covers the existence, file-type and size checks and keys the probe cache
+        self._raise_if(_check_file(self.platform, self._limits(), file_path, file_type, _stat(file_path)))
@@ -0,0 +1,193 @@
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+MAX_PROBE_CACHE_ENTRIES = 4096
+MAX_MOOV_SIZE = 64 * 1024 * 1024  # Larger moov atoms are not read; the file is reported without stream details
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+QUICKTIME_BRANDS = (b'qt  ',)
+
+_probe_lock = threading.Lock()
+_probe_cache = {}  # (path, size, mtime_ns) -> MediaInfo or None
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """What a media file's headers say about it; fields that could not be read are None."""
+    kind: str  # 'image', 'video' or 'document'
+    format: str  # 'png', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'pdf' or 'zip'
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration: Optional[float] = None  # Seconds
+    bitrate: Optional[int] = None  # Bits per second, averaged over the whole file
+    codec: Optional[str] = None  # Sample entry of the first video track, e.g. 'avc1'
+
+
+def probe_media(file_path, stat_result=None):
+    """
+    Identify a media file from its magic bytes and read its dimensions, and for MP4/MOV its
+    duration, bitrate and codec, without reading more than the headers. Results are memoized by
+    (path, size, mtime), so probing the same file for several platforms reads it once.
+    Returns None if the content is not a recognised format.
+    """
+    stat_result = stat_result or os.stat(file_path)
+    key = (os.path.abspath(file_path), stat_result.st_size, stat_result.st_mtime_ns)
+    with _probe_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    with open(file_path, 'rb') as media_file:
+        try:
+            info = _probe(media_file, stat_result.st_size)
+        except struct.error:
+            info = None  # Truncated or corrupt headers
+
+    with _probe_lock:
+        if len(_probe_cache) >= MAX_PROBE_CACHE_ENTRIES:
+            _probe_cache.pop(next(iter(_probe_cache)))
+        _probe_cache[key] = info
+    return info
+
+
+def _probe(media_file, file_size):
+    head = media_file.read(32)
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', head[16:24])
+        return MediaInfo('image', 'png', width, height)
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', head[6:10])
+        return MediaInfo('image', 'gif', width, height)
+    if head.startswith(b'\xff\xd8'):
+        return _probe_jpeg(media_file)
+    if head[4:8] == b'ftyp' or head[4:8] in (b'moov', b'mdat', b'wide', b'free'):
+        return _probe_mp4(media_file, file_size)
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return MediaInfo('video', 'avi')
+    if head.startswith(b'%PDF'):
+        return MediaInfo('document', 'pdf')
+    if head.startswith(b'PK\x03\x04'):
+        return MediaInfo('document', 'zip')  # DOCX and PPTX are zip containers
+    return None
+
+
+def _probe_jpeg(media_file):
+    """Walk the JPEG marker segments, seeking over their payloads, until a start-of-frame."""
+    media_file.seek(2)
+    while True:
+        byte = media_file.read(1)
+        while byte and byte != b'\xff':
+            byte = media_file.read(1)
+        while byte == b'\xff':  # Skip fill bytes
+            byte = media_file.read(1)
+        if not byte:
+            return MediaInfo('image', 'jpeg')
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue  # Markers without a payload
+        if marker in (0xD9, 0xDA):
+            return MediaInfo('image', 'jpeg')  # Reached image data without a frame header
+        length_bytes = media_file.read(2)
+        if len(length_bytes) < 2:
+            return MediaInfo('image', 'jpeg')
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = media_file.read(5)
+            if len(frame) < 5:
+                return MediaInfo('image', 'jpeg')
+            height, width = struct.unpack('>HH', frame[1:5])
+            return MediaInfo('image', 'jpeg', width, height)
+        media_file.seek(length - 2, os.SEEK_CUR)
+
+
+def _file_atoms(media_file, file_size):
+    """Yield (type, payload offset, end offset) for the top-level atoms, seeking over payloads."""
+    offset = 0
+    while offset + 8 <= file_size:
+        media_file.seek(offset)
+        size, atom_type = struct.unpack('>I4s', media_file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', media_file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return
+        yield atom_type, offset + header_size, offset + size
+        offset += size
+
+
+def _buffer_atoms(buffer, start=0, end=None):
+    """Yield (type, payload) for the atoms in buffer[start:end]."""
+    end = len(buffer) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, atom_type = struct.unpack_from('>I4s', buffer, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', buffer, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            return
+        yield atom_type, buffer[offset + header_size:offset + size]
+        offset += size
+
+
+def _child(payload, *path):
+    """Return the payload of the first atom along a path of nested atom types."""
+    for atom_type in path:
+        for child_type, child_payload in _buffer_atoms(payload):
+            if child_type == atom_type:
+                payload = child_payload
+                break
+        else:
+            return None
+    return payload
+
+
+def _probe_mp4(media_file, file_size):
+    media_format = 'mp4'
+    moov = None
+    for atom_type, start, end in _file_atoms(media_file, file_size):
+        if atom_type == b'ftyp':
+            media_file.seek(start)
+            if media_file.read(4) in QUICKTIME_BRANDS:
+                media_format = 'mov'
+        elif atom_type == b'moov':
+            if end - start <= MAX_MOOV_SIZE:
+                media_file.seek(start)
+                moov = media_file.read(end - start)
+            break
+    if moov is None:
+        return MediaInfo('video', media_format)
+
+    duration = None
+    mvhd = _child(moov, b'mvhd')
+    if mvhd:
+        if mvhd[0] == 1:
+            timescale, length = struct.unpack_from('>IQ', mvhd, 20)
+        else:
+            timescale, length = struct.unpack_from('>II', mvhd, 12)
+        duration = length / timescale if timescale else None
+
+    width = height = codec = None
+    for atom_type, trak in _buffer_atoms(moov):
+        if atom_type != b'trak':
+            continue
+        hdlr = _child(trak, b'mdia', b'hdlr')
+        if not hdlr or hdlr[8:12] != b'vide':
+            continue
+        tkhd = _child(trak, b'tkhd')
+        if tkhd and len(tkhd) >= 8:
+            width, height = (value >> 16 for value in struct.unpack('>II', tkhd[-8:]))
+        stsd = _child(trak, b'mdia', b'minf', b'stbl', b'stsd')
+        if stsd and len(stsd) >= 16:
+            codec = stsd[12:16].decode('latin-1').strip()
+        break
+
+    bitrate = int(file_size * 8 / duration) if duration else None
+    return MediaInfo('video', media_format, width, height, duration, bitrate, codec)
@@ -1,41 +1,46 @@
-import json
-from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
-import os
-from google.cloud import secretmanager
 import os
+import threading
+from dotenv import load_dotenv
+from credentials_provider import get_default_credential_provider
 
 load_dotenv()
 
-def _get_credentials_from_secret_manager(project_id, secret_id):
-    """Fetch credentials from Secret Manager."""
-    try:
-        # logger.info(f"Accessing Secret Manager in project: {project_id}")
-        client = secretmanager.SecretManagerServiceClient()
-        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        credentials_json = json.loads(response.payload.data.decode("UTF-8"))
-        # logger.info("Successfully retrieved credentials from Secret Manager")
-        return credentials_json
-    except Exception as e:
-        # logger.error(f"Error accessing Secret Manager: {str(e)}")
-        raise
+_firestore_client = None
+_firestore_client_lock = threading.Lock()
 
 def initialize_firebase():
     """
-    Initializes Firebase Admin SDK securely.
+    Initializes Firebase Admin SDK securely and returns the Firestore client.
+    Safe to call repeatedly; the work is only done once per process.
+    """
+    return get_firestore_client()
+
+def get_firestore_client():
+    """
+    Return the process-wide Firestore client, initializing Firebase on first use.
+    Nothing here runs at import time, so importing modules that use Firestore costs no network I/O.
     """
-    if not firebase_admin._apps:  # Ensures Firebase isn't initialized multiple times
-        # Load credentials securely from an environment variable
-        client = _get_credentials_from_secret_manager(
-                os.getenv('gcp_project_id'),
-                os.getenv('credentials_secret_id')
-            )
-        
-        cred = credentials.Certificate(client)
-        firebase_admin.initialize_app(cred)
-    return firestore.client()
+    global _firestore_client
+    if _firestore_client is None:
+        with _firestore_client_lock:
+            if _firestore_client is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+
+                if not firebase_admin._apps:  # Ensures Firebase isn't initialized multiple times
+                    # Load credentials securely from an environment variable
+                    client = get_default_credential_provider().get(
+                            os.getenv('gcp_project_id'),
+                            os.getenv('credentials_secret_id')
+                        )
+
+                    cred = credentials.Certificate(client)
+                    firebase_admin.initialize_app(cred)
+                _firestore_client = firestore.client()
+    return _firestore_client
 
-# Initialize Firestore client globally for reuse
-firestore_client = initialize_firebase()
+def __getattr__(name):
+    # Keeps `firebase_config.firestore_client` working, now resolved on first access
+    if name == 'firestore_client':
+        return get_firestore_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,43 +1,47 @@
 # gcp_config.py
-import json
-from google.cloud import storage
-from google.cloud import secretmanager
 import os
-from google.auth import exceptions
+import threading
+from credentials_provider import get_default_credential_provider
 
-def _get_credentials_from_secret_manager(project_id, secret_id):
-    """Fetch credentials from Secret Manager."""
-    try:
-        # logger.info(f"Accessing Secret Manager in project: {project_id}")
-        client = secretmanager.SecretManagerServiceClient()
-        name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        credentials_json = json.loads(response.payload.data.decode("UTF-8"))
-        # logger.info("Successfully retrieved credentials from Secret Manager")
-        return credentials_json
-    except Exception as e:
-        # logger.error(f"Error accessing Secret Manager: {str(e)}")
-        raise
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
+def get_storage_client():
+    """
+    Return the process-wide Google Cloud Storage client, created on first use.
+    Nothing here runs at import time, so importing modules that use GCS costs no network I/O.
+    """
+    global _storage_client
+    if _storage_client is None:
+        with _storage_client_lock:
+            if _storage_client is None:
+                from google.cloud import storage
+
+                # Fetch the path to the service account key from the environment variable
+                gcp_credentials_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+
+                if gcp_credentials_path:
+                    # If credentials path is found, build the client from the service account in Secret Manager
+                    credentials_info = get_default_credential_provider().get(
+                        os.getenv('gcp_project_id'),
+                        os.getenv('credentials_secret_id')
+                    )
+                    _storage_client = storage.Client.from_service_account_info(credentials_info)
+                else:
+                    # If the environment variable is not set, the client will automatically look for credentials
+                    # set via other mechanisms (like gcloud auth application-default login)
+                    print("Using default credentials for GCP Storage.")
+                    _storage_client = storage.Client()
+    return _storage_client
 
 def initialize_gcp_storage():
     """
     Initialize Google Cloud Storage client and return the bucket object.
     """
+    from google.auth import exceptions
+
     try:
-        # Fetch the path to the service account key from the environment variable
-        gcp_credentials_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        
-        if gcp_credentials_path:
-            # If credentials path is found, use it to initialize the storage client
-            client = _get_credentials_from_secret_manager(
-                os.getenv('gcp_project_id'),
-                os.getenv('credentials_secret_id')
-            )
-        else:
-            # If the environment variable is not set, the client will automatically look for credentials
-            # set via other mechanisms (like gcloud auth application-default login)
-            print("Using default credentials for GCP Storage.")
-            client = storage.Client()
+        client = get_storage_client()
 
         # Fetch the GCP bucket name from environment variables
         bucket_name = os.getenv('GCP_BUCKET_NAME')
@@ -35,6 +35,7 @@ def test_instagram_connector():
         # Step 3: Initialize Instagram Publisher Service
         logger.info("Initializing Instagram Publisher Service...")
         publisher_service = InstagramPublisherService(oauth_helper)
+        publisher_service.staging.start_janitor()  # Deletes staged media once it is no longer needed
 
         # Step 4: Test posting an image
         image_path = 'E:/Projects/Decafluence/decafluence/decafluence_social_package/OfficialMeetLogo.jpg'
@@ -4,7 +4,8 @@ setup(
     name='decafluence_social_package',
     version='0.1',
     packages=find_packages(),
-    install_requires=['requests', 'firebase-admin'],
+    package_data={'decafluence.validators': ['platform_limits.json']},
+    install_requires=['requests', 'aiohttp', 'firebase-admin'],
     description='Social media management package for Decafluence Corp',
     author='Decafluence Dev Team',
 )
@@ -0,0 +1,39 @@
+import asyncio
+
+from aiohttp import web
+
+from decafluence.transport.async_http_transport import AsyncHttpTransport
+from decafluence.transport.concurrency_limiter import HostConcurrencyLimiters
+from decafluence.transport.quota_tracker import QuotaTracker
+
+
+def test_upload_bodies_are_left_out_of_latency_baselines(tmp_path):
+    media = tmp_path / 'image.jpg'
+    media.write_bytes(b'jpeg bytes' * 1000)
+
+    async def accept(request):
+        await request.read()
+        return web.json_response({'ok': True})
+
+    async def main():
+        app = web.Application()
+        app.router.add_put('/upload', accept)
+        app.router.add_get('/status', accept)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        host, port = runner.addresses[0][:2]
+        limiters = HostConcurrencyLimiters()
+        transport = AsyncHttpTransport(quota_tracker=QuotaTracker(), concurrency_limiters=limiters)
+        base_url = f"http://{host}:{port}"
+        try:
+            with open(media, 'rb') as media_file:
+                await transport.put(f"{base_url}/upload", data=media_file)
+            await transport.put(f"{base_url}/upload", data=media.read_bytes())
+            await transport.get(f"{base_url}/status")
+            return limiters.for_host(host).snapshot()['baseline_latency']
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    assert set(asyncio.run(main())) == {'GET /status'}
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from decafluence.transport.concurrency_limiter import AdaptiveConcurrencyLimiter, HostConcurrencyLimiters, endpoint_of
+
+UPLOAD = ('POST', '/upload')
+STATUS = ('GET', '/v1/:id')
+
+
+def test_requests_over_the_limit_wait_in_order():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter('host', initial_limit=2)
+        first = await limiter.acquire()
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in ('a', 'b')]
+        await asyncio.sleep(0)
+        assert limiter.snapshot()['waiting'] == 2
+        limiter.release_unused()
+        limiter.release(first, status=200)
+        await asyncio.gather(*waiters)
+        return order, limiter.in_flight
+
+    assert asyncio.run(main()) == (['a', 'b'], 2)
+
+
+def test_overload_cuts_limit_once_per_burst():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter('host', initial_limit=8)
+        slots = [await limiter.acquire() for _ in range(4)]
+        for started_at in slots:
+            limiter.release(started_at, status=503)
+        cut_once = limiter.limit
+        limiter.release(await limiter.acquire(), error=True)
+        return cut_once, limiter.limit
+
+    assert asyncio.run(main()) == (4, 2)
+
+
+def test_limit_grows_only_while_saturated():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter('host', initial_limit=2)
+        limiter.release(await limiter.acquire(), status=200)
+        idle = limiter._limit
+        for _ in range(4):
+            slots = [await limiter.acquire() for _ in range(limiter.limit)]
+            for started_at in slots:
+                limiter.release(started_at, status=200)
+        return idle, limiter.limit
+
+    idle, grown = asyncio.run(main())
+    assert idle == 2.0
+    assert grown > 2
+
+
+def test_cancelled_requests_leave_limit_unchanged():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter('host', initial_limit=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        limiter.release_unused()
+        limiter.release_unused()
+        return limiter._limit, limiter.in_flight
+
+    assert asyncio.run(main()) == (2.0, 0)
+
+
+def test_latency_is_judged_per_endpoint():
+    async def main():
+        limiter = AdaptiveConcurrencyLimiter('host', initial_limit=10)
+        for _ in range(20):
+            limiter.release(await limiter.acquire(), status=200, latency=0.1, endpoint=STATUS)
+        for _ in range(5):
+            limiter.release(await limiter.acquire(), status=200, latency=2.0, endpoint=UPLOAD)
+        steady = limiter.limit
+        time.sleep(0.001)
+        limiter.release(await limiter.acquire(), status=200, latency=1.0, endpoint=STATUS)
+        return steady, limiter.limit, limiter.snapshot()['baseline_latency']
+
+    steady, after_spike, baselines = asyncio.run(main())
+    assert steady == 10  # A slow endpoint doesn't count as a spike against a fast one
+    assert after_spike == 5
+    assert set(baselines) == {'GET /v1/:id', 'POST /upload'}
+
+
+def test_endpoint_of_folds_object_ids():
+    assert endpoint_of('get', 'https://graph.facebook.com/v19.0/1234567890/feed?x=1') == ('GET', '/v19.0/:id/feed')
+    assert endpoint_of('POST', 'https://api.x.com/2/tweets') == ('POST', '/2/tweets')
+
+
+def test_host_limiters_are_shared_per_host():
+    limiters = HostConcurrencyLimiters(initial_limit=3)
+    assert limiters.for_host('a') is limiters.for_host('a')
+    assert limiters.for_host('b').limit == 3
+    assert set(limiters.limits()) == {'a', 'b'}
@@ -0,0 +1,49 @@
+import pytest
+
+from decafluence.publisher_services.facebook_publisher_service import AsyncFacebookPublisherService
+from decafluence.publisher_services.instagram_publisher_service import AsyncInstagramPublisherService
+from decafluence.publisher_services.linkedin_publisher_service import AsyncLinkedInPublisherService
+from decafluence.publisher_services.x_publisher_service import AsyncXPublisherService
+from decafluence.publisher_services.youtube_publisher_service import AsyncYouTubePublisherService
+from decafluence.validators.content_validators import (
+    ContentValidationError, ContentValidator, load_platform_limits, validate_many,
+)
+
+PUBLISHERS = {
+    'facebook': AsyncFacebookPublisherService,
+    'instagram': AsyncInstagramPublisherService,
+    'linkedin': AsyncLinkedInPublisherService,
+    'x': AsyncXPublisherService,
+    'youtube': AsyncYouTubePublisherService,
+}
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / 'deck.pdf'
+    path.write_bytes(b'%PDF-1.7' + bytes(1024))
+    return str(path)
+
+
+def test_unsupported_media_type_is_rejected_by_name(document):
+    with pytest.raises(ContentValidationError, match="Youtube does not support document posts."):
+        ContentValidator('youtube').validate_document(document)
+
+
+def test_supported_document_passes(document):
+    ContentValidator('linkedin').validate_document(document)
+
+
+def test_validate_many_reports_unsupported_type_per_platform(document):
+    results = validate_many([{'content': 'Launch deck', 'media': document}], ['linkedin', 'youtube'])
+    assert [(result.platform, result.errors) for result in results] == [
+        ('linkedin', []),
+        ('youtube', ["Youtube does not support document posts."]),
+    ]
+
+
+@pytest.mark.parametrize('platform', sorted(PUBLISHERS))
+def test_size_limits_match_the_media_types_each_publisher_supports(platform):
+    limited = {key[len('max_'):-len('_size')] for key in load_platform_limits()[platform]
+               if key.startswith('max_') and key.endswith('_size')}
+    assert limited == PUBLISHERS[platform].supported_media_types - {'text'}
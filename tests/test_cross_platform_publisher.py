@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from decafluence.oauth_helpers.facebook_oauth_helper import FacebookOAuthHelper
+from decafluence.oauth_helpers.instagram_oauth_helper import InstagramOAuthHelper
+from decafluence.oauth_helpers.linkedin_oauth_helper import LinkedInOAuthHelper
+from decafluence.oauth_helpers.token_cache import TokenCache
+from decafluence.oauth_helpers.x_oauth_helper import XOAuthHelper
+from decafluence.publisher_services.cross_platform_publisher import AsyncCrossPlatformPublisher, PublishResult
+
+USER_DOCUMENTS = {
+    'linkedin': {'access_token': 'li', 'platform': 'linkedin'},
+    'facebook': {'token_data': {'access_token': 'fb'}, 'pages': []},
+    'instagram': {'token_data': {'access_token': 'ig'}, 'user_info': {'id': '17841'}},
+    'x': {'oauth_token': 'token', 'oauth_token_secret': 'secret'},
+}
+
+
+class FakePublisher:
+    def __init__(self, oauth_helper, supported_media_types=('text',)):
+        self.oauth_helper = oauth_helper
+        self.supported_media_types = supported_media_types
+        self.posts = []
+
+    def supports(self, media_type):
+        return media_type in self.supported_media_types
+
+    async def post_text(self, user_id, content):
+        self.posts.append((user_id, content))
+        return {'id': '1'}
+
+
+@pytest.fixture
+def token_cache():
+    return TokenCache()
+
+
+@pytest.fixture
+def publishers(token_cache):
+    return {
+        'linkedin': FakePublisher(LinkedInOAuthHelper(token_cache=token_cache)),
+        'facebook': FakePublisher(FacebookOAuthHelper(token_cache=token_cache)),
+        'instagram': FakePublisher(InstagramOAuthHelper(token_cache=token_cache)),
+        'x': FakePublisher(XOAuthHelper(token_cache=token_cache)),
+        'youtube': FakePublisher(None, supported_media_types=('video',)),
+    }
+
+
+@pytest.mark.parametrize('platform', sorted(USER_DOCUMENTS))
+def test_only_platforms_in_the_user_document_are_published_to(platform, publishers, token_cache):
+    token_cache.set('user-1', USER_DOCUMENTS[platform])
+    results = asyncio.run(AsyncCrossPlatformPublisher(publishers).publish_everywhere('user-1', 'hello'))
+
+    assert results[platform].ok
+    assert publishers[platform].posts == [('user-1', 'hello')]
+    assert isinstance(results['youtube'].error, NotImplementedError)
+    for other in set(USER_DOCUMENTS) - {platform}:
+        assert results[other].status == PublishResult.SKIPPED
+        assert publishers[other].posts == []
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from decafluence.publisher_services.instagram_container_poller import InstagramContainerPoller
+
+
+def graph_response(status, payload):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class StandInGraph:
+    """Answers ?ids= lookups as finished, unless a rejected id is among them."""
+
+    def __init__(self, rejected=(), error=None):
+        self.rejected = set(rejected)
+        self.error = error
+        self.lookups = []
+
+    async def get(self, url, params=None):
+        ids = params['ids'].split(',')
+        self.lookups.append(ids)
+        if self.error:
+            raise self.error
+        if self.rejected & set(ids):
+            return graph_response(400, {'error': {'message': 'Invalid id'}})
+        return graph_response(200, {container_id: {'status_code': 'FINISHED'} for container_id in ids})
+
+
+def wait_all(poller, container_ids):
+    async def main():
+        waits = [poller.wait('token', container_id) for container_id in container_ids]
+        return await asyncio.wait_for(asyncio.gather(*waits, return_exceptions=True), timeout=5)
+    return asyncio.run(main())
+
+
+def test_rejected_lookup_fails_only_the_bad_container():
+    graph = StandInGraph(rejected={'bad'})
+    poller = InstagramContainerPoller(transport=graph, initial_delay=0.01)
+
+    good, also_good, bad = wait_all(poller, ['1', '2', 'bad'])
+    assert good is None and also_good is None
+    assert isinstance(bad, requests.HTTPError)
+    assert graph.lookups[0] == ['1', '2', 'bad']
+    assert sorted(graph.lookups[1:]) == [['1'], ['2'], ['bad']]
+    assert poller.pending_count() == 0
+
+
+def test_unexpected_error_reaches_every_waiting_caller():
+    poller = InstagramContainerPoller(transport=StandInGraph(error=RuntimeError('boom')), initial_delay=0.01)
+
+    results = wait_all(poller, ['1', '2'])
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert poller.pending_count() == 0
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_transient_errors_keep_polling(status):
+    class Flaky(StandInGraph):
+        async def get(self, url, params=None):
+            if not self.lookups:
+                self.lookups.append(params['ids'].split(','))
+                return graph_response(status, {})
+            return await super().get(url, params)
+
+    graph = Flaky()
+    poller = InstagramContainerPoller(transport=graph, initial_delay=0.01, max_delay=0.01)
+    assert wait_all(poller, ['1']) == [None]
+    assert len(graph.lookups) == 2
@@ -0,0 +1,55 @@
+import asyncio
+import struct
+
+import pytest
+
+from decafluence.publisher_services.instagram_publisher_service import AsyncInstagramPublisherService
+from decafluence.transport.quota_tracker import QuotaTracker
+from decafluence.validators.content_validators import ContentValidationError
+
+
+class RecordingStaging:
+    def __init__(self):
+        self.staged = []
+
+    def stage(self, media):
+        self.staged.append(media)
+        return media
+
+    def release(self, media_url):
+        pass
+
+
+class NoTokenHelper:
+    async def get_user_document_async(self, user_id):
+        raise AssertionError("validation should fail before the token lookup")
+
+
+def png(tmp_path, name, width, height):
+    path = tmp_path / name
+    path.write_bytes(b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', width, height) + bytes(16))
+    return str(path)
+
+
+@pytest.fixture
+def staging():
+    return RecordingStaging()
+
+
+@pytest.fixture
+def service(staging):
+    return AsyncInstagramPublisherService(NoTokenHelper(), transport=object(), poller=object(), staging=staging,
+                                          quota_tracker=QuotaTracker())
+
+
+def test_image_outside_aspect_ratio_fails_before_staging(tmp_path, service, staging):
+    with pytest.raises(ContentValidationError, match="aspect ratio"):
+        asyncio.run(service.post_image('user-1', 'caption', png(tmp_path, 'wide.png', 2000, 500)))
+    assert staging.staged == []
+
+
+def test_carousel_items_are_validated_before_staging(tmp_path, service, staging):
+    items = [png(tmp_path, 'ok.png', 1080, 1080), png(tmp_path, 'small.png', 200, 200)]
+    with pytest.raises(ContentValidationError, match="width of 200px"):
+        asyncio.run(service.post_carousel('user-1', 'caption', items))
+    assert staging.staged == []
@@ -0,0 +1,91 @@
+import time
+
+from decafluence.jobs.job_store import JobStore, PublishJob
+
+
+def make_store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+def test_enqueue_claim_complete(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.enqueue('x', 'post_text', {'user_id': 'u1', 'content': 'hi'}, max_attempts=3)
+
+    job = store.claim('worker-1', lease_seconds=60)
+    assert job.id == job_id
+    assert job.status == PublishJob.RUNNING
+    assert job.attempts == 1
+    assert job.arguments == {'user_id': 'u1', 'content': 'hi'}
+    assert store.claim('worker-2', lease_seconds=60) is None
+
+    store.complete(job_id, 'worker-1', {'id': '42'})
+    job = store.get(job_id)
+    assert job.done and job.status == PublishJob.SUCCEEDED
+    assert job.result == {'id': '42'}
+    assert store.counts() == {PublishJob.SUCCEEDED: 1}
+
+
+def test_failed_attempt_is_requeued_after_delay(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.enqueue('x', 'post_text', {}, max_attempts=3)
+    store.claim('worker-1', lease_seconds=60)
+
+    store.fail(job_id, 'worker-1', 'HTTPError: 503', retry_delay=0.2)
+    assert store.get(job_id).status == PublishJob.QUEUED
+    assert store.claim('worker-1', lease_seconds=60) is None
+    time.sleep(0.25)
+    job = store.claim('worker-1', lease_seconds=60)
+    assert job.id == job_id and job.attempts == 2 and job.error == 'HTTPError: 503'
+
+    store.fail(job_id, 'worker-1', 'HTTPError: 400')
+    assert store.get(job_id).status == PublishJob.FAILED
+
+
+def test_expired_lease_is_claimed_again_and_stale_worker_is_ignored(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.enqueue('x', 'post_text', {}, max_attempts=3)
+    store.claim('crashed', lease_seconds=0.05)
+    time.sleep(0.1)
+
+    job = store.claim('worker-2', lease_seconds=60)
+    assert job.id == job_id and job.attempts == 2
+
+    store.complete(job_id, 'crashed', {'id': 'stale'})  # The old lease holder no longer owns the job
+    assert store.get(job_id).status == PublishJob.RUNNING
+    store.complete(job_id, 'worker-2', {'id': '1'})
+    assert store.get(job_id).result == {'id': '1'}
+
+
+def test_extend_leases_keeps_job_owned(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.enqueue('x', 'post_text', {}, max_attempts=3)
+    store.claim('worker-1', lease_seconds=0.1)
+    store.extend_leases('worker-1', [job_id], lease_seconds=60)
+    time.sleep(0.15)
+    assert store.claim('worker-2', lease_seconds=60) is None
+
+
+def test_jobs_survive_reopening_and_purge(tmp_path):
+    job_id = make_store(tmp_path).enqueue('x', 'post_text', {'content': 'hi'}, max_attempts=1)
+    store = make_store(tmp_path)
+    assert store.get(job_id).arguments == {'content': 'hi'}
+
+    store.claim('worker-1', lease_seconds=60)
+    store.complete(job_id, 'worker-1', None)
+    assert store.purge_finished(older_than=3600) == 0
+    assert store.purge_finished(older_than=0) == 1
+    assert store.get(job_id) is None
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(tmp_path):
+    store = make_store(tmp_path)
+    job_id = store.enqueue('x', 'post_text', {}, max_attempts=2)
+    store.claim('crashed-1', lease_seconds=0.05)
+    time.sleep(0.1)
+    assert store.claim('crashed-2', lease_seconds=0.05).attempts == 2
+    time.sleep(0.1)
+
+    assert store.claim('worker-3', lease_seconds=60) is None
+    job = store.get(job_id)
+    assert job.status == PublishJob.FAILED and job.attempts == 2
+    assert 'Lease expired' in job.error
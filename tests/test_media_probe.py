@@ -0,0 +1,68 @@
+import struct
+
+from decafluence.validators.media_probe import MediaInfo, probe_media
+
+
+def atom(atom_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), atom_type) + payload
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def mp4(brand=b'isom', duration=10, timescale=1000, width=1920, height=1080, codec=b'avc1', mdat_size=1000):
+    mvhd = bytes(12) + struct.pack('>II', timescale, duration * timescale) + bytes(80)
+    tkhd = bytes(76) + struct.pack('>II', width << 16, height << 16)
+    hdlr = bytes(8) + b'vide' + bytes(12)
+    stsd = bytes(8) + struct.pack('>I', 86) + codec + bytes(78)
+    trak = atom(b'trak', atom(b'tkhd', tkhd) + atom(b'mdia', atom(b'hdlr', hdlr) + atom(
+        b'minf', atom(b'stbl', atom(b'stsd', stsd)))))
+    return atom(b'ftyp', brand + bytes(4)) + atom(b'mdat', bytes(mdat_size)) + atom(b'moov', atom(b'mvhd', mvhd) + trak)
+
+
+def test_png_and_gif_dimensions(tmp_path):
+    png = b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', 640, 480) + bytes(16)
+    assert probe_media(write(tmp_path, 'a.png', png)) == MediaInfo('image', 'png', 640, 480)
+    gif = b'GIF89a' + struct.pack('<HH', 320, 200) + bytes(22)
+    assert probe_media(write(tmp_path, 'a.gif', gif)) == MediaInfo('image', 'gif', 320, 200)
+
+
+def test_jpeg_dimensions_after_other_segments(tmp_path):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + bytes(14)
+    sof0 = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 720, 1280) + bytes(10)
+    jpeg = b'\xff\xd8' + app0 + sof0 + b'\xff\xd9'
+    assert probe_media(write(tmp_path, 'a.jpg', jpeg)) == MediaInfo('image', 'jpeg', 1280, 720)
+
+
+def test_mp4_duration_bitrate_and_codec(tmp_path):
+    path = write(tmp_path, 'a.mp4', mp4())
+    info = probe_media(path)
+    assert (info.kind, info.format, info.width, info.height, info.codec) == ('video', 'mp4', 1920, 1080, 'avc1')
+    assert info.duration == 10
+    assert info.bitrate == int(len(mp4()) * 8 / 10)
+
+
+def test_quicktime_brand_is_mov(tmp_path):
+    assert probe_media(write(tmp_path, 'a.mov', mp4(brand=b'qt  '))).format == 'mov'
+
+
+def test_documents_and_unknown_content(tmp_path):
+    assert probe_media(write(tmp_path, 'a.pdf', b'%PDF-1.7' + bytes(40))) == MediaInfo('document', 'pdf')
+    assert probe_media(write(tmp_path, 'a.docx', b'PK\x03\x04' + bytes(40))) == MediaInfo('document', 'zip')
+    assert probe_media(write(tmp_path, 'a.png', b'this is not an image' + bytes(20))) is None
+
+
+def test_truncated_files(tmp_path):
+    # A cut-off MP4 is still a video, just without the stream details held in its missing moov
+    assert probe_media(write(tmp_path, 'a.mp4', mp4()[:60])) == MediaInfo('video', 'mp4')
+    assert probe_media(write(tmp_path, 'b.gif', b'GIF89a\x01')) is None
+
+
+def test_results_follow_file_changes(tmp_path):
+    path = write(tmp_path, 'a.gif', b'GIF89a' + struct.pack('<HH', 1, 1) + bytes(22))
+    assert probe_media(path).width == 1
+    write(tmp_path, 'a.gif', b'GIF89a' + struct.pack('<HH', 2, 2) + bytes(40))
+    assert probe_media(path).width == 2
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from decafluence.staging.media_staging import MediaStagingCache
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.blobs = set()
+
+    def touch(self, blob_name):
+        return blob_name in self.blobs
+
+    def upload(self, file_path, blob_name, content_type=None):
+        self.blobs.add(blob_name)
+
+    def signed_url(self, blob_name):
+        return f"https://storage.example.com/{blob_name}"
+
+    def delete_many(self, blob_names):
+        self.blobs -= set(blob_names)
+        return []
+
+    def list_staged(self, prefix):
+        return []
+
+
+@pytest.fixture
+def cache():
+    cache = MediaStagingCache(backend=MemoryBackend(), ttl=0)
+    yield cache
+    if cache._janitor is not None:
+        cache._janitor.stop()
+
+
+def test_first_local_stage_starts_janitor_which_deletes_released_blobs(tmp_path, cache):
+    assert cache.stage('https://cdn.example.com/photo.jpg') == 'https://cdn.example.com/photo.jpg'
+    assert cache._janitor is None  # Remote URLs stage nothing
+
+    media = tmp_path / 'photo.jpg'
+    media.write_bytes(b'jpeg bytes')
+    url = cache.stage(str(media))
+    assert cache._janitor is not None and cache.backend.blobs
+
+    cache.release(url)
+    cache._janitor.wake()
+    deadline = time.time() + 5
+    while cache.backend.blobs and time.time() < deadline:
+        time.sleep(0.01)
+    assert not cache.backend.blobs
@@ -0,0 +1,73 @@
+import asyncio
+import sqlite3
+import time
+
+from decafluence.jobs.job_store import JobStore, PublishJob
+from decafluence.jobs.publish_queue import PublishQueue
+
+
+class Publisher:
+    def __init__(self):
+        self.posts = []
+
+    async def post_text(self, user_id, content):
+        self.posts.append(content)
+        return {'id': str(len(self.posts))}
+
+
+class FlakyStore(JobStore):
+    """Fails the first completion write, as a locked or full database would."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.failed_writes = 0
+
+    def complete(self, job_id, worker, result):
+        if not self.failed_writes:
+            self.failed_writes += 1
+            raise sqlite3.OperationalError("database is locked")
+        super().complete(job_id, worker, result)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_store_error_is_logged_and_worker_keeps_running(tmp_path):
+    store = FlakyStore(str(tmp_path / 'jobs.db'))
+    publisher = Publisher()
+    queue = PublishQueue({'x': publisher}, store, workers=1, poll_interval=0.02, lease_seconds=0.3)
+    queue.start()
+    try:
+        job_id = queue.submit('x', 'post_text', user_id='u1', content='hello')
+        # The unrecorded first run is retried once its lease expires, by the same surviving worker
+        assert wait_for(lambda: queue.status(job_id).status == PublishJob.SUCCEEDED)
+    finally:
+        queue.stop()
+    assert publisher.posts == ['hello', 'hello']
+    assert queue.status(job_id).attempts == 2
+
+
+class SlowPublisher(Publisher):
+    async def post_text(self, user_id, content):
+        await asyncio.sleep(0.3)
+        return await super().post_text(user_id, content)
+
+
+def test_each_worker_thread_leases_under_its_own_id(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    queue = PublishQueue({'x': SlowPublisher()}, store, workers=3, poll_interval=0.02)
+    for index in range(3):
+        queue.submit('x', 'post_text', user_id='u1', content=f'post {index}')
+    queue.start()
+    try:
+        assert wait_for(lambda: queue.counts().get(PublishJob.RUNNING) == 3)
+        workers = [row['worker'] for row in store._connect().execute("SELECT worker FROM jobs")]
+    finally:
+        queue.stop()
+    assert len(set(workers)) == 3
+    assert all(worker.startswith(queue.worker_id + '-') for worker in workers)
+    assert queue.counts() == {PublishJob.SUCCEEDED: 3}
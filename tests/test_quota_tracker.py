@@ -0,0 +1,110 @@
+import json
+import time
+
+import requests
+
+from decafluence.transport.quota_tracker import QuotaTracker
+
+GRAPH_URL = 'https://graph.facebook.com/v19.0/1234567890/feed'
+X_URL = 'https://api.x.com/2/tweets'
+X_AUTH = {'Authorization': 'OAuth oauth_token="user-token", oauth_signature="abc"'}
+
+
+def response(status=200, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    return result
+
+
+def test_keys_for_graph_and_x():
+    assert QuotaTracker.keys_for(GRAPH_URL)[:2] == [('app', 'facebook'), ('business', '1234567890')]
+    x_keys = QuotaTracker.keys_for('https://api.x.com/2/tweets/1234567890123', X_AUTH)
+    assert x_keys[0][0] == 'x' and x_keys[0][2] == 'api.x.com/2/tweets/:id'
+    assert QuotaTracker.keys_for('https://example.com/') == []
+
+
+def test_graph_usage_is_tracked_per_access_token():
+    tracker = QuotaTracker()
+    usage = json.dumps({'call_count': 99})
+    tracker.observe(GRAPH_URL, None, response(headers={'X-App-Usage': usage}), data={'access_token': 'page-a'})
+    token_keys = [key for key in tracker.snapshot() if key.startswith('token:')]
+    assert len(token_keys) == 1 and tracker.snapshot()[token_keys[0]]['usage'] == 99
+
+    # The same token is recognised wherever it is sent
+    for request in ({'params': {'access_token': 'page-a'}}, {'headers': {'Authorization': 'Bearer page-a'}}):
+        keys = QuotaTracker.keys_for(GRAPH_URL, **request)
+        assert 'token:' + keys[1][1] == token_keys[0]
+    assert QuotaTracker.keys_for(GRAPH_URL + '?access_token=page-a')[1] == keys[1]
+    assert QuotaTracker.keys_for(GRAPH_URL, params={'access_token': 'page-b'})[1] != keys[1]
+
+
+def test_low_graph_usage_is_not_paced():
+    tracker = QuotaTracker()
+    tracker.observe(GRAPH_URL, None, response(headers={'X-App-Usage': json.dumps({'call_count': 10})}))
+    assert tracker.reserve(GRAPH_URL) == 0.0
+    assert tracker.snapshot()['app:facebook']['usage'] == 10
+
+
+def test_high_graph_usage_spaces_requests_out():
+    tracker = QuotaTracker(max_interval=4.0)
+    usage = {'call_count': 85, 'total_time': 20, 'total_cputime': 5}
+    tracker.observe(GRAPH_URL, None, response(headers={'X-App-Usage': json.dumps(usage)}))
+    first = tracker.reserve(GRAPH_URL)
+    second = tracker.reserve(GRAPH_URL)
+    assert first == 0.0
+    assert 1.5 < second <= 2.0  # Halfway between the pace and block thresholds
+
+
+def test_business_usage_blocks_until_access_returns():
+    tracker = QuotaTracker()
+    usage = {'1234567890': [{'type': 'pages', 'call_count': 100, 'estimated_time_to_regain_access': 2}]}
+    tracker.observe(GRAPH_URL, None, response(headers={'X-Business-Use-Case-Usage': json.dumps(usage)}))
+    assert 110 < tracker.reserve(GRAPH_URL) <= 120
+
+
+def test_unreadable_graph_header_is_ignored():
+    tracker = QuotaTracker()
+    tracker.observe(GRAPH_URL, None, response(headers={'X-App-Usage': 'not json'}))
+    assert tracker.snapshot() == {}
+
+
+def test_x_remaining_budget_is_spread_until_reset():
+    tracker = QuotaTracker()
+    reset = time.time() + 100
+    headers = {'x-rate-limit-limit': '100', 'x-rate-limit-remaining': '10', 'x-rate-limit-reset': str(reset)}
+    tracker.observe(X_URL, X_AUTH, response(headers=headers))
+    assert tracker.reserve(X_URL, X_AUTH) == 0.0
+    assert 9 < tracker.reserve(X_URL, X_AUTH) <= 10
+    other_user = {'Authorization': 'OAuth oauth_token="someone-else"'}
+    assert tracker.reserve(X_URL, other_user) == 0.0
+
+
+def test_unreadable_x_headers_are_ignored():
+    tracker = QuotaTracker()
+    headers = {'x-rate-limit-limit': 'many', 'x-rate-limit-remaining': '10', 'x-rate-limit-reset': 'soon'}
+    tracker.observe(X_URL, X_AUTH, response(headers=headers))
+    assert tracker.snapshot() == {}
+    assert tracker.reserve(X_URL, X_AUTH) == 0.0
+
+
+def test_429_without_headers_waits_for_retry_after():
+    tracker = QuotaTracker()
+    tracker.observe(X_URL, X_AUTH, response(429, {'Retry-After': '30'}))
+    assert 29 < tracker.reserve(X_URL, X_AUTH) <= 30
+
+
+def test_expired_window_is_forgotten():
+    tracker = QuotaTracker()
+    headers = {'x-rate-limit-limit': '100', 'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() - 1)}
+    tracker.observe(X_URL, X_AUTH, response(headers=headers))
+    assert tracker.reserve(X_URL, X_AUTH) == 0.0
+    assert tracker.snapshot() == {}
+
+
+def test_publishing_limit_counts_publishes():
+    tracker = QuotaTracker()
+    assert tracker.publishing_limit('ig-1') is None
+    tracker.record_publishing_limit('ig-1', 20, 25)
+    tracker.record_publish('ig-1')
+    assert tracker.publishing_limit('ig-1') == (21, 25)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import pytest
+from aiohttp import web
+
+from decafluence.transport.async_http_transport import AsyncHttpTransport
+from decafluence.transport.concurrency_limiter import HostConcurrencyLimiters
+from decafluence.transport.quota_tracker import QuotaTracker
+from decafluence.uploads.streaming_multipart import StreamingMultipartEncoder
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(os.urandom(3 * 1024 + 17))
+    return str(path)
+
+
+def collect(encoder):
+    return b''.join(encoder)
+
+
+async def collect_async(encoder):
+    return b''.join([chunk async for chunk in encoder])
+
+
+def test_body_matches_declared_length_and_is_repeatable(media):
+    encoder = StreamingMultipartEncoder({'message': 'hi', 'skipped': None}, {'source': media}, chunk_size=1000)
+    body = collect(encoder)
+    assert len(body) == encoder.content_length == len(encoder)
+    assert encoder.headers['Content-Length'] == str(len(body))
+    assert collect(encoder) == body
+    assert asyncio.run(collect_async(encoder)) == body
+    assert b'name="skipped"' not in body
+    assert b'filename="clip.mp4"\r\nContent-Type: video/mp4\r\n' in body
+
+
+def test_header_parameters_are_escaped(media):
+    encoder = StreamingMultipartEncoder(files={'file': ('a"b\r\n.mp4', media, 'video/mp4')})
+    assert b'filename="a%22b%0D%0A.mp4"' in collect(encoder)
+
+
+def test_file_shrinking_mid_upload_fails(media):
+    encoder = StreamingMultipartEncoder(files={'source': media})
+    with open(media, 'r+b') as source:
+        source.truncate(100)
+    with pytest.raises(IOError):
+        collect(encoder)
+
+
+def test_server_receives_fields_and_file(media):
+    content = open(media, 'rb').read()
+
+    async def receive(request):
+        parts = {}
+        async for part in await request.multipart():
+            parts[part.name] = (part.filename, await part.read())
+        return web.json_response({
+            'length': request.headers.get('Content-Length'),
+            'message': parts['message'][1].decode(),
+            'filename': parts['source'][0],
+            'intact': parts['source'][1] == content,
+        })
+
+    async def main():
+        app = web.Application()
+        app.router.add_post('/upload', receive)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        host, port = runner.addresses[0][:2]
+        transport = AsyncHttpTransport(quota_tracker=QuotaTracker(), concurrency_limiters=HostConcurrencyLimiters())
+        encoder = StreamingMultipartEncoder({'message': 'hi'}, {'source': media}, chunk_size=1000)
+        try:
+            response = await transport.post(f"http://{host}:{port}/upload", data=encoder, headers=encoder.headers)
+            return response.json(), encoder.content_length
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    received, length = asyncio.run(main())
+    assert received == {'length': str(length), 'message': 'hi', 'filename': 'clip.mp4', 'intact': True}
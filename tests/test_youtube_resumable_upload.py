@@ -0,0 +1,171 @@
+import asyncio
+import os
+import re
+import types
+
+import pytest
+import requests
+from aiohttp import web
+
+from decafluence.oauth_helpers.youtube_oauth_helper import YouTubeOAuthHelper
+from decafluence.publisher_services.youtube_publisher_service import YouTubePublisherService
+from decafluence.transport.async_http_transport import AsyncHttpTransport
+from decafluence.transport.concurrency_limiter import HostConcurrencyLimiters
+from decafluence.transport.quota_tracker import QuotaTracker
+from decafluence.uploads import retry
+from decafluence.uploads.session_store import UploadSessionStore
+from decafluence.uploads.youtube_resumable_upload import CHUNK_GRANULARITY, YouTubeResumableUploader
+
+CHUNK_SIZE = CHUNK_GRANULARITY
+METADATA = {'snippet': {'title': 'Test'}, 'status': {'privacyStatus': 'private'}}
+
+
+class StandInServer:
+    """A minimal YouTube resumable-upload endpoint that stores bytes and can misbehave on cue."""
+
+    def __init__(self, total_size):
+        self.total_size = total_size
+        self.received = bytearray()
+        self.sessions_started = 0
+        self.chunk_puts = 0
+        self.status_queries = 0
+        self.faults = {}  # chunk PUT number -> 'partial' (store half, answer 503) or 'reject' (answer 400)
+
+    async def start_session(self, request):
+        self.sessions_started += 1
+        assert request.query['uploadType'] == 'resumable'
+        assert int(request.headers['X-Upload-Content-Length']) == self.total_size
+        return web.Response(headers={'Location': f"{request.url.origin()}/session/{self.sessions_started}"})
+
+    async def put(self, request):
+        content_range = request.headers['Content-Range']
+        body = await request.read()
+        if content_range.startswith('bytes */'):
+            self.status_queries += 1
+            return self._progress()
+
+        self.chunk_puts += 1
+        start, end = map(int, re.match(r'bytes (\d+)-(\d+)/\d+', content_range).groups())
+        assert start == len(self.received), "chunk sent from an offset the server didn't confirm"
+        assert len(body) == end - start + 1
+        fault = self.faults.pop(self.chunk_puts, None)
+        if fault == 'partial':
+            self.received += body[:len(body) // 2]
+            return web.Response(status=503)
+        if fault == 'reject':
+            return web.Response(status=400, text='simulated crash')
+        self.received += body
+        return self._progress()
+
+    def _progress(self):
+        if len(self.received) == self.total_size:
+            return web.json_response({'id': 'video-1'})
+        headers = {'Range': f"bytes=0-{len(self.received) - 1}"} if self.received else {}
+        return web.Response(status=308, headers=headers)
+
+
+class FlakyTransport:
+    """Raises ConnectionError for the first `failures` status queries, then defers to the real transport."""
+
+    def __init__(self, transport, failures):
+        self.transport = transport
+        self.failures = failures
+
+    async def post(self, url, **kwargs):
+        return await self.transport.post(url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        if kwargs['headers']['Content-Range'].startswith('bytes */') and self.failures:
+            self.failures -= 1
+            raise requests.ConnectionError("connection reset")
+        return await self.transport.put(url, **kwargs)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    async def sleep(delay):
+        pass
+    monkeypatch.setattr(retry, 'asyncio', types.SimpleNamespace(sleep=sleep))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(os.urandom(3 * CHUNK_SIZE + 1000))
+    return str(path)
+
+
+def run_with_server(server, scenario):
+    async def main():
+        app = web.Application(client_max_size=4 * CHUNK_SIZE)
+        app.router.add_post('/upload', server.start_session)
+        app.router.add_put('/session/{number}', server.put)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        host, port = runner.addresses[0][:2]
+        transport = AsyncHttpTransport(quota_tracker=QuotaTracker(), concurrency_limiters=HostConcurrencyLimiters())
+        try:
+            return await scenario(transport, f"http://{host}:{port}/upload")
+        finally:
+            await transport.close()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_uploads_in_chunks_and_recovers_from_partial_chunk(video, tmp_path, no_backoff):
+    data = open(video, 'rb').read()
+    server = StandInServer(len(data))
+    server.faults[2] = 'partial'
+    store = UploadSessionStore(str(tmp_path / 'sessions'))
+
+    async def scenario(transport, upload_url):
+        uploader = YouTubeResumableUploader(transport, upload_url=upload_url, session_store=store,
+                                            chunk_size=CHUNK_SIZE)
+        return await uploader.upload('token', video, METADATA)
+
+    assert run_with_server(server, scenario) == {'id': 'video-1'}
+    assert bytes(server.received) == data
+    # The 503 was followed by a status query, and sending resumed from the 308's Range
+    assert server.status_queries == 1
+    assert server.sessions_started == 1
+    assert os.listdir(tmp_path / 'sessions') == []
+
+
+def test_resumes_saved_session_after_a_crash(video, tmp_path, no_backoff):
+    data = open(video, 'rb').read()
+    server = StandInServer(len(data))
+    server.faults[3] = 'reject'
+    store = UploadSessionStore(str(tmp_path / 'sessions'))
+
+    async def scenario(transport, upload_url):
+        uploader = YouTubeResumableUploader(transport, upload_url=upload_url, session_store=store,
+                                            chunk_size=CHUNK_SIZE)
+        with pytest.raises(requests.HTTPError):
+            await uploader.upload('token', video, METADATA)
+        assert len(os.listdir(tmp_path / 'sessions')) == 1
+        confirmed = len(server.received)
+
+        # A new worker resumes the saved session, even though its first status query fails
+        restarted = YouTubeResumableUploader(FlakyTransport(transport, failures=1), upload_url=upload_url,
+                                             session_store=store, chunk_size=CHUNK_SIZE)
+        result = await restarted.upload('token', video, METADATA)
+        return confirmed, result
+
+    confirmed, result = run_with_server(server, scenario)
+    assert confirmed == 2 * CHUNK_SIZE
+    assert result == {'id': 'video-1'}
+    assert bytes(server.received) == data
+    assert server.sessions_started == 1
+    assert server.chunk_puts == 5  # Two chunks, the rejected one, then the remaining two
+    assert os.listdir(tmp_path / 'sessions') == []
+
+
+def test_publisher_keeps_sessions_in_configured_directory(tmp_path, monkeypatch):
+    configured = YouTubePublisherService(YouTubeOAuthHelper(), upload_session_dir=str(tmp_path / 'explicit'))
+    assert configured.async_service.uploader.session_store.directory == str(tmp_path / 'explicit')
+
+    monkeypatch.setenv('UPLOAD_SESSION_DIR', str(tmp_path / 'from-env'))
+    from_env = YouTubePublisherService(YouTubeOAuthHelper())
+    assert from_env.async_service.uploader.session_store.directory == str(tmp_path / 'from-env')
+    assert os.path.isdir(tmp_path / 'from-env')